@@ -1,7 +1,11 @@
 import streamlit as st
 import streamlit.components.v1 as components
+from streamlit.runtime import Runtime
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 import pandas as pd
 import os
+import logging
+import uuid
 from datetime import datetime, timedelta
 import plotly.express as px
 import plotly.graph_objects as go
@@ -12,9 +16,17 @@ from pages.performance_tracking import render as performance_tracking_render
 from pages.opportunity_identification import render as opportunity_identification_render
 from pages.risk_compliance import render as risk_compliance_render
 from pages.forecasting import render as forecasting_render
+from utils.chat import CHAT_VISIBLE_MESSAGES, chat_window, compact_history, iterate_sync, local_stream, stream_reply
+from utils.export import EXPORT_FORMATS, ExportUtils
 from utils.filters import GlobalFilters
+from utils.memory import memory_accountant
+from utils.query import is_export_request, parse_query, run_query
 from data_generator import DataGenerator
 
+logger = logging.getLogger("visa_dashboard.app")
+
+CHAT_ERROR_REPLY = "⚠️ Sorry, something went wrong while answering that. Please try again or rephrase the request."
+
 # Visa brand colors
 VISA_BLUE = "#003087"
 VISA_GREEN = "#00A86B"
@@ -259,14 +271,22 @@ Feel free to ask me anything about the dashboard, the data, or how to get the mo
                 st.session_state.show_chatbot = False
                 st.rerun()
         
-        # Display chat messages
+        # Display chat messages: the history summary plus a window of recent messages
         chat_container = st.container()
         with chat_container:
-            for message in st.session_state.chat_messages:
-                if message["role"] == "user":
-                    st.markdown(f'<div class="chat-message user-message">👤 {message["content"]}</div>', unsafe_allow_html=True)
-                else:
-                    st.markdown(f'<div class="chat-message assistant-message">🤖 {message["content"]}</div>', unsafe_allow_html=True)
+            window = st.session_state.get('chat_window', CHAT_VISIBLE_MESSAGES)
+            summary, hidden, visible = chat_window(st.session_state.chat_messages, window)
+            if summary is not None:
+                st.caption(summary["content"])
+            if hidden:
+                if st.button(f"Show {min(hidden, CHAT_VISIBLE_MESSAGES)} earlier messages", key="chat_show_earlier"):
+                    st.session_state.chat_window = window + CHAT_VISIBLE_MESSAGES
+                    st.rerun()
+            for message in visible:
+                render_chat_message(message)
+        
+        # Replies stream in here after the rest of the page has rendered
+        reply_slot = st.container()
         
         # Chat input
         st.markdown("---")
@@ -276,165 +296,125 @@ Feel free to ask me anything about the dashboard, the data, or how to get the mo
         with col2:
             if st.button("Send", key="send_message", type="primary"):
                 if user_input.strip():
-                    # Add user message
+                    # Add user message; the reply is streamed at the end of the run
                     st.session_state.chat_messages.append({"role": "user", "content": user_input})
-                    
-                    # Generate AI response
-                    ai_response = generate_ai_response(user_input)
-                    st.session_state.chat_messages.append({"role": "assistant", "content": ai_response})
-                    
-                    st.rerun()
-
-def generate_ai_response(user_input):
-    """Generate AI response based on user input"""
-    user_input_lower = user_input.lower()
+                    st.session_state.chat_pending = True
+                    st.session_state.chat_window = CHAT_VISIBLE_MESSAGES
+                    with reply_slot:
+                        render_chat_message(st.session_state.chat_messages[-1])
     
-    # Data source questions
-    if any(word in user_input_lower for word in ['data', 'source', 'where', 'from']):
-        return """📊 **Data Sources Information**
+    return reply_slot
 
-The dashboard uses synthetic data generated for demonstration purposes. Here are the key data sources:
-
-• **Revenue Data**: Mock quarterly data from FY2024-Q4 to FY2025, simulating realistic growth patterns
-• **Geographic Data**: Simulated performance across 25 countries in 5 regions
-• **Product Metrics**: Generated data for Visa Direct, B2B Connect, Traditional Cards, and Other Services
-• **Risk Metrics**: Synthetic compliance, fraud, and operational risk indicators
-• **Forecasting**: Monte Carlo simulations based on industry benchmarks
-
-For production use, this would integrate with live Visa data systems, payment networks, and external market data providers."""
+def render_chat_message(message):
+    """Render one chat message bubble"""
+    if message["role"] == "user":
+        st.markdown(f'<div class="chat-message user-message">👤 {message["content"]}</div>', unsafe_allow_html=True)
+    else:
+        st.markdown(f'<div class="chat-message assistant-message">🤖 {message["content"]}</div>', unsafe_allow_html=True)
     
-    # Export questions
-    elif any(word in user_input_lower for word in ['export', 'download', 'report', 'csv', 'pdf']):
-        return """📄 **Custom Export Options**
-
-I can help you create custom exports tailored to your needs:
-
-**Available Export Formats:**
-• CSV data files for specific metrics or time periods
-• PDF reports with selected visualizations
-• Excel workbooks with multiple data sheets
-• PowerPoint-ready charts and summaries
-
-**Custom Export Examples:**
-• Q3 FY2025 performance metrics only
-• Geographic analysis for specific regions
-• Risk dashboard summary for compliance reporting
-• Forecasting scenarios for executive presentations
-
-To request a custom export, just tell me:
-1. Which sections/metrics you need
-2. Time period or filters to apply
-3. Preferred format (CSV, PDF, Excel, etc.)
-
-*Note: In this demo, export functionality is simulated. Production version would generate actual files.*"""
+    if message.get("export"):
+        render_export_download(message["export"])
+
+def render_export_download(export):
+    """Download button for an export reply, serving the file built with the reply so it matches after a refresh"""
+    st.download_button(f"⬇️ Download {export['filename']}", export["data"], file_name=export["filename"],
+                       mime=export["mime"], key=f"chat_export_{export['id']}")
+
+def stream_pending_reply(reply_slot):
+    """Stream the assistant's reply to the last user message into the overlay"""
+    if not st.session_state.get('chat_pending'):
+        return
+    messages = st.session_state.chat_messages
     
-    # Feedback questions
-    elif any(word in user_input_lower for word in ['feedback', 'bug', 'issue', 'problem', 'suggestion']):
-        return """🛠️ **Feedback & Support**
-
-I'm here to collect your feedback and route it to the development team:
-
-**Types of Feedback:**
-• Bug reports or technical issues
-• Feature requests or improvements
-• Data accuracy concerns
-• UI/UX suggestions
-• Performance issues
-
-**How to Submit Feedback:**
-1. Describe the issue or suggestion clearly
-2. Include specific steps to reproduce (for bugs)
-3. Mention which dashboard section is affected
-4. Suggest your preferred solution (if any)
-
-I'll document your feedback with relevant details and ensure it reaches the development team with appropriate priority.
-
-**Common Issues:**
-• Chart loading slowly → Clear browser cache
-• Filters not working → Try refreshing the page
-• Data not updating → Use the "Refresh Data" button
-
-What specific feedback would you like to share?"""
+    # A widget interaction during streaming interrupts this run; keep whatever arrived.
+    # If nothing did, the reply stays pending and is retried on the next run. Errors
+    # are answered with an apology instead, so they are not raised again on every rerun.
+    export = None
+    tokens = []
+    completed = False
     
-    # Navigation help
-    elif any(word in user_input_lower for word in ['navigate', 'section', 'find', 'where', 'how']):
-        return """🧭 **Dashboard Navigation Guide**
-
-**Main Sections:**
-📊 **Executive Summary** - High-level KPIs, revenue trajectory, progress tracking
-📈 **Performance Tracking** - Detailed revenue/volume trends, geographic breakdown, product analysis
-🎯 **Opportunity Identification** - Market opportunities, competitive analysis, partnerships
-⚠️ **Risk & Compliance** - Risk metrics, regulatory status, incident monitoring
-🔮 **Forecasting** - Scenario planning, Monte Carlo simulation, sensitivity analysis
-
-**Navigation Tips:**
-• Use the radio buttons in the left sidebar to switch between sections
-• Click "Filters" in the top-right to customize data views
-• Each section has tabs for different sub-analyses
-• Hover over charts for detailed tooltips
-• Use the refresh button to reload data
-
-**Finding Specific Information:**
-• Revenue targets → Executive Summary
-• Geographic performance → Performance Tracking > Geographic tab
-• Market opportunities → Opportunity Identification > Market Opportunities
-• Risk status → Risk & Compliance
-• Future projections → Forecasting
-
-What specific information are you looking for?"""
+    def collect(stream):
+        for token in stream:
+            tokens.append(token)
+            yield token
     
-    # Business analysis questions
-    elif any(word in user_input_lower for word in ['analysis', 'trend', 'performance', 'forecast', 'growth']):
-        return """📈 **Business Analysis Insights**
-
-**Current Performance Highlights:**
-• Revenue: $3.5B in Q3 FY2025 (13% YoY growth)
-• CAGR: 9.5% achieved vs 10% target
-• Market Share: 22% globally
-• Volume Growth: 13% YoY (above 12% threshold)
-
-**Key Trends:**
-• Asia-Pacific leading growth at 18%
-• B2B digitization driving 25% growth in B2B Connect
-• Travel recovery contributing 15% YoY increase
-• Risk metrics remain within acceptable ranges
-
-**Strategic Insights:**
-• On track for 2030 target with current trajectory
-• Untapped opportunities in emerging corridors
-• Competitive position strong but innovation gap exists
-• Regulatory environment generally supportive
-
-**Areas for Focus:**
-• Accelerate partnership acquisitions
-• Improve cost competitiveness vs fintechs
-• Enhance B2B penetration in key markets
-• Monitor regulatory changes in EU and APAC
-
-Would you like me to dive deeper into any specific metric or trend?"""
+    try:
+        export_reply, export = plan_export_reply(messages[-1]["content"])
+        with reply_slot:
+            if export_reply is not None:
+                st.write_stream(collect(iterate_sync(local_stream(export_reply))))
+                if export is not None:
+                    render_export_download(export)
+            else:
+                st.write_stream(collect(iterate_sync(stream_reply(messages, st.session_state.data_generator))))
+        completed = True
+    except Exception:
+        logger.exception("Assistant reply failed")
+        if not tokens:
+            export = None
+            tokens.append(CHAT_ERROR_REPLY)
+            completed = True
+            reply_slot.markdown(CHAT_ERROR_REPLY)
+    finally:
+        if completed or tokens:
+            reply = "".join(tokens) if completed else "".join(tokens) + "\n\n*(reply interrupted)*"
+            message = {"role": "assistant", "content": reply}
+            if export is not None:
+                message["export"] = export
+            messages.append(message)
+            st.session_state.chat_pending = False
+            compact_history(messages)
+
+def plan_export_reply(user_input):
+    """Parse an export request into a query and run it, returning the reply and export, or (None, None)
+
+    A query that selects no rows gets a reply listing the quarters that do have data, and no export.
+    """
+    if not is_export_request(user_input):
+        return None, None
+    data_generator = st.session_state.data_generator
+    quarters = sorted(data_generator.revenue_data['quarter'].astype(str).unique())
+    query = parse_query(user_input, quarters)
+    # "How do I export?" has nothing to select on; let the assistant explain instead
+    if not query.constrained:
+        return None, None
+    result = run_query(data_generator, query)
+    if result.empty:
+        return f"""📭 **No data for {query.period_label or 'this selection'}**
+
+**Query:** {query.describe()}
+
+Revenue data is available for {len(quarters)} quarters: {', '.join(quarters)}.""", None
     
-    # Default response
-    else:
-        return f"""🤖 **I'm here to help!**
-
-I see you asked: "{user_input}"
-
-I can assist you with:
-• **Data questions** - Sources, methodologies, calculations
-• **Export requests** - Custom reports, filtered data, specific formats
-• **Technical support** - Bug reports, feedback, feature requests
-• **Navigation help** - Finding information, using features
-• **Business insights** - Trends, performance analysis, forecasts
-
-Could you please be more specific about what you'd like to know? For example:
-• "What's the source of the revenue data?"
-• "Can you export Q3 performance metrics?"
-• "How do I find competitive analysis?"
-• "What's driving the growth in Asia-Pacific?"
-
-I'm ready to provide detailed assistance with any aspect of the dashboard!"""
+    reply = f"""📄 **Custom Export Ready**
+
+**Query:** {query.describe()}
+
+{len(result)} rows × {len(result.columns)} columns: {', '.join(result.columns)}"""
+    if query.fmt not in EXPORT_FORMATS:
+        reply += f"\n\n*{query.fmt.upper()} output isn't available here, so the file is delivered as CSV.*"
+    data, filename, mime = ExportUtils.export_query_result(result, query.fmt, query.filename())
+    return reply, {"id": uuid.uuid4().hex[:8], "data": data, "filename": filename, "mime": mime}
+
+def get_session_id():
+    """Return the id of the current Streamlit session"""
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx else "default"
+
+def enforce_memory_budget():
+    """Apply memory budgets for the next run and forget sessions the server has closed"""
+    ctx = get_script_run_ctx()
+    memory_accountant.enforce(
+        st.session_state,
+        get_session_id(),
+        state_handle=ctx.session_state if ctx else None,
+        is_session_active=Runtime.instance().is_active_session if Runtime.exists() else None
+    )
 
 def main():
+    # Reload any session entries spilled to disk while the session was idle
+    memory_accountant.restore(st.session_state)
+    
     # Initialize data generator
     if 'data_generator' not in st.session_state:
         st.session_state.data_generator = DataGenerator()
@@ -498,8 +478,9 @@ def main():
         track_page_view(clean_page_name)
     
     # AI Chatbot overlay (conditionally shown)
+    reply_slot = None
     if st.session_state.show_chatbot:
-        render_chatbot_overlay()
+        reply_slot = render_chatbot_overlay()
     
     # Filters panel (conditionally shown)
     if st.session_state.show_filters:
@@ -542,6 +523,13 @@ def main():
         risk_compliance_render(st.session_state.data_generator, filters)
     elif page_key == "forecasting":
         forecasting_render(st.session_state.data_generator, filters)
+    
+    # Stream any pending assistant reply now that the page is on screen
+    if reply_slot is not None:
+        stream_pending_reply(reply_slot)
+    
+    # Measure session state and apply memory budgets for the next run
+    enforce_memory_budget()
 
 if __name__ == "__main__":
     main()
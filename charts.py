@@ -3,6 +3,8 @@ import plotly.express as px
 from plotly.subplots import make_subplots
 import pandas as pd
 import numpy as np
+from utils.fx import BASE_CURRENCY, CURRENCY_SYMBOLS, fx_engine
+from utils.trajectory import BASE_REVENUE_B, TARGET_CAGR_PCT, TARGET_REVENUE_B, TARGET_YEAR, target_path
 
 class ChartGenerator:
     def __init__(self):
@@ -49,12 +51,12 @@ class ChartGenerator:
         fig.update_layout(height=300, margin=dict(t=50, b=50, l=50, r=50))
         return fig
     
-    def create_revenue_trend(self, data):
+    def create_revenue_trend(self, data, currency=BASE_CURRENCY):
         """Create revenue trend line chart with actual vs target"""
         fig = go.Figure()
         
         # Group by quarter and sum revenue
-        quarterly_data = data.groupby('quarter')['revenue_b'].sum().reset_index()
+        quarterly_data = data.groupby('quarter', observed=True)['revenue_b'].sum().reset_index()
         quarterly_data = quarterly_data.sort_values('quarter')
         
         # Actual revenue line
@@ -67,20 +69,16 @@ class ChartGenerator:
             marker=dict(size=8)
         ))
         
-        # Target line (10% CAGR trajectory)
-        base_revenue = 12.7  # FY2024 base
-        target_revenues = []
-        for i, quarter in enumerate(quarterly_data['quarter']):
-            # Approximate quarterly growth for 10% annual CAGR
-            quarterly_growth = 0.024  # ~10% annual / 4 quarters
-            target_revenue = base_revenue * (1 + quarterly_growth) ** i
-            target_revenues.append(target_revenue)
+        # Target line: the plan CAGR compounded quarterly from the FY2024 base
+        target_revenues = target_path(
+            BASE_REVENUE_B, TARGET_CAGR_PCT, len(quarterly_data), periods_per_year=4
+        ) * fx_engine.latest_rate(currency)
         
         fig.add_trace(go.Scatter(
             x=quarterly_data['quarter'],
             y=target_revenues,
             mode='lines+markers',
-            name='Target (10% CAGR)',
+            name=f'Target ({TARGET_CAGR_PCT:.0f}% CAGR)',
             line=dict(color=self.visa_green, width=2, dash='dash'),
             marker=dict(size=6)
         ))
@@ -88,23 +86,23 @@ class ChartGenerator:
         fig.update_layout(
             title="Cross-Border Revenue Trajectory to 2030 Target",
             xaxis_title="Quarter",
-            yaxis_title="Revenue ($ Billions)",
+            yaxis_title=f"Revenue ({CURRENCY_SYMBOLS[currency]} Billions)",
             height=400,
             hovermode='x unified'
         )
         
         return fig
     
-    def create_geographic_heatmap(self, geographic_data):
-        """Create geographic performance heatmap"""
+    def create_geographic_heatmap(self, tile_data):
+        """Create geographic performance heatmap from pre-aggregated map tiles"""
         fig = px.scatter_geo(
-            geographic_data,
+            tile_data,
             lat='lat',
             lon='lon',
             size='revenue_m',
             color='growth_rate',
-            hover_name='country',
-            hover_data={'region': True, 'penetration': True, 'revenue_m': ':,.0f'},
+            hover_name='label',
+            hover_data={'region': True, 'penetration': ':.1f', 'revenue_m': ':,.0f', 'countries': True},
             color_continuous_scale=['red', 'yellow', 'green'],
             title="Global Cross-Border Performance Heatmap"
         )
@@ -132,7 +130,7 @@ class ChartGenerator:
         fig.update_traces(
             textposition='inside',
             textinfo='percent+label',
-            hovertemplate='<b>%{label}</b><br>Revenue Share: %{value}%<br>Transactions: %{customdata:.1f}B<extra></extra>',
+            hovertemplate='<b>%{label}</b><br>Revenue Share: %{value:.1f}%<br>Transactions: %{customdata:.1f}B<extra></extra>',
             customdata=product_data['transactions_b']
         )
         
@@ -240,8 +238,8 @@ class ChartGenerator:
         fig.update_layout(height=600, title_text="Risk & Compliance Dashboard")
         return fig
     
-    def create_forecast_scenarios(self, forecast_data):
-        """Create forecasting scenarios with confidence bands"""
+    def create_forecast_scenarios(self, forecast_data, model_forecast=None, level=0.8, model_label='Statistical Forecast'):
+        """Create forecasting scenarios with the fitted forecast's prediction interval"""
         fig = go.Figure()
         
         scenarios = ['conservative', 'base_case', 'optimistic']
@@ -259,23 +257,30 @@ class ChartGenerator:
                 line=dict(color=colors[i], width=3),
                 marker=dict(size=6)
             ))
-            
-            # Confidence bands for base case only
-            if scenario == 'base_case':
-                fig.add_trace(go.Scatter(
-                    x=list(scenario_data['year']) + list(scenario_data['year'][::-1]),
-                    y=list(scenario_data['confidence_upper']) + list(scenario_data['confidence_lower'][::-1]),
-                    fill='toself',
-                    fillcolor='rgba(0,48,135,0.2)',
-                    line=dict(color='rgba(255,255,255,0)'),
-                    hoverinfo="skip",
-                    showlegend=False,
-                    name='Confidence Interval'
-                ))
         
-        # Add target line at $22.5B for 2030
-        fig.add_hline(y=22.5, line_dash="dash", line_color="green",
-                      annotation_text="2030 Target ($22.5B)")
+        # Fitted statistical forecast with its prediction interval band
+        if model_forecast is not None:
+            fig.add_trace(go.Scatter(
+                x=list(model_forecast['year']) + list(model_forecast['year'][::-1]),
+                y=list(model_forecast['upper']) + list(model_forecast['lower'][::-1]),
+                fill='toself',
+                fillcolor='rgba(0,48,135,0.2)',
+                line=dict(color='rgba(255,255,255,0)'),
+                hoverinfo="skip",
+                name=f'{level:.0%} Prediction Interval'
+            ))
+            fig.add_trace(go.Scatter(
+                x=model_forecast['year'],
+                y=model_forecast['revenue_b'],
+                mode='lines+markers',
+                name=model_label,
+                line=dict(color='#9013FE', width=2, dash='dot'),
+                marker=dict(size=6)
+            ))
+        
+        # Add target line for 2030
+        fig.add_hline(y=TARGET_REVENUE_B, line_dash="dash", line_color="green",
+                      annotation_text=f"{TARGET_YEAR} Target (${TARGET_REVENUE_B}B)")
         
         fig.update_layout(
             title="Revenue Forecasting Scenarios to 2030",
@@ -2,8 +2,21 @@ import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 import random
+import hashlib
+from utils.schema import optimize_frames
+from utils.fiscal_calendar import NAMED_PERIODS, FiscalDateIndex, fiscal_quarter_starts, quarter_label, quarter_start
+from utils.fx import BASE_CURRENCY, fx_engine
+from utils.filter_index import FILTER_DIMENSIONS, DimensionIndex, filter_cache_key
+from utils.cache import VersionedCache
+from utils.risk_series import RiskTimeSeries
+from utils.trajectory import BASE_REVENUE_B, BASE_YEAR, TARGET_CAGR_PCT, TARGET_REVENUE_B, TARGET_YEAR, project
+
+# Aggregates of the revenue fact table, shared by every session on the same data version
+revenue_rollups = VersionedCache("revenue_rollups", max_entries=256)
 
 class DataGenerator:
+    FRAME_NAMES = ['revenue_data', 'geographic_data', 'product_data', 'opportunity_data', 'forecast_data', 'incident_data', 'aml_alert_data']
+    
     def __init__(self):
         self.visa_blue = "#003087"
         self.visa_green = "#00A86B"
@@ -15,23 +28,38 @@ class DataGenerator:
         
         # Generate all mock datasets
         self.revenue_data = self._generate_revenue_data()
-        self.kpi_data = self._generate_kpi_data()
+        self.kpi_inputs = self._generate_kpi_inputs()
         self.geographic_data = self._generate_geographic_data()
         self.product_data = self._generate_product_data()
         self.opportunity_data = self._generate_opportunity_data()
+        self.risk_series = self._generate_risk_series()
         self.risk_data = self._generate_risk_data()
+        self.incident_data = self._generate_incident_data()
+        self.aml_alert_data = self._generate_aml_alert_data()
         self.forecast_data = self._generate_forecast_data()
         
+        # Store frames with compact dtypes (categoricals, float32)
+        self._optimize_dtypes()
+        
+        # Sorted date indexes so time filters become row-range slices; other dated frames are indexed on first use
+        self.date_indexes = {'revenue_data': FiscalDateIndex(self.revenue_data['date'])}
+        # Row bitmaps per segment/region/product value for the same frame
+        self.dimension_indexes = {
+            'revenue_data': DimensionIndex(self.revenue_data, list(FILTER_DIMENSIONS.values()))
+        }
+        
+        # Content hash used to key derived caches shared across sessions
+        self.data_version = self._compute_data_version()
+        
     def _generate_revenue_data(self):
         """Generate quarterly revenue and volume data from FY2024 to Q4 FY2025"""
         quarters = []
-        base_date = datetime(2023, 10, 1)  # FY2024 Q1 start
+        quarter_starts = fiscal_quarter_starts(quarter_start(2024, 1), 8)  # 8 quarters of data
         
-        for i in range(8):  # 8 quarters of data
-            quarter_start = base_date + timedelta(days=90*i)
+        for i, quarter_start_date in enumerate(quarter_starts):
             quarters.append({
-                'quarter': f"FY{quarter_start.year + (1 if quarter_start.month >= 10 else 0)}-Q{((quarter_start.month - 1) // 3) % 4 + 1}",
-                'date': quarter_start,
+                'quarter': quarter_label(quarter_start_date),
+                'date': quarter_start_date,
                 'revenue_b': 2.8 + (i * 0.1) + np.random.normal(0, 0.05),  # Growing from $2.8B to $3.5B
                 'volume_growth_pct': 8 + (i * 0.8) + np.random.normal(0, 1),  # Growing volume
                 'segment': np.random.choice(['Travel', 'E-commerce', 'B2B', 'Remittances']),
@@ -42,36 +70,53 @@ class DataGenerator:
         segments = ['Travel', 'E-commerce', 'B2B', 'Remittances']
         regions = ['North America', 'Europe', 'Asia-Pacific', 'Latin America', 'Middle East & Africa']
         
+        # Product mix follows product_data revenue shares; a separate random stream
+        # keeps the other datasets identical to before the product split existed
+        products = ['Visa Direct', 'B2B Connect', 'Traditional Cards', 'Other Services']
+        product_mix = np.array([0.35, 0.30, 0.25, 0.10])
+        product_rng = np.random.RandomState(7)
+        
         detailed_data = []
         for quarter_data in quarters:
             for segment in segments:
                 for region in regions:
-                    detailed_data.append({
-                        'quarter': quarter_data['quarter'],
-                        'date': quarter_data['date'],
-                        'revenue_b': quarter_data['revenue_b'] * np.random.uniform(0.1, 0.3),
-                        'volume_growth_pct': quarter_data['volume_growth_pct'] + np.random.normal(0, 2),
-                        'segment': segment,
-                        'region': region,
-                        'transactions_m': np.random.uniform(50, 200),
-                        'yield_pct': np.random.uniform(0.10, 0.15)
-                    })
-        
-        return pd.DataFrame(detailed_data)
-    
-    def _generate_kpi_data(self):
-        """Generate current KPI metrics"""
+                    revenue = quarter_data['revenue_b'] * np.random.uniform(0.1, 0.3)
+                    volume_growth = quarter_data['volume_growth_pct'] + np.random.normal(0, 2)
+                    transactions = np.random.uniform(50, 200)
+                    yield_pct = np.random.uniform(0.10, 0.15)
+                    
+                    weights = product_mix * product_rng.uniform(0.8, 1.2, len(products))
+                    weights /= weights.sum()
+                    for product, weight in zip(products, weights):
+                        detailed_data.append({
+                            'quarter': quarter_data['quarter'],
+                            'date': quarter_data['date'],
+                            'revenue_b': revenue * weight,
+                            'volume_growth_pct': volume_growth + product_rng.normal(0, 1),
+                            'segment': segment,
+                            'region': region,
+                            'product': product,
+                            'transactions_m': transactions * weight,
+                            'yield_pct': yield_pct
+                        })
+        
+        return pd.DataFrame(detailed_data).sort_values('date', kind='stable').reset_index(drop=True)
+    
+    def _generate_kpi_inputs(self):
+        """Planning targets and externally sourced KPI values not derivable from the datasets"""
         return {
-            'current_revenue': 3.5,  # $3.5B Q3 FY2025
-            'achieved_cagr': 9.5,   # 9.5% CAGR
-            'volume_growth': 13.0,  # 13% YoY
-            'revenue_yield': 0.12,  # 0.12%
-            'market_share': 22.0,   # 22%
-            'target_revenue_2030': 22.5,  # $22.5B target
-            'base_revenue_2024': 12.7,    # $12.7B FY2024
-            'target_cagr': 10.0,          # 10% target CAGR
-            'ytd_revenue': 13.5,          # $13.5B YTD
-            'q3_volume_growth': 12.8      # 12.8% Q3 growth
+            'target_revenue_2030': TARGET_REVENUE_B,
+            'base_revenue_2024': BASE_REVENUE_B,
+            'target_cagr': TARGET_CAGR_PCT,
+            'market_share': 22.0,         # 22%, industry reports
+            'customer_acquisition_k': 8.5,  # 8.5K/month, CRM
+            'transaction_success_rate': 99.7,
+            # Values one year earlier, for YoY changes
+            'prior': {
+                'market_share': 19.9,
+                'customer_acquisition_k': 7.4,
+                'transaction_success_rate': 99.6
+            }
         }
     
     def _generate_geographic_data(self):
@@ -157,23 +202,95 @@ class DataGenerator:
         
         return pd.DataFrame(opportunities)
     
+    def _generate_risk_series(self):
+        """Generate daily risk KPI series for the last three fiscal years"""
+        # Separate random stream so the other datasets are unaffected
+        risk_rng = np.random.RandomState(11)
+        dates = pd.date_range(quarter_start(2023, 1), quarter_start(2026, 1) - timedelta(days=1), freq='D')
+        n_days = len(dates)
+        seasonality = np.sin(2 * np.pi * np.arange(n_days) / 365)
+        
+        metrics = {
+            'fraud_rate': np.clip(0.42 + 0.03 * seasonality + risk_rng.normal(0, 0.02, n_days), 0, None),  # <0.5% target
+            'chargeback_ratio': np.clip(0.8 + 0.05 * seasonality + risk_rng.normal(0, 0.05, n_days), 0, None),  # 1% target
+            'compliance_score': np.clip(94.5 + risk_rng.normal(0, 1.0, n_days), 0, 100),
+            'transaction_cost': 0.9 - 0.1 * np.arange(n_days) / n_days + risk_rng.normal(0, 0.02, n_days),  # <1% FSB target
+            'aml_alerts': risk_rng.poisson(0.8, n_days).astype(float),
+            'uptime_pct': np.clip(100 - risk_rng.exponential(0.02, n_days), 0, 100)
+        }
+        return RiskTimeSeries(dates, metrics)
+    
     def _generate_risk_data(self):
         """Generate risk and compliance metrics"""
+        # Current values are 30-day windowed aggregates of the daily series
+        lo, hi = self.risk_series.last_days(30)
         return {
-            'fraud_rate': 0.45,      # <0.5% target
-            'chargeback_ratio': 0.8,  # 1% target
-            'compliance_score': 95,   # 95% score
-            'transaction_cost': 0.8,  # <1% FSB target
-            'aml_alerts': 23,
+            'fraud_rate': self.risk_series.window_mean('fraud_rate', lo, hi),
+            'chargeback_ratio': self.risk_series.window_mean('chargeback_ratio', lo, hi),
+            'compliance_score': self.risk_series.window_mean('compliance_score', lo, hi),
+            'transaction_cost': self.risk_series.window_mean('transaction_cost', lo, hi),
+            'aml_alerts': int(self.risk_series.window_sum('aml_alerts', lo, hi)),
             'regulatory_incidents': 2,
             'data_breaches': 0,
-            'uptime_pct': 99.98
+            'uptime_pct': self.risk_series.window_mean('uptime_pct', lo, hi)
+        }
+    
+    def _generate_incident_data(self):
+        """Generate an incident event log over the same days as the risk series"""
+        incident_rng = np.random.RandomState(13)
+        dates = pd.to_datetime(self.risk_series.dates)
+        
+        # Daily incident rate and severity mix (Critical, High, Medium, Low) per type
+        incident_types = {
+            'Fraud Attempt': (0.25, [0.03, 0.12, 0.40, 0.45]),
+            'System Outage': (0.06, [0.05, 0.20, 0.45, 0.30]),
+            'Data Breach': (0.02, [0.10, 0.25, 0.35, 0.30]),
+            'Compliance Violation': (0.12, [0.02, 0.10, 0.38, 0.50]),
+            'Operational Error': (0.30, [0.01, 0.06, 0.33, 0.60])
         }
+        severities = ['Critical', 'High', 'Medium', 'Low']
+        regions = ['North America', 'Europe', 'Asia-Pacific', 'Latin America', 'Middle East & Africa']
+        region_weights = [0.30, 0.25, 0.25, 0.10, 0.10]
+        
+        frames = []
+        for incident_type, (daily_rate, severity_mix) in incident_types.items():
+            counts = incident_rng.poisson(daily_rate, len(dates))
+            n_events = int(counts.sum())
+            frames.append(pd.DataFrame({
+                'date': np.repeat(dates, counts),
+                'incident_type': incident_type,
+                'severity': incident_rng.choice(severities, n_events, p=severity_mix),
+                'region': incident_rng.choice(regions, n_events, p=region_weights)
+            }))
+        
+        return pd.concat(frames, ignore_index=True).sort_values('date', kind='stable').reset_index(drop=True)
+    
+    def _generate_aml_alert_data(self):
+        """Generate AML alert records matching the daily alert counts of the risk series"""
+        aml_rng = np.random.RandomState(17)
+        dates = pd.to_datetime(self.risk_series.dates)
+        counts = self.risk_series.values('aml_alerts').astype(int)
+        n_alerts = int(counts.sum())
+        
+        opened_at = np.repeat(dates, counts) + pd.to_timedelta(aml_rng.uniform(0, 24, n_alerts), unit='h')
+        investigation_days = aml_rng.lognormal(1.0, 0.5, n_alerts)  # ~3 days on average
+        closed_at = opened_at + pd.to_timedelta(investigation_days, unit='D')
+        # Alerts still under investigation at the end of the data are open
+        still_open = closed_at > dates[-1] + timedelta(days=1)
+        false_positive = aml_rng.uniform(0, 1, n_alerts) < 0.12
+        
+        return pd.DataFrame({
+            'alert_id': [f"AML-{i:06d}" for i in range(1, n_alerts + 1)],
+            'opened_at': opened_at,
+            'closed_at': closed_at.where(~still_open),
+            'false_positive': false_positive & ~still_open,
+            'report_filed': (~false_positive) & ~still_open & (aml_rng.uniform(0, 1, n_alerts) < 0.2)
+        })
     
     def _generate_forecast_data(self):
-        """Generate forecasting scenarios"""
-        base_year = 2024
-        years = list(range(base_year, 2031))
+        """Generate planning scenario paths; fitted forecasts and intervals live in utils.forecasting"""
+        base_year = BASE_YEAR
+        years = list(range(base_year, TARGET_YEAR + 1))
         
         scenarios = {
             'conservative': {'cagr': 8, 'volatility': 0.02},
@@ -182,46 +299,128 @@ class DataGenerator:
         }
         
         forecast_data = []
-        base_revenue = 12.7  # FY2024 base
+        base_revenue = BASE_REVENUE_B
         
         for scenario_name, params in scenarios.items():
             for i, year in enumerate(years):
                 if year == base_year:
                     revenue = base_revenue
                 else:
-                    years_elapsed = year - base_year
-                    growth_factor = (1 + params['cagr']/100) ** years_elapsed
                     noise = np.random.normal(0, params['volatility'])
-                    revenue = base_revenue * growth_factor * (1 + noise)
+                    revenue = float(project(base_revenue, params['cagr'], year - base_year)) * (1 + noise)
                 
                 forecast_data.append({
                     'year': year,
                     'scenario': scenario_name,
-                    'revenue_b': revenue,
-                    'confidence_lower': revenue * 0.9,
-                    'confidence_upper': revenue * 1.1
+                    'revenue_b': revenue
                 })
         
         return pd.DataFrame(forecast_data)
     
+    def _optimize_dtypes(self):
+        """Apply the frame schemas and keep a report of bytes saved per frame"""
+        optimized, self.schema_report = optimize_frames({name: getattr(self, name) for name in self.FRAME_NAMES})
+        for name, frame in optimized.items():
+            setattr(self, name, frame)
+    
+    def _compute_data_version(self):
+        """Hash the contents of all frames into a short version string"""
+        digest = hashlib.sha1()
+        for name in self.FRAME_NAMES:
+            digest.update(pd.util.hash_pandas_object(getattr(self, name), index=True).to_numpy().tobytes())
+        for metric in self.risk_series.metric_names:
+            digest.update(self.risk_series.values(metric).tobytes())
+        digest.update(repr(self.kpi_inputs).encode())
+        return digest.hexdigest()[:12]
+    
+    def _frame_name(self, data):
+        """Return the attribute name of one of our frames, if data is one"""
+        for name in self.FRAME_NAMES:
+            if getattr(self, name) is data:
+                return name
+        return None
+    
+    def get_date_index(self, data, frame_name=None):
+        """Return the date index of one of our frames, built once; other frames get a fresh index"""
+        frame_name = frame_name or self._frame_name(data)
+        if frame_name is None:
+            return FiscalDateIndex(data['date'])
+        if frame_name not in self.date_indexes:
+            # Currency conversion keeps row order, so the base frame's index serves every currency
+            self.date_indexes[frame_name] = FiscalDateIndex(getattr(self, frame_name)['date'])
+        return self.date_indexes[frame_name]
+    
+    def get_currency_frame(self, frame_name, currency):
+        """Return a frame with its monetary columns in the given currency"""
+        return fx_engine.convert(getattr(self, frame_name), currency, self.data_version, frame_name)
+    
+    def _resolve_date_range(self, date_index, filters):
+        """Return the (start, end) selected by the time filters, or None"""
+        if filters.get('period') in NAMED_PERIODS:
+            return date_index.period_range(filters['period'])
+        if 'date_range' in filters and filters['date_range']:
+            return filters['date_range']
+        return None
+    
+    def _filtered_rows(self, frame_name, filters):
+        """Return the row positions of an indexed frame that pass the filters"""
+        date_index = self.date_indexes[frame_name]
+        mask = self.dimension_indexes[frame_name].mask(filters)
+        date_range = self._resolve_date_range(date_index, filters)
+        
+        if date_range is None:
+            rows = np.arange(date_index.order.size)
+        else:
+            lo, hi = date_index.row_range(*date_range)
+            rows = date_index.order[lo:hi]
+            if not date_index.is_sorted:
+                rows = np.sort(rows)
+        
+        if mask is not None:
+            rows = rows[mask[rows]]
+        return rows
+    
     def get_filtered_data(self, data, filters):
         """Apply global filters to any dataset"""
-        filtered_data = data.copy()
+        frame_name = self._frame_name(data)
+        currency = filters.get('currency', BASE_CURRENCY)
+        if frame_name and currency != BASE_CURRENCY:
+            data = self.get_currency_frame(frame_name, currency)
         
-        if 'date_range' in filters and filters['date_range']:
-            if 'date' in filtered_data.columns:
-                start_date, end_date = filters['date_range']
-                filtered_data = filtered_data[
-                    (filtered_data['date'] >= start_date) & 
-                    (filtered_data['date'] <= end_date)
-                ]
-        
-        if 'segments' in filters and filters['segments']:
-            if 'segment' in filtered_data.columns:
-                filtered_data = filtered_data[filtered_data['segment'].isin(filters['segments'])]
-        
-        if 'regions' in filters and filters['regions']:
-            if 'region' in filtered_data.columns:
-                filtered_data = filtered_data[filtered_data['region'].isin(filters['regions'])]
-        
-        return filtered_data
+        # Indexed fact tables: date slice plus dimension bitmaps, no column scans
+        if frame_name in self.dimension_indexes:
+            return data.iloc[self._filtered_rows(frame_name, filters)]
+        
+        filtered_data = data
+        
+        if 'date' in data.columns:
+            date_index = self.get_date_index(data, frame_name)
+            date_range = self._resolve_date_range(date_index, filters)
+            if date_range is not None:
+                start_date, end_date = date_range
+                filtered_data = date_index.slice(filtered_data, start_date, end_date)
+        
+        mask = None
+        for filter_key, column in FILTER_DIMENSIONS.items():
+            if filters.get(filter_key) and column in filtered_data.columns:
+                column_mask = filtered_data[column].isin(filters[filter_key])
+                mask = column_mask if mask is None else mask & column_mask
+        
+        if mask is not None:
+            return filtered_data[mask]
+        return filtered_data.copy()
+    
+    def get_revenue_rollup(self, filters, by):
+        """Aggregate filtered revenue by the given dimensions (shared cache, treat as read-only)"""
+        by = list(by)
+        
+        def compute():
+            filtered = self.get_filtered_data(self.revenue_data, filters)
+            return filtered.groupby(by, observed=True).agg(
+                revenue_b=('revenue_b', 'sum'),
+                transactions_m=('transactions_m', 'sum'),
+                volume_growth_pct=('volume_growth_pct', 'mean'),
+                yield_pct=('yield_pct', 'mean')
+            ).reset_index()
+        
+        return revenue_rollups.get_or_compute(self.data_version, (filter_cache_key(filters), tuple(by)), compute)
@@ -1,12 +1,19 @@
 import streamlit as st
 import plotly.graph_objects as go
 from charts import ChartGenerator
+from utils.fiscal_calendar import parse_quarter_label
+from utils.fx import CURRENCY_SYMBOLS, fx_engine
+from utils.kpi_snapshots import get_kpi_snapshots
+from utils.kpis import get_kpis
+from utils.trajectory import TARGET_YEAR, progress, required_cagr
 
 def render(data_generator, filters):
     st.title("📊 Executive Summary")
     
-    # Get KPI data
-    kpi_data = data_generator.kpi_data
+    # Get KPI data, computed once per data version by the KPI registry
+    kpis = get_kpis(data_generator)
+    kpi_data = kpis.frame['value']
+    as_of_year, as_of_quarter = parse_quarter_label(kpis.as_of)
     chart_gen = ChartGenerator()
     
     # Key metrics row
@@ -14,32 +21,49 @@ def render(data_generator, filters):
     
     with col1:
         st.metric(
-            label="Current Revenue (Q3 FY2025)",
-            value=f"${kpi_data['current_revenue']:.1f}B",
+            label=f"Current Revenue ({kpis.as_of})",
+            value=kpis.frame.at['current_revenue', 'display'],
             delta=f"{kpi_data['volume_growth']:.1f}% YoY"
         )
     
     with col2:
         st.metric(
             label="Achieved CAGR",
-            value=f"{kpi_data['achieved_cagr']:.1f}%",
-            delta=f"{kpi_data['achieved_cagr'] - kpi_data['target_cagr']:.1f}% vs Target"
+            value=kpis.frame.at['achieved_cagr', 'display'],
+            delta=f"{kpi_data['achieved_cagr'] - kpis.target('achieved_cagr'):.1f}% vs Target"
         )
     
     with col3:
         st.metric(
             label="Market Share",
-            value=f"{kpi_data['market_share']:.1f}%",
-            delta="2.1% vs Prior Year"
+            value=kpis.frame.at['market_share', 'display'],
+            delta=f"{kpi_data['market_share'] - kpis.prior('market_share'):.1f}% vs Prior Year"
         )
     
     with col4:
         st.metric(
             label="Revenue Yield",
-            value=f"{kpi_data['revenue_yield']:.2f}%",
-            delta="0.01% vs Target"
+            value=kpis.frame.at['revenue_yield', 'display'],
+            delta=f"{kpi_data['revenue_yield'] - kpis.target('revenue_yield'):.2f}% vs Target"
         )
     
+    # KPIs for the selected regions and segments, read from the precomputed snapshots
+    snapshot = get_kpi_snapshots(data_generator).lookup(filters)
+    if snapshot is not None:
+        currency = filters.get('currency', 'USD')
+        st.caption(f"Selected regions & segments, {snapshot['as_of']} (all products)")
+        snap_col1, snap_col2, snap_col3 = st.columns(3)
+        with snap_col1:
+            st.metric(
+                label="Revenue Run Rate",
+                value=f"{CURRENCY_SYMBOLS[currency]}{snapshot['revenue_b'] * fx_engine.latest_rate(currency):.1f}B",
+                delta=f"{snapshot['revenue_growth_pct']:.1f}% YoY"
+            )
+        with snap_col2:
+            st.metric(label="Volume Growth", value=f"{snapshot['volume_growth_pct']:.1f}%")
+        with snap_col3:
+            st.metric(label="Revenue Yield", value=f"{snapshot['yield_pct']:.2f}%")
+    
     st.markdown("---")
     
     # KPI Gauges
@@ -50,7 +74,7 @@ def render(data_generator, filters):
     with gauge_col1:
         cagr_gauge = chart_gen.create_kpi_gauge(
             value=kpi_data['achieved_cagr'],
-            target=kpi_data['target_cagr'],
+            target=kpis.target('achieved_cagr'),
             title="CAGR Progress",
             suffix="%"
         )
@@ -59,8 +83,8 @@ def render(data_generator, filters):
     with gauge_col2:
         revenue_gauge = chart_gen.create_kpi_gauge(
             value=kpi_data['current_revenue'],
-            target=4.0,  # Q3 target
-            title="Q3 Revenue",
+            target=kpis.target('current_revenue'),
+            title=f"Q{as_of_quarter} Revenue",
             suffix="B"
         )
         st.plotly_chart(revenue_gauge, use_container_width=True)
@@ -68,7 +92,7 @@ def render(data_generator, filters):
     with gauge_col3:
         volume_gauge = chart_gen.create_kpi_gauge(
             value=kpi_data['volume_growth'],
-            target=15.0,  # Volume growth target
+            target=kpis.target('volume_growth'),
             title="Volume Growth",
             suffix="%"
         )
@@ -78,30 +102,34 @@ def render(data_generator, filters):
     st.subheader("Revenue Trajectory to 2030 Target")
     
     filtered_revenue_data = data_generator.get_filtered_data(data_generator.revenue_data, filters)
-    revenue_trend = chart_gen.create_revenue_trend(filtered_revenue_data)
+    revenue_trend = chart_gen.create_revenue_trend(filtered_revenue_data, filters.get('currency', 'USD'))
     st.plotly_chart(revenue_trend, use_container_width=True)
     
     # Progress summary
-    st.subheader("Path to $22.5B by 2030")
+    st.subheader(f"Path to ${kpi_data['target_revenue_2030']:.1f}B by {TARGET_YEAR}")
     
     progress_col1, progress_col2 = st.columns(2)
     
     with progress_col1:
-        current_progress = (kpi_data['current_revenue'] * 4 - kpi_data['base_revenue_2024']) / (kpi_data['target_revenue_2030'] - kpi_data['base_revenue_2024']) * 100
+        current_progress = progress(kpi_data['run_rate_revenue'], kpi_data['base_revenue_2024'], kpi_data['target_revenue_2030'])
+        # Years left from the end of the latest fiscal year in the data
+        years_remaining = TARGET_YEAR - as_of_year
+        cagr_needed = required_cagr(kpi_data['run_rate_revenue'], kpi_data['target_revenue_2030'], years_remaining)
         
         st.info(f"""
         **Current Progress: {current_progress:.1f}%**
         
         - Base FY2024: ${kpi_data['base_revenue_2024']:.1f}B
-        - Current Run Rate: ${kpi_data['current_revenue'] * 4:.1f}B
+        - Current Run Rate: ${kpi_data['run_rate_revenue']:.1f}B
         - 2030 Target: ${kpi_data['target_revenue_2030']:.1f}B
-        - Required CAGR: {kpi_data['target_cagr']:.1f}%
+        - Plan CAGR: {kpis.target('achieved_cagr'):.1f}%
+        - Required CAGR from Run Rate: {cagr_needed:.1f}% over {years_remaining} years
         """)
     
     with progress_col2:
-        if kpi_data['achieved_cagr'] >= kpi_data['target_cagr']:
+        if kpis.status('achieved_cagr') == 'above':
             st.success("✅ **ON TRACK** - Achieving target CAGR")
-        elif kpi_data['achieved_cagr'] >= kpi_data['target_cagr'] * 0.9:
+        elif kpis.status('achieved_cagr') == 'near':
             st.warning("⚠️ **MONITOR** - Slightly below target")
         else:
             st.error("🚨 **ACTION REQUIRED** - Significantly below target")
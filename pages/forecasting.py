@@ -3,6 +3,11 @@ import plotly.graph_objects as go
 import plotly.express as px
 import numpy as np
 from charts import ChartGenerator
+from utils.forecasting import get_revenue_forecasts
+from utils.reconciliation import RECONCILIATION_METHODS, get_reconciled_forecasts
+from utils.scenarios import DRIVER_NAMES, SCENARIO_DRIVERS, evaluate_scenarios, get_scenario_grid, tornado
+from utils.sensitivity import MONTE_CARLO_DRIVERS, get_sensitivity
+from utils.trajectory import BASE_REVENUE_B, BASE_YEAR, TARGET_CAGR_PCT, TARGET_REVENUE_B, TARGET_YEAR, project, required_cagr
 
 def render(data_generator, filters):
     st.title("🔮 Forecasting & Scenario Planning")
@@ -36,17 +41,51 @@ def render(data_generator, filters):
     # Base forecast scenarios
     st.subheader("Revenue Forecast Scenarios to 2030")
     
-    forecast_chart = chart_gen.create_forecast_scenarios(data_generator.forecast_data)
+    revenue_forecasts = get_revenue_forecasts(data_generator)
+    hierarchy = get_reconciled_forecasts(data_generator)
+    reconciliation_method = st.selectbox(
+        "Forecast Reconciliation",
+        list(RECONCILIATION_METHODS),
+        format_func=RECONCILIATION_METHODS.get,
+        key="reconciliation_method"
+    )
+    forecast_chart = chart_gen.create_forecast_scenarios(
+        data_generator.forecast_data,
+        hierarchy.annual_total(reconciliation_method, 0.8),
+        model_label=f"Statistical Forecast ({RECONCILIATION_METHODS[reconciliation_method]})"
+    )
     st.plotly_chart(forecast_chart, use_container_width=True)
     
+    with st.expander("Hierarchical Reconciliation"):
+        st.caption(
+            f"Total, {len(hierarchy.nodes) - 1 - len(revenue_forecasts.keys)} segment/region totals and "
+            f"{len(revenue_forecasts.keys)} segment x region series. Largest gap between the total and the sum "
+            f"of its series: {hierarchy.coherence_error[reconciliation_method]:.3f}B."
+        )
+        st.dataframe(hierarchy.comparison(reconciliation_method).round(3), use_container_width=True, hide_index=True)
+    
+    with st.expander("Fitted Forecast Models"):
+        model_counts = revenue_forecasts.params['model'].value_counts()
+        st.caption(
+            f"{len(revenue_forecasts.params)} segment x region series fitted on {len(revenue_forecasts.quarters)} quarters; "
+            + ", ".join(f"{count} {model}" for model, count in model_counts.items())
+            + ". Model per series chosen by AIC."
+        )
+        st.dataframe(revenue_forecasts.params.round(3), use_container_width=True, hide_index=True)
+    
     # Scenario comparison table
     st.subheader("Scenario Comparison")
     
+    # All scenario x year projections in one broadcast call
+    scenario_cagrs = np.array([8.0, 10.0, 12.0])
+    comparison_years = np.array([2025, 2027, TARGET_YEAR])
+    projections = project(BASE_REVENUE_B, scenario_cagrs[:, None], comparison_years - BASE_YEAR)
+    
     scenario_data = {
-        'Scenario': ['Conservative (8% CAGR)', 'Base Case (10% CAGR)', 'Optimistic (12% CAGR)'],
-        '2025 Revenue ($B)': [14.2, 14.8, 15.4],
-        '2027 Revenue ($B)': [16.8, 18.5, 20.4],
-        '2030 Revenue ($B)': [18.9, 22.5, 26.8],
+        'Scenario': [f'{name} ({rate:.0f}% CAGR)' for name, rate in zip(['Conservative', 'Base Case', 'Optimistic'], scenario_cagrs)],
+        '2025 Revenue ($B)': projections[:, 0].round(1),
+        '2027 Revenue ($B)': projections[:, 1].round(1),
+        f'{TARGET_YEAR} Revenue ($B)': projections[:, 2].round(1),
         'Probability': ['30%', '50%', '20%'],
         'Key Drivers': [
             'Economic slowdown, increased competition',
@@ -66,29 +105,25 @@ def render(data_generator, filters):
         # Generate Monte Carlo data
         np.random.seed(42)
         n_simulations = 1000
-        final_revenues = []
         
-        for _ in range(n_simulations):
-            # Random factors affecting growth
-            economic_factor = np.random.normal(1.0, 0.15)
-            market_factor = np.random.normal(1.0, 0.12)
-            execution_factor = np.random.normal(1.0, 0.10)
-            
-            # Base case adjusted by factors
-            adjusted_cagr = 10 * economic_factor * market_factor * execution_factor
-            final_revenue = 12.7 * (1 + adjusted_cagr/100) ** 6
-            final_revenues.append(final_revenue)
+        # Random economic, market and execution factors affecting growth, one row per simulation
+        factor_sds = np.array([driver['sd'] for driver in MONTE_CARLO_DRIVERS.values()])
+        factors = 1.0 + np.random.standard_normal((n_simulations, len(factor_sds))) * factor_sds
+        
+        # Base case adjusted by factors
+        adjusted_cagr = TARGET_CAGR_PCT * factors.prod(axis=1)
+        final_revenues = project(BASE_REVENUE_B, adjusted_cagr, TARGET_YEAR - BASE_YEAR)
         
         # Distribution chart
         fig = go.Figure()
         fig.add_trace(go.Histogram(x=final_revenues, nbinsx=50, name='Simulated Outcomes'))
-        fig.add_vline(x=22.5, line_dash="dash", line_color="green", 
-                     annotation_text="Target ($22.5B)")
+        fig.add_vline(x=TARGET_REVENUE_B, line_dash="dash", line_color="green", 
+                     annotation_text=f"Target (${TARGET_REVENUE_B}B)")
         fig.add_vline(x=np.mean(final_revenues), line_dash="dash", line_color="blue",
                      annotation_text=f"Mean (${np.mean(final_revenues):.1f}B)")
         
         fig.update_layout(
-            title="2030 Revenue Distribution (1,000 simulations)",
+            title=f"{TARGET_YEAR} Revenue Distribution ({n_simulations:,} simulations)",
             xaxis_title="Revenue ($B)",
             yaxis_title="Frequency",
             height=400
@@ -98,12 +133,12 @@ def render(data_generator, filters):
     with col2:
         # Monte Carlo statistics
         percentiles = np.percentile(final_revenues, [10, 25, 50, 75, 90])
-        prob_target = (np.array(final_revenues) >= 22.5).mean() * 100
+        prob_target = (final_revenues >= TARGET_REVENUE_B).mean() * 100
         
         st.info(f"""
         **Monte Carlo Results:**
         
-        **Probability of reaching $22.5B target: {prob_target:.1f}%**
+        **Probability of reaching ${TARGET_REVENUE_B}B target: {prob_target:.1f}%**
         
         **Revenue Percentiles:**
         - 10th percentile: ${percentiles[0]:.1f}B
@@ -119,43 +154,58 @@ def render(data_generator, filters):
     # Sensitivity analysis
     st.subheader("Sensitivity Analysis")
     
-    # Create sensitivity data
-    variables = ['Travel Recovery', 'E-commerce Growth', 'B2B Adoption', 'New Markets', 'Competition', 'Regulations']
-    base_impact = [0, 0, 0, 0, 0, 0]  # Base case
-    optimistic_impact = [+15, +20, +25, +30, -5, +5]  # Optimistic scenario
-    pessimistic_impact = [-10, -8, -12, -15, -15, -10]  # Pessimistic scenario
-    
-    fig = go.Figure()
-    
-    fig.add_trace(go.Bar(
-        name='Pessimistic',
-        x=variables,
-        y=pessimistic_impact,
-        marker_color='red'
-    ))
-    
-    fig.add_trace(go.Bar(
-        name='Base Case',
-        x=variables,
-        y=base_impact,
-        marker_color='blue'
-    ))
-    
-    fig.add_trace(go.Bar(
-        name='Optimistic',
-        x=variables,
-        y=optimistic_impact,
-        marker_color='green'
-    ))
-    
-    fig.update_layout(
-        title="Revenue Impact by Variable (% change vs base case)",
-        xaxis_title="Variables",
-        yaxis_title="Revenue Impact (%)",
-        barmode='group',
-        height=400
+    sensitivity_samples = st.select_slider(
+        "Simulation Samples", options=[1024, 4096, 16384], value=4096, key="sensitivity_samples"
+    )
+    sensitivity = get_sensitivity(sensitivity_samples)
+    one_at_a_time = sensitivity.one_at_a_time
+    
+    sensitivity_col1, sensitivity_col2 = st.columns(2)
+    
+    with sensitivity_col1:
+        fig = go.Figure()
+        
+        fig.add_trace(go.Bar(
+            name='Pessimistic (P10)',
+            x=one_at_a_time['label'],
+            y=one_at_a_time['pessimistic_pct'],
+            marker_color='red'
+        ))
+        
+        fig.add_trace(go.Bar(
+            name='Optimistic (P90)',
+            x=one_at_a_time['label'],
+            y=one_at_a_time['optimistic_pct'],
+            marker_color='green'
+        ))
+        
+        fig.update_layout(
+            title=f"{TARGET_YEAR} Revenue Impact by Variable (% change vs base case)",
+            xaxis_title="Variables",
+            yaxis_title="Revenue Impact (%)",
+            barmode='group',
+            height=400
+        )
+        st.plotly_chart(fig, use_container_width=True)
+    
+    with sensitivity_col2:
+        sobol = sensitivity.sobol
+        fig = go.Figure()
+        fig.add_trace(go.Bar(name='First-Order', x=sobol['label'], y=sobol['first_order'], marker_color='#003087'))
+        fig.add_trace(go.Bar(name='Total Effect', x=sobol['label'], y=sobol['total'], marker_color='#FFB800'))
+        fig.update_layout(
+            title="Share of Forecast Variance by Variable (Sobol indices)",
+            xaxis_title="Variables",
+            yaxis_title="Variance Share",
+            barmode='group',
+            height=400
+        )
+        st.plotly_chart(fig, use_container_width=True)
+    
+    st.caption(
+        f"One-at-a-time impacts move each variable to its 10th/90th percentile with the others sampled; "
+        f"Sobol indices use {sensitivity_samples:,} paired samples with common random numbers"
     )
-    st.plotly_chart(fig, use_container_width=True)
     
     # Dynamic scenario builder
     st.subheader("Custom Scenario Builder")
@@ -164,29 +214,16 @@ def render(data_generator, filters):
     
     scenario_col1, scenario_col2 = st.columns(2)
     
-    with scenario_col1:
-        travel_recovery = st.slider("Travel Recovery vs 2019 (%)", 80, 120, 100)
-        ecommerce_growth = st.slider("E-commerce Annual Growth (%)", 5, 25, 15)
-        b2b_penetration = st.slider("B2B Digital Penetration (%)", 20, 80, 50)
-        
-    with scenario_col2:
-        new_market_entry = st.slider("New Market Revenue Contribution (%)", 0, 20, 8)
-        competitive_pressure = st.slider("Competitive Pressure Impact (%)", -20, 0, -8)
-        regulatory_support = st.slider("Regulatory Environment Impact (%)", -10, 10, 2)
-    
-    # Calculate custom scenario impact
-    custom_impact = (
-        (travel_recovery - 100) * 0.3 +
-        (ecommerce_growth - 15) * 0.2 +
-        (b2b_penetration - 50) * 0.15 +
-        new_market_entry * 0.1 +
-        competitive_pressure * 0.15 +
-        regulatory_support * 0.1
-    )
+    driver_values = {}
+    for column, names in ((scenario_col1, DRIVER_NAMES[:3]), (scenario_col2, DRIVER_NAMES[3:])):
+        with column:
+            for name in names:
+                driver = SCENARIO_DRIVERS[name]
+                driver_values[name] = st.slider(driver['label'], driver['min'], driver['max'], driver['default'])
     
-    base_2030_revenue = 22.5
-    custom_2030_revenue = base_2030_revenue * (1 + custom_impact / 100)
-    required_cagr = ((custom_2030_revenue / 12.7) ** (1/6) - 1) * 100
+    # Same scenario model the grid sweep below evaluates in bulk
+    base_2030_revenue = TARGET_REVENUE_B
+    custom_2030_revenue, custom_cagr = evaluate_scenarios([driver_values[name] for name in DRIVER_NAMES])
     
     # Custom scenario results
     st.subheader("Custom Scenario Results")
@@ -198,14 +235,71 @@ def render(data_generator, filters):
                  f"{custom_2030_revenue - base_2030_revenue:+.1f}B vs Base")
     
     with result_col2:
-        st.metric("Required CAGR", f"{required_cagr:.1f}%", 
-                 f"{required_cagr - 10:+.1f}% vs Target")
+        st.metric("Required CAGR", f"{custom_cagr:.1f}%", 
+                 f"{custom_cagr - TARGET_CAGR_PCT:+.1f}% vs Target")
     
     with result_col3:
-        if custom_2030_revenue >= 22.5:
+        if custom_2030_revenue >= TARGET_REVENUE_B:
             st.success(f"✅ Target Achieved")
         else:
-            st.error(f"❌ ${22.5 - custom_2030_revenue:.1f}B shortfall")
+            st.error(f"❌ ${TARGET_REVENUE_B - custom_2030_revenue:.1f}B shortfall")
+    
+    # Response surface over full driver grids
+    st.subheader("Scenario Response Surface")
+    
+    surface_col1, surface_col2, surface_col3, surface_col4 = st.columns(4)
+    driver_labels = {name: SCENARIO_DRIVERS[name]['label'] for name in DRIVER_NAMES}
+    with surface_col1:
+        x_driver = st.selectbox("Rows", DRIVER_NAMES, index=0, format_func=driver_labels.get, key="surface_x_driver")
+    with surface_col2:
+        y_options = [name for name in DRIVER_NAMES if name != x_driver]
+        y_driver = st.selectbox("Columns", y_options, index=0, format_func=driver_labels.get, key="surface_y_driver")
+    with surface_col3:
+        surface_metric = st.selectbox(
+            "Metric", ['revenue', 'required_cagr', 'target_share'],
+            format_func={'revenue': f'{TARGET_YEAR} Revenue ($B)', 'required_cagr': 'Required CAGR (%)',
+                         'target_share': 'Scenarios Reaching Target (%)'}.get,
+            key="surface_metric"
+        )
+    with surface_col4:
+        grid_points = st.select_slider("Points per Driver", options=[3, 5, 7, 9, 11], value=7, key="surface_grid_points")
+    
+    grid = get_scenario_grid(grid_points, (x_driver, y_driver))
+    surface = grid.surface(surface_metric)
+    
+    surface_chart_col, tornado_col = st.columns(2)
+    
+    with surface_chart_col:
+        fig = px.imshow(
+            surface.values,
+            x=[f"{value:g}" for value in surface.columns],
+            y=[f"{value:g}" for value in surface.index],
+            labels=dict(x=driver_labels[y_driver], y=driver_labels[x_driver], color=surface_metric.replace('_', ' ')),
+            color_continuous_scale='RdYlGn',
+            aspect='auto',
+            title="Mean Outcome Across All Other Driver Settings"
+        )
+        fig.update_layout(height=400)
+        st.plotly_chart(fig, use_container_width=True)
+        st.caption(
+            f"{grid.size:,} driver combinations evaluated: {grid.target_share:.0%} reach the "
+            f"${TARGET_REVENUE_B}B target; {TARGET_YEAR} revenue ranges ${grid.revenue_min:.1f}B-${grid.revenue_max:.1f}B"
+        )
+    
+    with tornado_col:
+        swings = tornado(driver_values)
+        fig = go.Figure()
+        fig.add_trace(go.Bar(y=swings['driver'], x=swings['low'] - swings['base'], base=swings['base'],
+                             orientation='h', name='Driver at Minimum', marker_color='red'))
+        fig.add_trace(go.Bar(y=swings['driver'], x=swings['high'] - swings['base'], base=swings['base'],
+                             orientation='h', name='Driver at Maximum', marker_color='green'))
+        fig.update_layout(
+            title=f"{TARGET_YEAR} Revenue Swing per Driver (others at current settings)",
+            xaxis_title="Revenue ($B)",
+            barmode='overlay',
+            height=400
+        )
+        st.plotly_chart(fig, use_container_width=True)
     
     # Action recommendations
     st.subheader("Strategic Recommendations")
@@ -218,7 +312,7 @@ def render(data_generator, filters):
         - Consider strategic acquisitions
         - Enhance competitive positioning
         """)
-    elif custom_2030_revenue < 22.5:
+    elif custom_2030_revenue < TARGET_REVENUE_B:
         st.warning("""
         ⚠️ **Monitor and Adjust**
         - Track key performance indicators closely
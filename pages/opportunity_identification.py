@@ -2,6 +2,10 @@ import streamlit as st
 import plotly.express as px
 import plotly.graph_objects as go
 from charts import ChartGenerator
+from utils.opportunity import DEFAULT_WEIGHTS, get_opportunity_ranking
+from utils.corridors import get_corridor_graph
+
+SCORE_WEIGHT_LABELS = ['Potential Revenue', 'Growth Potential', 'Penetration Headroom', 'Market Size']
 
 def render(data_generator, filters):
     st.title("🎯 Opportunity Identification")
@@ -9,7 +13,7 @@ def render(data_generator, filters):
     chart_gen = ChartGenerator()
     
     # Tabs for different opportunity views
-    tab1, tab2, tab3 = st.tabs(["Market Opportunities", "Competitive Analysis", "Partnership Pipeline"])
+    tab1, tab2, tab3, tab4 = st.tabs(["Market Opportunities", "Competitive Analysis", "Partnership Pipeline", "Corridor Network"])
     
     with tab1:
         st.subheader("Market Opportunity Heatmap")
@@ -21,18 +25,20 @@ def render(data_generator, filters):
         # Opportunity ranking
         st.subheader("Top Market Opportunities")
         
-        # Calculate opportunity score
-        opp_data = data_generator.opportunity_data.copy()
-        opp_data['opportunity_score'] = (
-            opp_data['potential_revenue_b'] * 0.4 +
-            opp_data['growth_potential'] * 0.3 +
-            (100 - opp_data['current_penetration']) * 0.2 +
-            opp_data['market_size_b'] * 0.1
-        )
+        # Scores and top-K lists are computed once per data version
+        ranking = get_opportunity_ranking(data_generator)
         
-        top_opportunities = opp_data.nlargest(10, 'opportunity_score')[
-            ['corridor', 'potential_revenue_b', 'current_penetration', 'growth_potential', 'visa_share', 'opportunity_score']
-        ].round(2)
+        with st.expander("⚖️ Opportunity Score Weights"):
+            weight_cols = st.columns(len(SCORE_WEIGHT_LABELS))
+            weights = [
+                col.slider(label, 0.0, 1.0, default, 0.05, key=f"opportunity_weight_{i}")
+                for i, (col, label, default) in enumerate(zip(weight_cols, SCORE_WEIGHT_LABELS, DEFAULT_WEIGHTS))
+            ]
+        
+        # Re-ranking is a matrix-vector product over the precomputed components
+        top_opportunities = ranking.score_table(weights, 10, [
+            'corridor', 'potential_revenue_b', 'current_penetration', 'growth_potential', 'visa_share', 'opportunity_score'
+        ]).round(2)
         
         top_opportunities.columns = [
             'Corridor', 'Potential Revenue ($B)', 'Current Penetration (%)', 
@@ -48,24 +54,19 @@ def render(data_generator, filters):
         
         with col1:
             # Low penetration, high potential
-            untapped = opp_data[
-                (opp_data['current_penetration'] < 20) & 
-                (opp_data['potential_revenue_b'] > 3)
-            ].nlargest(5, 'potential_revenue_b')
+            untapped = ranking.table('untapped', 5, ['corridor', 'potential_revenue_b', 'current_penetration']).round(1)
+            untapped.columns = ['Corridor', 'Potential Revenue ($B)', 'Penetration (%)']
             
             st.write("**Low Penetration, High Revenue Potential:**")
-            for _, row in untapped.iterrows():
-                st.write(f"• {row['corridor']}: ${row['potential_revenue_b']:.1f}B potential, {row['current_penetration']:.1f}% penetration")
+            st.dataframe(untapped, use_container_width=True, hide_index=True)
         
         with col2:
             # High growth potential
-            growth_opps = opp_data.nlargest(5, 'growth_potential')
+            growth_opps = ranking.table('growth_potential', 5, ['corridor', 'growth_potential', 'visa_share']).round(1)
+            growth_opps.columns = ['Corridor', 'Growth Potential (%)', 'Current Share (%)']
             
             st.write("**Highest Growth Potential:**")
-            for _, row in growth_opps.iterrows():
-                st.write(f"• {row['corridor']}: {row['growth_potential']:.1f}% growth potential, {row['visa_share']:.1f}% current share")
-        
-
+            st.dataframe(growth_opps, use_container_width=True, hide_index=True)
     
     with tab2:
         st.subheader("Competitive Analysis")
@@ -213,6 +214,7 @@ def render(data_generator, filters):
                 ),
             },
             hide_index=True,
+            key="partnerships_editor",
         )
         
         # Pipeline metrics
@@ -231,3 +233,38 @@ def render(data_generator, filters):
         
         with metric_col4:
             st.metric("Time to Close", "8.5 months", "-1.2 months YoY")
+    
+    with tab4:
+        st.subheader("Corridor Network Explorer")
+        
+        # Adjacency indexes are built once per data version
+        graph = get_corridor_graph(data_generator)
+        
+        country = st.selectbox("Country", graph.countries, key="corridor_country")
+        
+        corridor_columns = ['corridor', 'volume_b', 'potential_revenue_b', 'penetration', 'visa_share']
+        corridor_labels = ['Corridor', 'Volume ($B)', 'Potential Revenue ($B)', 'Penetration (%)', 'Visa Share (%)']
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            st.write(f"**Outbound corridors from {country}:**")
+            outbound = graph.outbound(country, k=10)[corridor_columns].round(1)
+            outbound.columns = corridor_labels
+            st.dataframe(outbound, use_container_width=True, hide_index=True)
+        
+        with col2:
+            st.write(f"**Top inbound corridors for {country}:**")
+            inbound = graph.inbound(country, k=10)[corridor_columns].round(1)
+            inbound.columns = corridor_labels
+            st.dataframe(inbound, use_container_width=True, hide_index=True)
+        
+        # Region-to-region corridor volume
+        region_volume = graph.region_matrix('volume_b')
+        fig = px.imshow(region_volume.values,
+                       labels=dict(x="Destination Region", y="Origin Region", color="Volume ($B)"),
+                       x=region_volume.columns,
+                       y=region_volume.index,
+                       color_continuous_scale='Blues',
+                       title="Corridor Volume by Region Pair ($B)")
+        st.plotly_chart(fig, use_container_width=True)
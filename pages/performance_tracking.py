@@ -3,6 +3,10 @@ import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 from charts import ChartGenerator
+from utils.fx import CURRENCY_SYMBOLS
+from utils.geo_tiles import MAP_VIEWS, MAX_ZOOM, get_geo_tiles
+from utils.geo_aggregates import get_geo_aggregates
+from utils.kpis import get_kpis
 
 def render(data_generator, filters):
     st.title("📈 Performance Tracking")
@@ -33,7 +37,7 @@ def render(data_generator, filters):
         fig = make_subplots(specs=[[{"secondary_y": True}]])
         
         # Revenue bars
-        quarterly_revenue = filtered_data.groupby(['quarter', 'segment'])['revenue_b'].sum().unstack().fillna(0)
+        quarterly_revenue = filtered_data.groupby(['quarter', 'segment'], observed=True)['revenue_b'].sum().unstack().fillna(0)
         for segment in quarterly_revenue.columns:
             fig.add_trace(
                 go.Bar(x=quarterly_revenue.index, y=quarterly_revenue[segment], 
@@ -42,7 +46,7 @@ def render(data_generator, filters):
             )
         
         # Volume growth line
-        quarterly_volume = filtered_data.groupby('quarter')['volume_growth_pct'].mean()
+        quarterly_volume = filtered_data.groupby('quarter', observed=True)['volume_growth_pct'].mean()
         fig.add_trace(
             go.Scatter(x=quarterly_volume.index, y=quarterly_volume.values,
                       mode='lines+markers', name='Volume Growth %',
@@ -51,14 +55,15 @@ def render(data_generator, filters):
         )
         
         fig.update_xaxes(title_text="Quarter")
-        fig.update_yaxes(title_text="Revenue ($ Billions)", secondary_y=False)
+        currency_symbol = CURRENCY_SYMBOLS[filters.get('currency', 'USD')]
+        fig.update_yaxes(title_text=f"Revenue ({currency_symbol} Billions)", secondary_y=False)
         fig.update_yaxes(title_text="Volume Growth (%)", secondary_y=True)
         fig.update_layout(height=500, title="Revenue and Volume Performance")
         
         st.plotly_chart(fig, use_container_width=True)
         
         # Segment performance summary
-        segment_summary = filtered_data.groupby('segment').agg({
+        segment_summary = filtered_data.groupby('segment', observed=True).agg({
             'revenue_b': 'sum',
             'volume_growth_pct': 'mean',
             'transactions_m': 'sum'
@@ -70,19 +75,26 @@ def render(data_generator, filters):
     with tab2:
         st.subheader("Geographic Breakdown")
         
-        # Geographic performance heatmap
-        geo_heatmap = chart_gen.create_geographic_heatmap(data_generator.geographic_data)
+        # Geographic performance heatmap, served from tiles for the selected view
+        map_col1, map_col2 = st.columns(2)
+        with map_col1:
+            map_view = st.selectbox("Map View", list(MAP_VIEWS), key="geo_map_view")
+        with map_col2:
+            detail = st.select_slider("Detail Level", ["Auto"] + list(range(MAX_ZOOM + 1)), value="Auto", key="geo_detail")
+        
+        lat_range, lon_range = MAP_VIEWS[map_view]
+        tiles = get_geo_tiles(data_generator).tiles_for_view(
+            lat_range, lon_range, None if detail == "Auto" else detail
+        )
+        geo_heatmap = chart_gen.create_geographic_heatmap(tiles)
         st.plotly_chart(geo_heatmap, use_container_width=True)
         
-        # Regional performance bars
+        # Regional performance bars and growth ranking, read from the maintained aggregates
+        geo_aggregates = get_geo_aggregates(data_generator)
         col1, col2 = st.columns(2)
         
         with col1:
-            regional_data = data_generator.geographic_data.groupby('region').agg({
-                'revenue_m': 'sum',
-                'growth_rate': 'mean',
-                'penetration': 'mean'
-            }).round(1)
+            regional_data = geo_aggregates.region_summary(filters.get('regions')).round(1)
             
             fig = px.bar(regional_data.reset_index(), 
                         x='region', y='revenue_m',
@@ -103,24 +115,33 @@ def render(data_generator, filters):
         
         # Top corridors table
         st.subheader("Top 10 Growth Corridors")
-        top_corridors = data_generator.geographic_data.nlargest(10, 'growth_rate')[
-            ['country', 'region', 'revenue_m', 'growth_rate', 'penetration']
-        ]
+        top_corridors = geo_aggregates.top_growth(10, filters.get('regions'))
         st.dataframe(top_corridors, use_container_width=True)
     
     with tab3:
         st.subheader("Product and Segment Performance")
         
+        # Product revenue for the current filters, from the indexed revenue rollup
+        product_revenue = data_generator.get_revenue_rollup(filters, ['product'])
+        product_view = data_generator.product_data.merge(
+            product_revenue[['product', 'revenue_b']].astype({'product': str}),
+            on='product'
+        ) if len(product_revenue) else data_generator.product_data.assign(revenue_b=0.0).iloc[:0]
+        total_product_revenue = product_view['revenue_b'].sum()
+        product_view['revenue_share'] = (
+            product_view['revenue_b'] / total_product_revenue * 100 if total_product_revenue else 0.0
+        )
+        
         col1, col2 = st.columns(2)
         
         with col1:
             # Product revenue share donut
-            product_donut = chart_gen.create_product_donut(data_generator.product_data)
+            product_donut = chart_gen.create_product_donut(product_view)
             st.plotly_chart(product_donut, use_container_width=True)
         
         with col2:
             # Product growth rates
-            fig = px.bar(data_generator.product_data, 
+            fig = px.bar(product_view, 
                         x='product', y='growth_rate',
                         title="Product Growth Rates (%)",
                         color='growth_rate',
@@ -130,45 +151,21 @@ def render(data_generator, filters):
         
         # Product metrics table
         st.subheader("Detailed Product Metrics")
-        product_metrics = data_generator.product_data.copy()
-        product_metrics['Revenue ($B)'] = product_metrics['revenue_share'] * 0.035  # Approximate revenue
-        product_metrics_display = product_metrics[['product', 'Revenue ($B)', 'transactions_b', 'growth_rate', 'avg_transaction_value']]
-        product_metrics_display.columns = ['Product', 'Revenue ($B)', 'Transactions (B)', 'Growth Rate (%)', 'Avg Transaction ($)']
+        revenue_label = f"Revenue ({CURRENCY_SYMBOLS[filters.get('currency', 'USD')]}B)"
+        product_metrics_display = product_view[['product', 'revenue_b', 'transactions_b', 'growth_rate', 'avg_transaction_value']]
+        product_metrics_display.columns = ['Product', revenue_label, 'Transactions (B)', 'Growth Rate (%)', 'Avg Transaction ($)']
         st.dataframe(product_metrics_display, use_container_width=True)
     
     with tab4:
         st.subheader("KPI Performance Table")
         
-        # Create comprehensive KPI table
-        kpi_table_data = {
-            'KPI': [
-                'Volume Growth Rate', 'Revenue Growth Rate', 'Market Share', 
-                'Revenue Yield', 'Customer Acquisition', 'Transaction Success Rate',
-                'Cross-Border Penetration', 'Average Transaction Value'
-            ],
-            'Target': ['15%', '12%', '25%', '0.15%', '10K/month', '99.5%', '35%', '$150'],
-            'Current': ['13%', '9.5%', '22%', '0.12%', '8.5K/month', '99.7%', '30%', '$125'],
-            'YoY Change': ['+2.1%', '+1.8%', '+2.1%', '+0.01%', '+15%', '+0.1%', '+5%', '+8%'],
-            'Status': ['⚠️ Below', '⚠️ Below', '⚠️ Below', '⚠️ Below', '⚠️ Below', '✅ Above', '⚠️ Below', '⚠️ Below'],
-            'Source': ['Internal', 'Internal', 'Industry', 'Internal', 'CRM', 'Internal', 'Survey', 'Internal']
-        }
-        
-        kpi_df = st.data_editor(
-            kpi_table_data,
-            column_config={
-                "Status": st.column_config.TextColumn(
-                    "Status",
-                    help="Performance vs target",
-                ),
-            },
-            disabled=["KPI", "Source"],
-            hide_index=True,
-        )
+        # KPI table from the registry; status comes from each KPI's own rule
+        kpis = get_kpis(data_generator)
+        st.dataframe(kpis.table(), use_container_width=True, hide_index=True)
+        st.caption(f"As of {kpis.as_of}")
         
         # Performance summary
-        total_kpis = len(kpi_df)
-        above_target = len([status for status in kpi_df['Status'] if '✅' in status])
-        performance_pct = (above_target / total_kpis) * 100
+        performance_pct = kpis.share_met() * 100
         
         if performance_pct >= 70:
             st.success(f"✅ Overall Performance: {performance_pct:.1f}% of KPIs above target")
@@ -0,0 +1,205 @@
+import threading
+from collections import deque
+
+import pandas as pd
+
+from utils.cache import VersionedCache
+
+SEVERITY_ORDER = {'High': 0, 'Medium': 1, 'Low': 2}
+GLOBAL_SCOPE = 'Global'
+
+# Resolved alerts kept for the history view; older ones are dropped
+MAX_HISTORY = 200
+
+_engines = VersionedCache("risk_alert_engines", max_entries=8)
+
+
+class AlertRule:
+    """Declarative alert rule on one metric, with separate raise and clear levels"""
+
+    def __init__(self, name, metric, direction, trigger, clear, severity, message,
+                 action='', kind='threshold', lookback=1):
+        self.name = name
+        self.metric = metric
+        # 'above' raises when the value goes over the trigger, 'below' when it drops under
+        self.direction = direction
+        self.trigger = trigger
+        # Hysteresis: an active alert only clears once the value is back past this level
+        self.clear = clear
+        self.severity = severity
+        self.message = message
+        self.action = action
+        # 'threshold' checks the value itself, 'rate_of_change' the relative change
+        # against the value lookback updates earlier
+        self.kind = kind
+        self.lookback = lookback
+
+    def breached(self, value):
+        return value > self.trigger if self.direction == 'above' else value < self.trigger
+
+    def cleared(self, value):
+        return value <= self.clear if self.direction == 'above' else value >= self.clear
+
+
+# Rule kinds that judge a metric against its target, as opposed to its movement
+TARGET_ALERT_KINDS = ('threshold',)
+
+RISK_ALERT_RULES = [
+    AlertRule('fraud_rate_high', 'fraud_rate', 'above', 0.5, 0.45, 'High',
+              'Fraud rate above the 0.5% threshold', 'Enhanced monitoring deployed'),
+    AlertRule('fraud_rate_rising', 'fraud_rate', 'above', 0.15, 0.05, 'Medium',
+              'Fraud rate up more than 15% week over week', 'Fraud team reviewing new patterns',
+              kind='rate_of_change', lookback=7),
+    AlertRule('chargeback_ratio_high', 'chargeback_ratio', 'above', 1.0, 0.9, 'High',
+              'Chargeback ratio above the 1.0% threshold', 'Dispute operations escalated'),
+    AlertRule('compliance_score_low', 'compliance_score', 'below', 90, 92, 'Medium',
+              'Compliance score below the 90% target', 'Compliance review scheduled'),
+    AlertRule('uptime_low', 'uptime_pct', 'below', 99.9, 99.95, 'Medium',
+              'System uptime below the 99.9% target', 'Performance team investigating'),
+    AlertRule('aml_alert_spike', 'aml_alerts', 'above', 4, 2, 'Low',
+              'Unusual number of AML alerts in a day', 'Investigation capacity rebalanced'),
+    AlertRule('transaction_cost_high', 'transaction_cost', 'above', 1.0, 0.95, 'Low',
+              'Transaction cost above the 1% FSB target', 'Pricing team notified')
+]
+
+
+class AlertEngine:
+    """Evaluates alert rules incrementally over a stream of metric updates"""
+
+    def __init__(self, rules=None):
+        self.rules = list(RISK_ALERT_RULES if rules is None else rules)
+        self._lock = threading.Lock()
+        # Rules grouped by metric so each update only touches the rules it can affect
+        self._rules_by_metric = {}
+        for rule in self.rules:
+            self._rules_by_metric.setdefault(rule.metric, []).append(rule)
+        self._lookbacks = {}
+        for rule in self.rules:
+            if rule.kind == 'rate_of_change':
+                self._lookbacks[rule.metric] = max(self._lookbacks.get(rule.metric, 0), rule.lookback)
+
+        self.active = {}
+        self.history = deque(maxlen=MAX_HISTORY)
+        self._recent = {}
+        self.events_processed = 0
+        self.suppressed = 0
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def process(self, timestamp, metrics, scope=GLOBAL_SCOPE):
+        """Apply one update of metric values; return the alerts raised and cleared by it"""
+        with self._lock:
+            return self._process(timestamp, metrics, scope)
+
+    def process_many(self, events):
+        """Apply (timestamp, metrics, scope) updates in order, returning all transitions"""
+        transitions = []
+        with self._lock:
+            for timestamp, metrics, scope in events:
+                transitions.extend(self._process(timestamp, metrics, scope))
+        return transitions
+
+    def replay(self, risk_series, scope=GLOBAL_SCOPE):
+        """Feed every day of a risk time series through the engine"""
+        names = [name for name in risk_series.metric_names if name in self._rules_by_metric]
+        columns = [risk_series.values(name).tolist() for name in names]
+        dates = pd.to_datetime(risk_series.dates)
+        self.process_many(
+            (date, dict(zip(names, row)), scope) for date, row in zip(dates, zip(*columns))
+        )
+
+    def _process(self, timestamp, metrics, scope):
+        transitions = []
+        for metric, value in metrics.items():
+            rules = self._rules_by_metric.get(metric)
+            if not rules:
+                continue
+            window = None
+            if metric in self._lookbacks:
+                window = self._recent.get((metric, scope))
+                if window is None:
+                    window = self._recent[(metric, scope)] = deque(maxlen=self._lookbacks[metric] + 1)
+                window.append(value)
+
+            for rule in rules:
+                observed = value
+                if rule.kind == 'rate_of_change':
+                    if len(window) <= rule.lookback:
+                        continue
+                    previous = window[-rule.lookback - 1]
+                    if not previous:
+                        continue
+                    observed = (value - previous) / abs(previous)
+
+                key = (rule.name, scope)
+                alert = self.active.get(key)
+                if alert is None:
+                    if rule.breached(observed):
+                        alert = {
+                            'rule': rule.name,
+                            'metric': rule.metric,
+                            'kind': rule.kind,
+                            'scope': scope,
+                            'severity': rule.severity,
+                            'message': rule.message,
+                            'action': rule.action,
+                            'raised_at': timestamp,
+                            'last_seen': timestamp,
+                            'value': observed,
+                            'peak': observed,
+                            'breaches': 1
+                        }
+                        self.active[key] = alert
+                        transitions.append(('raised', alert))
+                elif rule.cleared(observed):
+                    alert = self.active.pop(key)
+                    alert['cleared_at'] = timestamp
+                    self.history.append(alert)
+                    transitions.append(('cleared', alert))
+                else:
+                    # Still active: fold the update into the open alert instead of raising a duplicate
+                    alert['value'] = observed
+                    alert['last_seen'] = timestamp
+                    if rule.breached(observed):
+                        alert['breaches'] += 1
+                        self.suppressed += 1
+                        if (observed > alert['peak']) == (rule.direction == 'above'):
+                            alert['peak'] = observed
+        self.events_processed += 1
+        return transitions
+
+    def is_active(self, metric, scope=GLOBAL_SCOPE, kinds=None):
+        """Whether an alert on the metric is currently open in the scope, optionally only of the given rule kinds"""
+        with self._lock:
+            return any(
+                key[1] == scope and alert['metric'] == metric and (kinds is None or alert['kind'] in kinds)
+                for key, alert in self.active.items()
+            )
+
+    def active_alerts(self):
+        """Open alerts, most severe and most recent first"""
+        with self._lock:
+            alerts = list(self.active.values())
+        return sorted(alerts, key=lambda a: (SEVERITY_ORDER.get(a['severity'], 99), -pd.Timestamp(a['raised_at']).value))
+
+    def resolved_alerts(self, n=10):
+        """Most recently cleared alerts"""
+        with self._lock:
+            return list(self.history)[::-1][:n]
+
+
+def get_alert_engine(data_generator):
+    """Return an alert engine that has consumed the data generator's risk series, once per data version"""
+    def build():
+        engine = AlertEngine()
+        engine.replay(data_generator.risk_series)
+        return engine
+
+    return _engines.get_or_compute(data_generator.data_version, 'risk_series', build)
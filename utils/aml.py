@@ -0,0 +1,203 @@
+import math
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from utils.cache import VersionedCache
+
+# Months of per-month aggregates kept; older months are folded away
+MAX_MONTHS = 36
+
+_analytics = VersionedCache("aml_analytics", max_entries=8)
+
+
+class QuantileSketch:
+    """Log-bucketed quantile sketch with bounded relative error, in the style of DDSketch"""
+
+    def __init__(self, relative_accuracy=0.02, min_value=1e-3):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.min_value = min_value
+        # Bucket index -> count; values below min_value share one bucket
+        self.buckets = {}
+        self.zero_count = 0
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, values):
+        """Add an array of non-negative values"""
+        values = np.asarray(values, dtype=np.float64).ravel()
+        if not len(values):
+            return
+        small = values < self.min_value
+        self.zero_count += int(small.sum())
+        indexes = np.ceil(np.log(values[~small]) / self._log_gamma).astype(np.int64)
+        for index, count in zip(*np.unique(indexes, return_counts=True)):
+            self.buckets[int(index)] = self.buckets.get(int(index), 0) + int(count)
+        self.count += len(values)
+        self.total += float(values.sum())
+
+    def merge(self, other):
+        """Fold another sketch with the same accuracy into this one"""
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.total += other.total
+
+    def quantile(self, q):
+        """Approximate value at quantile q, within the relative accuracy"""
+        if not self.count:
+            return float('nan')
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if rank < seen:
+                return 2 * self.gamma ** index / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.buckets) / (self.gamma + 1)
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else float('nan')
+
+
+class AMLAlertAnalytics:
+    """Running AML alert counts, time-to-close sketches and false-positive rates per month"""
+
+    def __init__(self, relative_accuracy=0.02, max_months=MAX_MONTHS):
+        self.relative_accuracy = relative_accuracy
+        self.max_months = max_months
+        self._lock = threading.Lock()
+        # Month period -> running aggregates, oldest first
+        self.months = OrderedDict()
+        self.open_alerts = {}
+        self.time_to_close = QuantileSketch(relative_accuracy)
+        self.records_ingested = 0
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def open_alert(self, alert_id, opened_at):
+        """Record a newly opened alert"""
+        self.ingest(pd.DataFrame({'alert_id': [alert_id], 'opened_at': [opened_at], 'closed_at': [pd.NaT],
+                                  'false_positive': [False], 'report_filed': [False]}))
+
+    def close_alert(self, alert_id, closed_at, false_positive, report_filed=False):
+        """Record the outcome of an alert opened earlier"""
+        with self._lock:
+            opened_at = self.open_alerts.pop(alert_id)
+        self.ingest(pd.DataFrame({'alert_id': [alert_id], 'opened_at': [opened_at], 'closed_at': [closed_at],
+                                  'false_positive': [false_positive], 'report_filed': [report_filed]}),
+                    count_opened=False)
+
+    def ingest(self, records, count_opened=True):
+        """Fold a batch of alert records into the aggregates; open alerts have no closed_at"""
+        opened_at = pd.to_datetime(records['opened_at'])
+        closed_at = pd.to_datetime(records['closed_at'])
+        closed = closed_at.notna().to_numpy()
+        open_months = opened_at.dt.to_period('M')
+        close_months = closed_at[closed].dt.to_period('M')
+        days_to_close = ((closed_at[closed] - opened_at[closed]).dt.total_seconds() / 86400).to_numpy()
+        false_positive = records['false_positive'].to_numpy(dtype=bool)[closed]
+        report_filed = records['report_filed'].to_numpy(dtype=bool)[closed]
+
+        with self._lock:
+            if count_opened:
+                for month, count in open_months.value_counts().items():
+                    self._month(month)['opened'] += int(count)
+            for alert_id, opened in zip(records['alert_id'][~closed], opened_at[~closed]):
+                self.open_alerts[alert_id] = opened
+
+            # Outcomes are attributed to the month the alert was closed in
+            for month in close_months.unique():
+                in_month = (close_months == month).to_numpy()
+                aggregates = self._month(month)
+                aggregates['closed'] += int(in_month.sum())
+                aggregates['false_positives'] += int(false_positive[in_month].sum())
+                aggregates['reports_filed'] += int(report_filed[in_month].sum())
+                aggregates['time_to_close'].add(days_to_close[in_month])
+            self.time_to_close.add(days_to_close)
+            self._evict()
+            self.records_ingested += len(records)
+
+    def monthly(self, months=None):
+        """Per-month opened/closed counts, false-positive rate and time-to-close quantiles"""
+        with self._lock:
+            items = list(self.months.items())[-months:] if months else list(self.months.items())
+            rows = [
+                {
+                    'month': month.strftime('%b %Y'),
+                    'opened': aggregates['opened'],
+                    'closed': aggregates['closed'],
+                    'false_positive_rate': aggregates['false_positives'] / aggregates['closed'] if aggregates['closed'] else 0.0,
+                    'reports_filed': aggregates['reports_filed'],
+                    'median_days_to_close': aggregates['time_to_close'].quantile(0.5),
+                    'p90_days_to_close': aggregates['time_to_close'].quantile(0.9)
+                }
+                for month, aggregates in items
+            ]
+        return pd.DataFrame(rows, columns=['month', 'opened', 'closed', 'false_positive_rate', 'reports_filed',
+                                           'median_days_to_close', 'p90_days_to_close'])
+
+    def summary(self, months=3):
+        """Headline metrics over the most recent months"""
+        with self._lock:
+            recent = list(self.months.values())[-months:]
+            sketch = QuantileSketch(self.relative_accuracy)
+            for aggregates in recent:
+                sketch.merge(aggregates['time_to_close'])
+            closed = sum(aggregates['closed'] for aggregates in recent)
+            return {
+                'open_alerts': len(self.open_alerts),
+                'opened': sum(aggregates['opened'] for aggregates in recent),
+                'closed': closed,
+                'false_positive_rate': sum(a['false_positives'] for a in recent) / closed if closed else 0.0,
+                'reports_filed': sum(aggregates['reports_filed'] for aggregates in recent),
+                'mean_days_to_close': sketch.mean,
+                'median_days_to_close': sketch.quantile(0.5),
+                'p90_days_to_close': sketch.quantile(0.9)
+            }
+
+    def _month(self, month):
+        if month not in self.months:
+            out_of_order = bool(self.months) and month < next(reversed(self.months))
+            self.months[month] = {
+                'opened': 0,
+                'closed': 0,
+                'false_positives': 0,
+                'reports_filed': 0,
+                'time_to_close': QuantileSketch(self.relative_accuracy)
+            }
+            # Late records for an earlier month keep the months in calendar order
+            if out_of_order:
+                self.months = OrderedDict(sorted(self.months.items()))
+        return self.months[month]
+
+    def _evict(self):
+        while len(self.months) > self.max_months:
+            self.months.popitem(last=False)
+
+
+def get_aml_analytics(data_generator):
+    """Return AML analytics over the data generator's alert records, built once per data version"""
+    def build():
+        analytics = AMLAlertAnalytics()
+        records = data_generator.aml_alert_data
+        # Ingest in chunks, as a live alert feed would arrive
+        for start in range(0, len(records), 500):
+            analytics.ingest(records.iloc[start:start + 500])
+        return analytics
+
+    return _analytics.get_or_compute(data_generator.data_version, 'aml_alert_data', build)
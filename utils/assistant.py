@@ -0,0 +1,439 @@
+import math
+import re
+import threading
+import time
+from collections import Counter
+
+import numpy as np
+
+from utils.geo_aggregates import get_geo_aggregates
+from utils.kpis import get_kpis
+
+# Query spellings mapped onto the tokens used in document text
+ALIASES = {
+    'apac': ['asia', 'pacific'],
+    'asiapac': ['asia', 'pacific'],
+    'latam': ['latin', 'america'],
+    'mea': ['middle', 'east', 'africa'],
+    'usa': ['north', 'america'],
+    'eu': ['europe'],
+    'ecommerce': ['e', 'commerce'],
+    'yoy': ['growth'],
+    'projection': ['forecast'],
+    'growing': ['growth'],
+    'grow': ['growth'],
+    'sales': ['revenue'],
+    'income': ['revenue']
+}
+STOPWORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'can', 'could', 'do', 'does', 'for', 'i', 'in', 'is', 'it',
+    'its', 'me', 'my', 'of', 'on', 'or', 's', 'our', 'show', 'tell', 'that', 'the', 'this', 'to', 'us', 'was',
+    'what', 'whats', 'which', 'with', 'you', 'your', 'please', 'about', 'current', 'currently', 'now'
+}
+# Matches scoring below this are answered with the help message instead
+MIN_SCORE = 1.0
+
+RISK_METRICS = {
+    'fraud_rate': {'label': 'Fraud Rate', 'fmt': '{:.2f}%', 'limit': 0.5, 'direction': 'lower',
+                   'keywords': 'fraud losses'},
+    'chargeback_ratio': {'label': 'Chargeback Ratio', 'fmt': '{:.2f}%', 'limit': 1.0, 'direction': 'lower',
+                         'keywords': 'chargebacks disputes'},
+    'compliance_score': {'label': 'Compliance Score', 'fmt': '{:.1f}%', 'limit': 90.0, 'direction': 'higher',
+                         'keywords': 'compliance regulatory audit'},
+    'transaction_cost': {'label': 'Transaction Cost', 'fmt': '{:.2f}%', 'limit': 1.0, 'direction': 'lower',
+                         'keywords': 'cost processing'},
+    'aml_alerts': {'label': 'AML Alerts', 'fmt': '{:.0f}', 'limit': 25, 'direction': 'lower',
+                   'keywords': 'aml anti money laundering alerts'},
+    'uptime_pct': {'label': 'Network Uptime', 'fmt': '{:.2f}%', 'limit': 99.95, 'direction': 'higher',
+                   'keywords': 'uptime availability outage'}
+}
+
+STATIC_DOCUMENTS = [
+    {
+        'id': 'help:data_sources',
+        'title': 'Data Sources',
+        'keywords': 'data source sources where from origin synthetic methodology calculation generated',
+        'answer': """📊 **Data Sources Information**
+
+The dashboard uses synthetic data generated for demonstration purposes. Here are the key data sources:
+
+• **Revenue Data**: Mock quarterly data from FY2024-Q1 to FY2025-Q4, simulating realistic growth patterns
+• **Geographic Data**: Simulated performance across 25 countries in 5 regions
+• **Product Metrics**: Generated data for Visa Direct, B2B Connect, Traditional Cards, and Other Services
+• **Risk Metrics**: Synthetic compliance, fraud, and operational risk indicators
+• **Forecasting**: Local statistical models fitted per segment and region, plus Monte Carlo simulations
+
+For production use, this would integrate with live Visa data systems, payment networks, and external market data providers."""
+    },
+    {
+        'id': 'help:exports',
+        'title': 'Custom Exports',
+        'keywords': 'export download report csv pdf excel file custom extract',
+        'answer': """📄 **Custom Export Options**
+
+I can help you create custom exports tailored to your needs:
+
+**Available Export Formats:**
+• CSV data files for specific metrics or time periods
+• JSON records for loading into other tools
+
+**Custom Export Examples:**
+• "Export Q3 FY2025 performance metrics only"
+• "Download revenue by region for APAC and Europe, last 4 quarters, as JSON"
+• "Export B2B Connect transactions for FY2024 in euros"
+
+To request a custom export, just tell me:
+1. Which metrics you need (revenue, transactions, volume growth, yield)
+2. Time period, segments, regions or products to include, and any grouping ("by region")
+3. Preferred format (CSV or JSON)"""
+    },
+    {
+        'id': 'help:feedback',
+        'title': 'Feedback & Support',
+        'keywords': 'feedback bug issue problem suggestion broken error feature request support slow',
+        'answer': """🛠️ **Feedback & Support**
+
+I'm here to collect your feedback and route it to the development team:
+
+**Types of Feedback:**
+• Bug reports or technical issues
+• Feature requests or improvements
+• Data accuracy concerns
+• UI/UX suggestions
+• Performance issues
+
+**How to Submit Feedback:**
+1. Describe the issue or suggestion clearly
+2. Include specific steps to reproduce (for bugs)
+3. Mention which dashboard section is affected
+4. Suggest your preferred solution (if any)
+
+**Common Issues:**
+• Chart loading slowly → Clear browser cache
+• Filters not working → Try refreshing the page
+• Data not updating → Use the "Refresh Data" button
+
+What specific feedback would you like to share?"""
+    },
+    {
+        'id': 'help:navigation',
+        'title': 'Dashboard Navigation',
+        'keywords': 'navigate navigation section page find where how tab sidebar filter menu',
+        'answer': """🧭 **Dashboard Navigation Guide**
+
+**Main Sections:**
+📊 **Executive Summary** - High-level KPIs, revenue trajectory, progress tracking
+📈 **Performance Tracking** - Detailed revenue/volume trends, geographic breakdown, product analysis
+🎯 **Opportunity Identification** - Market opportunities, competitive analysis, partnerships
+⚠️ **Risk & Compliance** - Risk metrics, regulatory status, incident monitoring
+🔮 **Forecasting** - Scenario planning, Monte Carlo simulation, sensitivity analysis
+
+**Navigation Tips:**
+• Use the radio buttons in the left sidebar to switch between sections
+• Click "Filters" in the top-right to customize data views
+• Each section has tabs for different sub-analyses
+• Hover over charts for detailed tooltips
+• Use the refresh button to reload data
+
+What specific information are you looking for?"""
+    }
+]
+
+
+def tokenize(text):
+    """Lowercase word tokens with aliases expanded, stopwords dropped and plurals folded"""
+    tokens = []
+    for word in re.findall(r"[a-z0-9]+", text.lower().replace("'", "")):
+        for token in ALIASES.get(word, [word]):
+            if token in STOPWORDS:
+                continue
+            if len(token) > 3 and token.endswith('s') and not token.endswith('ss'):
+                token = token[:-1]
+            tokens.append(token)
+    return tokens
+
+
+class BM25Index:
+    """Inverted index with Okapi BM25 scoring and in-place document updates"""
+
+    def __init__(self, k1=1.2, b=0.75):
+        self.k1 = k1
+        self.b = b
+        # term -> {doc_id: term frequency}
+        self.postings = {}
+        self.doc_terms = {}
+        self.doc_lengths = {}
+        self.total_length = 0
+
+    def __len__(self):
+        return len(self.doc_lengths)
+
+    def upsert(self, doc_id, tokens):
+        """Index a document, replacing its previous postings if it was indexed before"""
+        self.remove(doc_id)
+        counts = Counter(tokens)
+        for term, count in counts.items():
+            self.postings.setdefault(term, {})[doc_id] = count
+        self.doc_terms[doc_id] = list(counts)
+        self.doc_lengths[doc_id] = len(tokens)
+        self.total_length += len(tokens)
+
+    def remove(self, doc_id):
+        if doc_id not in self.doc_lengths:
+            return
+        for term in self.doc_terms.pop(doc_id):
+            docs = self.postings[term]
+            del docs[doc_id]
+            if not docs:
+                del self.postings[term]
+        self.total_length -= self.doc_lengths.pop(doc_id)
+
+    def search(self, tokens, k=3):
+        """Top-k (doc_id, score) pairs for a tokenized query"""
+        n_docs = len(self.doc_lengths)
+        if not n_docs:
+            return []
+        average_length = self.total_length / n_docs
+        scores = Counter()
+        for term in set(tokens):
+            docs = self.postings.get(term)
+            if not docs:
+                continue
+            idf = math.log(1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+            for doc_id, tf in docs.items():
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / average_length)
+                scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+        return scores.most_common(k)
+
+
+def _growth(series, periods=4):
+    if len(series) <= periods or not series.iloc[-1 - periods]:
+        return float('nan')
+    return (series.iloc[-1] / series.iloc[-1 - periods] - 1) * 100
+
+
+def _kpi_documents(kpis):
+    documents = []
+    for key, row in kpis.frame.iterrows():
+        status_words = {'above': 'on target met', 'near': 'below target near miss', 'below': 'below target missed',
+                        'info': ''}[row['status']]
+        answer = f"📈 **{row['label']}** ({kpis.as_of}): **{row['display']}**"
+        if row['target_display'] != '–':
+            answer += f" vs target {row['target_display']} — {row['status_label']}"
+        if row['yoy_change'] != '–':
+            answer += f"\n\nYoY change: {row['yoy_change']}"
+        answer += f"\n\n*Source: {row['source']}. Shown on the Executive Summary and Performance Tracking pages.*"
+        documents.append({
+            'id': f"kpi:{key}",
+            'title': row['label'],
+            'keywords': f"{row['label']} {key.replace('_', ' ')} kpi metric target {status_words} {row['source']}",
+            'answer': answer
+        })
+    return documents
+
+
+def _dimension_documents(data_generator, column, noun):
+    rollup = data_generator.get_revenue_rollup({}, [column, 'quarter']).sort_values('quarter')
+    documents = []
+    for name, rows in rollup.groupby(column, observed=True):
+        # revenue_data holds annualized run rates, so the latest quarter is the current run rate
+        revenue = rows['revenue_b'].reset_index(drop=True)
+        growth = _growth(revenue)
+        answer = (
+            f"📊 **{name}** ({noun}, {rows['quarter'].iloc[-1]})\n\n"
+            f"• Revenue run rate: **${revenue.iloc[-1]:.2f}B**\n"
+            f"• YoY revenue growth: **{growth:+.1f}%**\n"
+            f"• Volume growth: {rows['volume_growth_pct'].iloc[-1]:.1f}%\n"
+            f"• Revenue yield: {rows['yield_pct'].iloc[-1]:.3f}%"
+        )
+        documents.append({
+            'id': f"{column}:{name}",
+            'title': str(name),
+            'keywords': f"{name} {noun} revenue growth volume yield performance",
+            'answer': answer,
+            'growth': growth
+        })
+    return documents
+
+
+def _region_documents(data_generator):
+    documents = {doc['title']: doc for doc in _dimension_documents(data_generator, 'region', 'region')}
+    geo = get_geo_aggregates(data_generator)
+    summary = geo.region_summary()
+    for region, row in summary.iterrows():
+        doc = documents.get(region)
+        if doc is None:
+            continue
+        top = geo.top_growth(1, [region])
+        doc['answer'] += (
+            f"\n• Market growth rate: **{row['growth_rate']:.1f}%**"
+            f" · penetration {row['penetration']:.1f}%"
+        )
+        if len(top):
+            doc['answer'] += f"\n• Fastest-growing market: {top['country'].iloc[0]} ({top['growth_rate'].iloc[0]:.1f}%)"
+        doc['keywords'] += " geographic market countries penetration"
+    return list(documents.values())
+
+
+def _product_documents(data_generator):
+    documents = []
+    for row in data_generator.product_data.to_dict('records'):
+        documents.append({
+            'id': f"product:{row['product']}",
+            'title': str(row['product']),
+            'keywords': f"{row['product']} product share transactions value mix",
+            'answer': (
+                f"💳 **{row['product']}**\n\n"
+                f"• Revenue share: **{row['revenue_share']:.0f}%**\n"
+                f"• Transactions: {row['transactions_b']:.1f}B\n"
+                f"• Average transaction value: ${row['avg_transaction_value']:,.0f}"
+            )
+        })
+    return documents
+
+
+def _risk_documents(data_generator):
+    documents = []
+    for key, metric in RISK_METRICS.items():
+        value = data_generator.risk_data[key]
+        within = value <= metric['limit'] if metric['direction'] == 'lower' else value >= metric['limit']
+        status = '✅ Within limit' if within else '🚨 Breaching limit'
+        documents.append({
+            'id': f"risk:{key}",
+            'title': metric['label'],
+            'keywords': f"{metric['label']} {metric['keywords']} risk {'within limit' if within else 'breach alert'}",
+            'answer': (
+                f"⚠️ **{metric['label']}**: **{metric['fmt'].format(value)}** "
+                f"(limit {metric['fmt'].format(metric['limit'])}) — {status}\n\n"
+                "*See the Risk & Compliance page for the trend and active alerts.*"
+            )
+        })
+    return documents
+
+
+def _forecast_document(data_generator):
+    forecast = data_generator.forecast_data
+    final_year = int(forecast['year'].max())
+    final = forecast[forecast['year'] == final_year].set_index('scenario')['revenue_b']
+    target = data_generator.kpi_inputs['target_revenue_2030']
+    lines = "\n".join(
+        f"• {scenario.replace('_', ' ').title()}: **${revenue:.1f}B**" for scenario, revenue in final.items()
+    )
+    return {
+        'id': 'forecast:scenarios',
+        'title': f'{final_year} Revenue Forecast',
+        'keywords': f"forecast {final_year} 2030 scenario scenarios outlook projection target conservative base optimistic",
+        'answer': (
+            f"🔮 **{final_year} Revenue Scenarios** (target ${target:.1f}B)\n\n{lines}\n\n"
+            "*The Forecasting page adds fitted statistical forecasts, Monte Carlo ranges and sensitivity analysis.*"
+        )
+    }
+
+
+def _overview_document(kpis, regions, segments):
+    leaders = sorted((doc for doc in regions + segments if not np.isnan(doc['growth'])),
+                     key=lambda doc: doc['growth'], reverse=True)[:3]
+    behind = kpis.frame[kpis.frame['status'].isin(['near', 'below'])]['label'].tolist()
+    lines = [
+        f"• Revenue: {kpis.frame.at['current_revenue', 'display']} in {kpis.as_of}"
+        f" (run rate {kpis.frame.at['run_rate_revenue', 'display']})",
+        f"• Achieved CAGR: {kpis.frame.at['achieved_cagr', 'display']} vs {kpis.frame.at['achieved_cagr', 'target_display']} target",
+        f"• Market share: {kpis.frame.at['market_share', 'display']}",
+        f"• Volume growth: {kpis.frame.at['volume_growth', 'display']}"
+    ]
+    answer = "📈 **Business Analysis Insights**\n\n**Current Performance:**\n" + "\n".join(lines)
+    answer += "\n\n**Fastest Growing:**\n" + "\n".join(f"• {doc['title']}: {doc['growth']:+.1f}% YoY" for doc in leaders)
+    if behind:
+        answer += "\n\n**Below Target:** " + ", ".join(behind)
+    return {
+        'id': 'overview:performance',
+        'title': 'Performance Overview',
+        'keywords': 'analysis trend trends performance insight insights overview summary highlights business growth',
+        'answer': answer
+    }
+
+
+def build_documents(data_generator):
+    """Every answerable document: dashboard help plus metrics computed from the live data"""
+    kpis = get_kpis(data_generator)
+    regions = _region_documents(data_generator)
+    segments = _dimension_documents(data_generator, 'segment', 'segment')
+    documents = (
+        STATIC_DOCUMENTS + _kpi_documents(kpis) + regions + segments
+        + _product_documents(data_generator) + _risk_documents(data_generator)
+        + [_forecast_document(data_generator), _overview_document(kpis, regions, segments)]
+    )
+    return {doc['id']: doc for doc in documents}
+
+
+def fallback_response(user_input):
+    return f"""🤖 **I'm here to help!**
+
+I see you asked: "{user_input}"
+
+I can assist you with:
+• **Metrics** - KPIs, regions, segments, products and risk indicators from the current data
+• **Data questions** - Sources, methodologies, calculations
+• **Export requests** - Custom reports, filtered data, specific formats
+• **Navigation help** - Finding information, using features
+
+Could you please be more specific? For example:
+• "What's APAC growth?"
+• "How is market share tracking against target?"
+• "What's the source of the revenue data?"
+• "What's the fraud rate?\""""
+
+
+class DashboardAssistant:
+    """Answers questions by BM25 retrieval over dashboard help and live metric documents"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.index = BM25Index()
+        self.documents = {}
+        self.data_version = None
+        self.last_refresh = {'indexed': 0, 'removed': 0, 'unchanged': 0}
+        self.last_search_ms = 0.0
+
+    def refresh(self, data_generator):
+        """Bring the index up to a data version, re-indexing only documents whose text changed"""
+        if data_generator.data_version == self.data_version:
+            return
+        documents = build_documents(data_generator)
+        with self._lock:
+            indexed = 0
+            for doc_id, doc in documents.items():
+                previous = self.documents.get(doc_id)
+                if previous is None or previous['keywords'] != doc['keywords'] or previous['title'] != doc['title']:
+                    self.index.upsert(doc_id, tokenize(f"{doc['title']} {doc['keywords']}"))
+                    indexed += 1
+            removed = [doc_id for doc_id in self.documents if doc_id not in documents]
+            for doc_id in removed:
+                self.index.remove(doc_id)
+            self.documents = documents
+            self.data_version = data_generator.data_version
+            self.last_refresh = {'indexed': indexed, 'removed': len(removed),
+                                 'unchanged': len(documents) - indexed}
+
+    def search(self, query, k=3):
+        """Top-k (document, score) matches for a query"""
+        started = time.perf_counter()
+        with self._lock:
+            hits = [(self.documents[doc_id], score) for doc_id, score in self.index.search(tokenize(query), k)]
+        self.last_search_ms = (time.perf_counter() - started) * 1000
+        return hits
+
+    def respond(self, query, data_generator):
+        """Answer for the best match, with the next matches listed as related topics"""
+        self.refresh(data_generator)
+        hits = self.search(query)
+        if not hits or hits[0][1] < MIN_SCORE:
+            return fallback_response(query)
+        answer = hits[0][0]['answer']
+        related = [doc['title'] for doc, score in hits[1:] if score >= MIN_SCORE]
+        if related:
+            answer += "\n\n*Related: " + ", ".join(related) + "*"
+        return answer
+
+
+assistant = DashboardAssistant()
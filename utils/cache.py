@@ -0,0 +1,104 @@
+import threading
+import weakref
+from collections import OrderedDict
+
+# Hit/miss counters shared by every cache instance with the same name, so
+# per-session caches still report one figure per cache for capacity planning
+_CACHE_STATS = {}
+_STATS_LOCK = threading.Lock()
+# Every live cache instance, so memory pressure can evict across all of them
+_CACHES = weakref.WeakSet()
+# Version key for results that do not depend on the data; never evicted as stale
+STATIC_VERSION = 'static'
+
+
+def _stats_for(name):
+    with _STATS_LOCK:
+        if name not in _CACHE_STATS:
+            _CACHE_STATS[name] = {'hits': 0, 'misses': 0}
+        return _CACHE_STATS[name]
+
+
+def get_cache_stats():
+    """Return hit/miss counts and hit rate for every registered cache"""
+    with _STATS_LOCK:
+        stats = {}
+        for name, counts in _CACHE_STATS.items():
+            lookups = counts['hits'] + counts['misses']
+            stats[name] = {
+                'hits': counts['hits'],
+                'misses': counts['misses'],
+                'hit_rate': counts['hits'] / lookups if lookups else 0.0
+            }
+        return stats
+
+
+def reset_cache_stats():
+    """Zero the counters of every registered cache"""
+    with _STATS_LOCK:
+        for counts in _CACHE_STATS.values():
+            counts['hits'] = 0
+            counts['misses'] = 0
+
+
+def evict_stale_versions(keep_versions):
+    """Drop entries of every registered cache whose data version is not in keep_versions
+
+    Entries cached under STATIC_VERSION are kept. Returns the number of entries removed.
+    """
+    keep_versions = set(keep_versions)
+    removed = 0
+    for cache in list(_CACHES):
+        removed += cache.evict_except(keep_versions)
+    return removed
+
+
+class VersionedCache:
+    """Bounded LRU cache for values derived from a specific data version"""
+
+    def __init__(self, name, max_entries=32):
+        self.name = name
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = _stats_for(name)
+        _CACHES.add(self)
+
+    def get_or_compute(self, data_version, key, compute):
+        """Return the cached value for (data_version, key), computing it on a miss"""
+        cache_key = (data_version, key)
+        with self._lock:
+            if cache_key in self._entries:
+                self._entries.move_to_end(cache_key)
+                self._stats['hits'] += 1
+                return self._entries[cache_key]
+            self._stats['misses'] += 1
+
+        value = compute()
+
+        with self._lock:
+            self._entries[cache_key] = value
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def invalidate(self, data_version=None):
+        """Drop all entries, or only those belonging to one data version"""
+        with self._lock:
+            if data_version is None:
+                self._entries.clear()
+            else:
+                for cache_key in [k for k in self._entries if k[0] == data_version]:
+                    del self._entries[cache_key]
+
+    def evict_except(self, keep_versions):
+        """Drop entries for data versions outside keep_versions, returning how many were removed"""
+        with self._lock:
+            stale = [k for k in self._entries if k[0] not in keep_versions and k[0] != STATIC_VERSION]
+            for cache_key in stale:
+                del self._entries[cache_key]
+        return len(stale)
+
+    def __len__(self):
+        return len(self._entries)
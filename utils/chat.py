@@ -0,0 +1,142 @@
+import asyncio
+import logging
+import os
+import re
+
+try:
+    import openai
+except ImportError:
+    openai = None
+
+from utils.assistant import assistant
+
+logger = logging.getLogger(__name__)
+
+# Model endpoint; ASSISTANT_BASE_URL can point at any OpenAI-compatible server, including a local stub
+ASSISTANT_MODEL = os.environ.get("ASSISTANT_MODEL", "gpt-4o-mini")
+ASSISTANT_BASE_URL = os.environ.get("ASSISTANT_BASE_URL")
+ASSISTANT_TIMEOUT_S = float(os.environ.get("ASSISTANT_TIMEOUT_S", 20))
+
+# History above this many messages is folded into a summary, keeping the most recent ones
+CHAT_SUMMARIZE_AFTER = int(os.environ.get("CHAT_SUMMARIZE_AFTER", 24))
+CHAT_KEEP_RECENT = 8
+MAX_SUMMARY_TOPICS = 20
+# Messages rendered per page of the overlay; older ones load on demand
+CHAT_VISIBLE_MESSAGES = 6
+# Recent messages sent to the model alongside the summary and retrieved context
+CONTEXT_MESSAGES = 6
+
+SYSTEM_PROMPT = (
+    "You are the assistant for the Visa Cross-Border Analytics Dashboard. Answer briefly in Markdown. "
+    "Use only the dashboard context below for figures; say so if the context does not cover the question."
+)
+
+
+def model_enabled():
+    """Whether replies come from a model endpoint rather than the local retrieval assistant"""
+    return openai is not None and bool(os.environ.get("OPENAI_API_KEY") or ASSISTANT_BASE_URL)
+
+
+def build_prompt(messages, question, data_generator):
+    """Chat completion messages: instructions with retrieved context, history summary, recent turns"""
+    assistant.refresh(data_generator)
+    context = "\n\n".join(doc['answer'] for doc, _ in assistant.search(question))
+    prompt = [{'role': 'system', 'content': f"{SYSTEM_PROMPT}\n\n# Dashboard context\n{context}"}]
+    summary = next((m for m in messages if m.get('summary')), None)
+    if summary is not None:
+        prompt.append({'role': 'system', 'content': summary['content']})
+    recent = [m for m in messages[1:] if not m.get('summary')][-CONTEXT_MESSAGES:]
+    prompt.extend({'role': m['role'], 'content': m['content']} for m in recent)
+    return prompt
+
+
+async def local_stream(text):
+    """Yield a finished answer a few words at a time so it renders like a streamed reply"""
+    for chunk in re.findall(r"\S+\s*", text):
+        yield chunk
+        await asyncio.sleep(0)
+
+
+async def model_stream(prompt):
+    """Yield content deltas from a streaming chat completion"""
+    client = openai.AsyncOpenAI(base_url=ASSISTANT_BASE_URL, api_key=os.environ.get("OPENAI_API_KEY", "local"),
+                                timeout=ASSISTANT_TIMEOUT_S)
+    try:
+        stream = await client.chat.completions.create(model=ASSISTANT_MODEL, messages=prompt, stream=True)
+        async for chunk in stream:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                yield delta
+    finally:
+        await client.close()
+
+
+async def stream_reply(messages, data_generator):
+    """Stream the reply to the last user message, falling back to the local assistant on endpoint errors"""
+    question = messages[-1]['content']
+    if model_enabled():
+        streamed = False
+        try:
+            # Retrieval may rebuild the index for a new data version; keep it off the event loop
+            prompt = await asyncio.to_thread(build_prompt, messages, question, data_generator)
+            async for token in model_stream(prompt):
+                streamed = True
+                yield token
+            return
+        except (openai.OpenAIError, asyncio.TimeoutError) as error:
+            logger.warning("Assistant endpoint failed, answering locally: %s", error)
+            if streamed:
+                yield "\n\n*(response interrupted)*"
+                return
+    local_answer = await asyncio.to_thread(assistant.respond, question, data_generator)
+    async for token in local_stream(local_answer):
+        yield token
+
+
+def iterate_sync(stream):
+    """Drive an async generator from synchronous code on a private event loop"""
+    loop = asyncio.new_event_loop()
+    try:
+        while True:
+            try:
+                yield loop.run_until_complete(stream.__anext__())
+            except StopAsyncIteration:
+                break
+    finally:
+        loop.run_until_complete(stream.aclose())
+        loop.close()
+
+
+def _shorten(text, width=80):
+    text = " ".join(text.split())
+    return text if len(text) <= width else text[:width - 1] + "…"
+
+
+def compact_history(messages, limit=CHAT_SUMMARIZE_AFTER, keep_recent=CHAT_KEEP_RECENT):
+    """Fold all but the welcome and most recent messages into one summary message, in place"""
+    if len(messages) <= limit:
+        return 0
+    start = 2 if len(messages) > 1 and messages[1].get('summary') else 1
+    existing = messages[1] if start == 2 else {'topics': [], 'folded': 0}
+    folded = messages[start:len(messages) - keep_recent]
+    topics = (existing['topics'] + [_shorten(m['content']) for m in folded if m['role'] == 'user'])
+    topics = topics[-MAX_SUMMARY_TOPICS:]
+    count = existing['folded'] + len(folded)
+    summary = {
+        'role': 'assistant',
+        'summary': True,
+        'topics': topics,
+        'folded': count,
+        'content': f"🗂️ **Earlier in this conversation** ({count} messages summarized) you asked about:\n"
+                   + "\n".join(f"• {topic}" for topic in topics)
+    }
+    messages[1:len(messages) - keep_recent] = [summary]
+    return len(folded)
+
+
+def chat_window(messages, size=CHAT_VISIBLE_MESSAGES):
+    """Summary message, number of hidden older messages and the messages to render"""
+    summary = next((m for m in messages if m.get('summary')), None)
+    body = [m for m in messages if not m.get('summary')]
+    visible = body[-size:]
+    return summary, len(body) - len(visible), visible
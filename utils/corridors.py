@@ -0,0 +1,134 @@
+import numpy as np
+import pandas as pd
+
+from utils.cache import VersionedCache
+
+# Region of every country that appears in a corridor name
+COUNTRY_REGIONS = {
+    'US': 'North America',
+    'Canada': 'North America',
+    'Mexico': 'Latin America',
+    'UK': 'Europe',
+    'Germany': 'Europe',
+    'France': 'Europe',
+    'Turkey': 'Europe',
+    'Saudi': 'Middle East & Africa',
+    'UAE': 'Middle East & Africa',
+    'Algeria': 'Middle East & Africa',
+    'India': 'Asia-Pacific',
+    'Philippines': 'Asia-Pacific',
+    'Australia': 'Asia-Pacific',
+    'China': 'Asia-Pacific',
+    'Singapore': 'Asia-Pacific',
+    'Indonesia': 'Asia-Pacific'
+}
+
+# Edge attributes taken from opportunity_data; market size stands in for corridor volume
+EDGE_ATTRIBUTES = {
+    'volume_b': 'market_size_b',
+    'potential_revenue_b': 'potential_revenue_b',
+    'penetration': 'current_penetration',
+    'visa_share': 'visa_share'
+}
+
+_graphs = VersionedCache("corridor_graphs", max_entries=8)
+
+
+def _build_adjacency(node_ids, weights, n_nodes):
+    """CSR-style adjacency: edges grouped by node, heaviest first within a node"""
+    order = np.lexsort((-weights, node_ids))
+    offsets = np.zeros(n_nodes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(node_ids, minlength=n_nodes), out=offsets[1:])
+    return offsets, order
+
+
+class CorridorGraph:
+    """Countries as nodes and payment corridors as weighted directed edges"""
+
+    def __init__(self, opportunity_data, country_regions=None):
+        country_regions = COUNTRY_REGIONS if country_regions is None else country_regions
+        corridors = opportunity_data['corridor'].astype(str)
+        endpoints = corridors.str.split('-', n=1, expand=True)
+
+        self.countries = sorted(set(endpoints[0]) | set(endpoints[1]))
+        self.country_names = np.array(self.countries, dtype=object)
+        self.country_ids = {country: i for i, country in enumerate(self.countries)}
+        self.regions = sorted({country_regions.get(c, 'Other') for c in self.countries})
+        region_ids = {region: i for i, region in enumerate(self.regions)}
+        self.country_region = np.array(
+            [region_ids[country_regions.get(c, 'Other')] for c in self.countries], dtype=np.int64
+        )
+
+        self.corridor = corridors.to_numpy()
+        self.origin = endpoints[0].map(self.country_ids).to_numpy(dtype=np.int64)
+        self.destination = endpoints[1].map(self.country_ids).to_numpy(dtype=np.int64)
+        self.edges = {
+            name: opportunity_data[column].to_numpy(dtype=np.float64)
+            for name, column in EDGE_ATTRIBUTES.items()
+        }
+
+        n_nodes = len(self.countries)
+        volume = self.edges['volume_b']
+        self.out_offsets, self.out_edges = _build_adjacency(self.origin, volume, n_nodes)
+        self.in_offsets, self.in_edges = _build_adjacency(self.destination, volume, n_nodes)
+
+        # Region-to-region totals, computed once so aggregate queries are lookups
+        n_regions = len(self.regions)
+        origin_region = self.country_region[self.origin]
+        destination_region = self.country_region[self.destination]
+        self.region_totals = {}
+        for name in ('volume_b', 'potential_revenue_b'):
+            matrix = np.zeros((n_regions, n_regions))
+            np.add.at(matrix, (origin_region, destination_region), self.edges[name])
+            self.region_totals[name] = matrix
+        self.region_counts = np.zeros((n_regions, n_regions), dtype=np.int64)
+        np.add.at(self.region_counts, (origin_region, destination_region), 1)
+
+    def outbound_edges(self, country, k=None):
+        """Edge ids of corridors leaving a country, largest volume first"""
+        return self._neighbors(self.out_offsets, self.out_edges, country, k)
+
+    def inbound_edges(self, country, k=None):
+        """Edge ids of corridors arriving in a country, largest volume first"""
+        return self._neighbors(self.in_offsets, self.in_edges, country, k)
+
+    def outbound(self, country, k=None):
+        """Corridors leaving a country as a table, largest volume first"""
+        return self._edge_table(self.outbound_edges(country, k))
+
+    def inbound(self, country, k=None):
+        """Corridors arriving in a country as a table, largest volume first"""
+        return self._edge_table(self.inbound_edges(country, k))
+
+    def region_matrix(self, metric='volume_b'):
+        """Origin-region by destination-region aggregate of an edge metric"""
+        values = self.region_counts if metric == 'count' else self.region_totals[metric]
+        return pd.DataFrame(values, index=self.regions, columns=self.regions)
+
+    def _neighbors(self, offsets, edges, country, k):
+        node = self.country_ids.get(country)
+        if node is None:
+            return np.array([], dtype=np.int64)
+        start, end = offsets[node], offsets[node + 1]
+        if k is not None:
+            end = min(end, start + k)
+        return edges[start:end]
+
+    def _edge_table(self, edge_ids):
+        table = pd.DataFrame({
+            'corridor': self.corridor[edge_ids],
+            'origin': self.country_names[self.origin[edge_ids]],
+            'destination': self.country_names[self.destination[edge_ids]]
+        })
+        for name, values in self.edges.items():
+            table[name] = values[edge_ids]
+        return table
+
+
+def get_corridor_graph(data_generator):
+    """Return the corridor graph for a data generator, built once per data version"""
+    return _graphs.get_or_compute(
+        data_generator.data_version,
+        'corridor_graph',
+        lambda: CorridorGraph(data_generator.opportunity_data)
+    )
@@ -3,6 +3,14 @@ import pandas as pd
 from io import BytesIO
 import base64
 
+from utils.kpis import SUMMARY_REPORT_KEYS, get_kpis
+
+# Download formats for query results: MIME type and file extension
+EXPORT_FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'json': ('application/json', 'json')
+}
+
 class ExportUtils:
     @staticmethod
     def export_to_csv(data, filename="visa_dashboard_data.csv"):
@@ -41,39 +49,32 @@ class ExportUtils:
         filename = f"{chart_title.lower().replace(' ', '_')}_data.csv"
         return ExportUtils.export_to_csv(chart_data, filename)
     
+    @staticmethod
+    def export_query_result(result, file_format="csv", stem="visa_query"):
+        """Serialize a query result for download, returning (data, filename, mime type)"""
+        # Formats without a writer installed (Excel, PDF) are delivered as CSV
+        file_format = file_format if file_format in EXPORT_FORMATS else "csv"
+        mime, extension = EXPORT_FORMATS[file_format]
+        if file_format == "json":
+            data = result.to_json(orient="records", date_format="iso").encode()
+        else:
+            data = ExportUtils.export_to_csv(result)
+        return data, f"{stem}.{extension}", mime
+    
     @staticmethod
     def generate_summary_report(data_generator):
         """Generate a comprehensive summary report"""
-        kpi_data = data_generator.kpi_data
+        kpis = get_kpis(data_generator)
+        rows = kpis.frame.loc[SUMMARY_REPORT_KEYS]
         
+        labels = [
+            f"{label} ({kpis.as_of})" if key == 'current_revenue' else label
+            for key, label in zip(rows.index, rows['label'])
+        ]
         summary = {
-            'Metric': [
-                'Current Revenue (Q3 FY2025)',
-                'Achieved CAGR',
-                'Volume Growth',
-                'Market Share',
-                'Revenue Yield',
-                'Target Revenue 2030',
-                'YTD Revenue'
-            ],
-            'Value': [
-                f"${kpi_data['current_revenue']:.1f}B",
-                f"{kpi_data['achieved_cagr']:.1f}%",
-                f"{kpi_data['volume_growth']:.1f}%",
-                f"{kpi_data['market_share']:.1f}%",
-                f"{kpi_data['revenue_yield']:.2f}%",
-                f"${kpi_data['target_revenue_2030']:.1f}B",
-                f"${kpi_data['ytd_revenue']:.1f}B"
-            ],
-            'Status': [
-                '✅ On Track',
-                '⚠️ Below Target',
-                '✅ Above Target',
-                '⚠️ Below Target',
-                '⚠️ Below Target',
-                '📈 Target',
-                '✅ On Track'
-            ]
+            'Metric': labels,
+            'Value': list(rows['display']),
+            'Status': list(rows['status_label'])
         }
         
         return pd.DataFrame(summary)
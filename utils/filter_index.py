@@ -0,0 +1,56 @@
+import numpy as np
+
+# Global filter keys and the fact-table columns they select on
+FILTER_DIMENSIONS = {
+    'segments': 'segment',
+    'regions': 'region',
+    'products': 'product'
+}
+
+
+def filter_cache_key(filters):
+    """Return a hashable, order-insensitive key for a filters dict"""
+    key = []
+    for name in sorted(filters):
+        value = filters[name]
+        if isinstance(value, (list, set)):
+            value = tuple(sorted(value))
+        elif isinstance(value, tuple):
+            value = tuple(str(v) for v in value)
+        key.append((name, value))
+    return tuple(key)
+
+
+class DimensionIndex:
+    """Per-value row bitmaps for the categorical dimensions of a fact table"""
+
+    def __init__(self, data, columns):
+        self.n_rows = len(data)
+        self.bitmaps = {}
+        for column in columns:
+            if column not in data.columns:
+                continue
+            values = data[column].astype('category')
+            codes = values.cat.codes.to_numpy()
+            self.bitmaps[column] = {
+                category: codes == code
+                for code, category in enumerate(values.cat.categories)
+            }
+
+    def mask(self, filters):
+        """Return a boolean row mask for the dimension filters, or None if unfiltered"""
+        mask = None
+        for filter_key, column in FILTER_DIMENSIONS.items():
+            selected = filters.get(filter_key)
+            if not selected or column not in self.bitmaps:
+                continue
+            bitmaps = self.bitmaps[column]
+            if len(set(selected) & set(bitmaps)) == len(bitmaps):
+                continue  # every value selected, nothing to filter
+
+            column_mask = np.zeros(self.n_rows, dtype=bool)
+            for value in selected:
+                if value in bitmaps:
+                    column_mask |= bitmaps[value]
+            mask = column_mask if mask is None else mask & column_mask
+        return mask
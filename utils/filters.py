@@ -1,5 +1,6 @@
 import streamlit as st
-from datetime import datetime, timedelta
+from datetime import datetime
+from utils.fiscal_calendar import NAMED_PERIODS, FiscalDateIndex
 
 class GlobalFilters:
     def __init__(self):
@@ -13,26 +14,14 @@ class GlobalFilters:
         st.subheader("📅 Time Period")
         date_option = st.selectbox(
             "Select Period",
-            ["Last 4 Quarters", "YTD", "Last 12 Months", "Custom Range"]
+            NAMED_PERIODS + ["Custom Range"]
         )
+        filters['period'] = date_option
         
         if date_option == "Custom Range":
             start_date = st.date_input("Start Date", datetime(2024, 1, 1))
             end_date = st.date_input("End Date", datetime.now())
             filters['date_range'] = (start_date, end_date)
-        else:
-            # Set predefined ranges
-            end_date = datetime.now()
-            start_date = end_date  # Default fallback
-            
-            if date_option == "Last 4 Quarters":
-                start_date = end_date - timedelta(days=365)
-            elif date_option == "YTD":
-                start_date = datetime(end_date.year, 1, 1)
-            elif date_option == "Last 12 Months":
-                start_date = end_date - timedelta(days=365)
-            
-            filters['date_range'] = (start_date, end_date)
         
         # Segment filter
         st.subheader("🎯 Segments")
@@ -78,17 +67,22 @@ class GlobalFilters:
         
         return filters
     
-    def apply_filters(self, data, filters):
-        """Apply filters to a dataset"""
+    def apply_filters(self, data, filters, data_generator=None):
+        """Apply filters to a dataset, reusing the data generator's date index when one is given"""
         filtered_data = data.copy()
         
-        # Apply date filter
-        if 'date_range' in filters and 'date' in filtered_data.columns:
-            start_date, end_date = filters['date_range']
-            filtered_data = filtered_data[
-                (filtered_data['date'] >= start_date) & 
-                (filtered_data['date'] <= end_date)
-            ]
+        # Apply date filter; named periods resolve against the latest date in the data
+        if 'date' in filtered_data.columns:
+            if data_generator is not None:
+                date_index = data_generator.get_date_index(data)
+            else:
+                date_index = FiscalDateIndex(filtered_data['date'])
+            if filters.get('period') in NAMED_PERIODS:
+                start_date, end_date = date_index.period_range(filters['period'])
+                filtered_data = date_index.slice(filtered_data, start_date, end_date)
+            elif 'date_range' in filters:
+                start_date, end_date = filters['date_range']
+                filtered_data = date_index.slice(filtered_data, start_date, end_date)
         
         # Apply segment filter
         if 'segments' in filters and 'segment' in filtered_data.columns:
@@ -117,7 +111,9 @@ class GlobalFilters:
         """Generate a summary of applied filters"""
         summary = []
         
-        if 'date_range' in filters:
+        if filters.get('period') in NAMED_PERIODS:
+            summary.append(f"📅 {filters['period']}")
+        elif 'date_range' in filters:
             start_date, end_date = filters['date_range']
             summary.append(f"📅 {start_date.strftime('%Y-%m-%d')} to {end_date.strftime('%Y-%m-%d')}")
         
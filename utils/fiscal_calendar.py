@@ -0,0 +1,116 @@
+import re
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+# Visa's fiscal year starts on October 1st: FY2025 runs Oct 2024 - Sep 2025
+FISCAL_YEAR_START_MONTH = 10
+
+NAMED_PERIODS = ["Last 4 Quarters", "YTD", "Last 12 Months"]
+
+
+def _to_datetime(value):
+    return pd.Timestamp(value).to_pydatetime()
+
+
+def _add_months(date, months):
+    month_index = date.year * 12 + (date.month - 1) + months
+    return datetime(month_index // 12, month_index % 12 + 1, 1)
+
+
+def fiscal_year(date):
+    """Return the fiscal year a date falls in"""
+    return date.year + 1 if date.month >= FISCAL_YEAR_START_MONTH else date.year
+
+
+def fiscal_quarter(date):
+    """Return the (fiscal year, fiscal quarter) a date falls in"""
+    return fiscal_year(date), (date.month - FISCAL_YEAR_START_MONTH) % 12 // 3 + 1
+
+
+def quarter_label(date):
+    """Return the fiscal quarter label of a date, e.g. 'FY2025-Q1'"""
+    year, quarter = fiscal_quarter(date)
+    return f"FY{year}-Q{quarter}"
+
+
+def parse_quarter_label(label):
+    """Return the (fiscal year, fiscal quarter) of a label such as 'FY2025-Q1'"""
+    match = re.fullmatch(r"FY(\d{4})-Q([1-4])", str(label))
+    if match is None:
+        raise ValueError(f"Not a fiscal quarter label: {label}")
+    return int(match.group(1)), int(match.group(2))
+
+
+def quarter_start(year, quarter):
+    """Return the first day of a fiscal quarter"""
+    fiscal_year_start = datetime(year - 1, FISCAL_YEAR_START_MONTH, 1)
+    return _add_months(fiscal_year_start, 3 * (quarter - 1))
+
+
+def quarter_start_of(date):
+    """Return the first day of the fiscal quarter containing a date"""
+    return quarter_start(*fiscal_quarter(date))
+
+
+def quarter_end_of(date):
+    """Return the last moment of the fiscal quarter containing a date"""
+    return _add_months(quarter_start_of(date), 3) - timedelta(microseconds=1)
+
+
+def fiscal_quarter_starts(first_quarter_start, n_quarters):
+    """Return the start dates of n consecutive fiscal quarters"""
+    first = quarter_start_of(first_quarter_start)
+    return [_add_months(first, 3 * i) for i in range(n_quarters)]
+
+
+def resolve_period(period, as_of):
+    """Resolve a named period to an inclusive (start, end) datetime range"""
+    as_of = _to_datetime(as_of)
+    end = quarter_end_of(as_of)
+
+    if period == "Last 4 Quarters":
+        start = _add_months(quarter_start_of(as_of), -9)
+    elif period == "YTD":
+        start = quarter_start(fiscal_year(as_of), 1)
+    elif period == "Last 12 Months":
+        end = as_of
+        start = (pd.Timestamp(as_of) - pd.DateOffset(years=1)).to_pydatetime() + timedelta(days=1)
+    else:
+        raise ValueError(f"Unknown period: {period}")
+
+    return start, end
+
+
+class FiscalDateIndex:
+    """Sorted date index mapping date ranges to row ranges by binary search"""
+
+    def __init__(self, dates):
+        values = pd.to_datetime(pd.Series(dates)).to_numpy(dtype='datetime64[ns]')
+        self.order = np.argsort(values, kind='stable')
+        self.dates = values[self.order]
+        # When the frame is already in date order a range is a plain iloc slice
+        self.is_sorted = bool(np.all(self.order == np.arange(len(values))))
+
+    @property
+    def as_of(self):
+        """Latest date covered by the index"""
+        return _to_datetime(self.dates[-1]) if len(self.dates) else datetime.now()
+
+    def row_range(self, start, end):
+        """Return the half-open range of sorted positions with start <= date <= end"""
+        lo = np.searchsorted(self.dates, np.datetime64(pd.Timestamp(start), 'ns'), side='left')
+        hi = np.searchsorted(self.dates, np.datetime64(pd.Timestamp(end), 'ns'), side='right')
+        return int(lo), int(max(lo, hi))
+
+    def period_range(self, period):
+        """Resolve a named period relative to the latest indexed date"""
+        return resolve_period(period, self.as_of)
+
+    def slice(self, data, start, end):
+        """Return the rows of data whose date lies within [start, end]"""
+        lo, hi = self.row_range(start, end)
+        if self.is_sorted:
+            return data.iloc[lo:hi]
+        return data.iloc[np.sort(self.order[lo:hi])]
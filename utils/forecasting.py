@@ -0,0 +1,215 @@
+import math
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from utils.cache import VersionedCache
+from utils.fiscal_calendar import fiscal_quarter_starts, fiscal_year, parse_quarter_label, quarter_label
+from utils.trajectory import TARGET_YEAR
+
+QUARTERS_PER_YEAR = 4
+# Two-sided normal quantiles for the supported prediction interval levels
+INTERVAL_Z = {0.8: 1.2815515655446004, 0.95: 1.959963984540054}
+
+# Smoothing parameter grid searched when fitting Holt's linear trend
+SMOOTHING_GRID = np.linspace(0.05, 0.95, 19)
+# Upper bound on series per fitting task; batches are otherwise split evenly across workers
+MAX_SERIES_PER_TASK = 64
+FORECAST_WORKERS = int(os.environ.get("FORECAST_WORKERS", min(4, os.cpu_count() or 1)))
+
+_forecasts = VersionedCache("revenue_forecasts", max_entries=8)
+
+
+def series_matrix(revenue_data, by=('segment', 'region')):
+    """Quarterly revenue per series as an (n_series, n_quarters) matrix, from one grouped pass"""
+    by = list(by)
+    grouped = revenue_data.groupby(by + ['quarter'], observed=True)['revenue_b'].sum()
+    table = grouped.unstack('quarter', fill_value=0.0).sort_index(axis=1)
+    keys = table.index.to_frame(index=False)
+    for column in by:
+        keys[column] = keys[column].astype(str)
+    return keys, table.to_numpy(dtype=np.float64), [str(q) for q in table.columns]
+
+
+def fit_holt(y):
+    """Holt's linear trend, ETS(A,A,N), for every row of y by grid search over the smoothing parameters"""
+    n_series, n_obs = y.shape
+    alpha, beta = (grid.ravel() for grid in np.meshgrid(SMOOTHING_GRID, SMOOTHING_GRID, indexing='ij'))
+    # States are (series, grid point); all candidates are filtered together
+    level = np.repeat(y[:, :1], len(alpha), axis=1)
+    trend = np.repeat(y[:, 1:2] - y[:, :1], len(alpha), axis=1)
+    sse = np.zeros_like(level)
+    for t in range(1, n_obs):
+        error = y[:, t:t + 1] - (level + trend)
+        # The trend is seeded from y1 - y0, so the t = 1 error is zero by construction;
+        # scoring starts at t = 2, the same window as the ARIMA residuals
+        if t >= 2:
+            sse += error ** 2
+        level = level + trend + alpha * error
+        trend = trend + alpha * beta * error
+    best = sse.argmin(axis=1)
+    rows = np.arange(n_series)
+    return {
+        'alpha': alpha[best],
+        'beta': beta[best],
+        'level': level[rows, best],
+        'trend': trend[rows, best],
+        'sigma2': sse[rows, best] / max(n_obs - 2, 1),
+        'sse': sse[rows, best],
+        'n_residuals': max(n_obs - 2, 0),
+        'n_params': 4
+    }
+
+
+def fit_arima_110(y):
+    """ARIMA(1,1,0) with drift for every row of y, by least squares on the differences"""
+    diffs = np.diff(y, axis=1)
+    current, previous = diffs[:, 1:], diffs[:, :-1]
+    # Per-series OLS of d_t on [1, d_{t-1}], solved in closed form
+    x_mean = previous.mean(axis=1, keepdims=True)
+    d_mean = current.mean(axis=1, keepdims=True)
+    sxx = ((previous - x_mean) ** 2).sum(axis=1)
+    sxy = ((previous - x_mean) * (current - d_mean)).sum(axis=1)
+    phi = np.clip(np.divide(sxy, sxx, out=np.zeros_like(sxy), where=sxx > 0), -0.98, 0.98)
+    drift = d_mean[:, 0] - phi * x_mean[:, 0]
+    residuals = current - (drift[:, None] + phi[:, None] * previous)
+    sse = (residuals ** 2).sum(axis=1)
+    return {
+        'phi': phi,
+        'drift': drift,
+        'last_value': y[:, -1],
+        'last_diff': diffs[:, -1],
+        'sigma2': sse / max(current.shape[1] - 2, 1),
+        'sse': sse,
+        'n_residuals': current.shape[1],
+        'n_params': 3
+    }
+
+
+def _aic(sse, n_obs, n_params):
+    return n_obs * np.log(np.maximum(sse, 1e-12) / n_obs) + 2 * n_params
+
+
+def forecast_holt(params, horizon):
+    """Point forecasts and standard deviations for h = 1..horizon"""
+    steps = np.arange(1, horizon + 1)
+    point = params['level'][:, None] + steps * params['trend'][:, None]
+    # Var(h) = sigma^2 * (1 + sum_{j<h} (alpha + alpha*beta*j)^2)
+    weights = params['alpha'][:, None] * (1 + params['beta'][:, None] * steps[:-1])
+    cumulative = np.concatenate([np.zeros((len(point), 1)), np.cumsum(weights ** 2, axis=1)], axis=1)
+    return point, np.sqrt(params['sigma2'][:, None] * (1 + cumulative))
+
+
+def forecast_arima_110(params, horizon):
+    """Point forecasts and standard deviations for h = 1..horizon"""
+    n_series = len(params['phi'])
+    phi = params['phi']
+    diffs = np.empty((n_series, horizon))
+    previous = params['last_diff']
+    for h in range(horizon):
+        previous = params['drift'] + phi * previous
+        diffs[:, h] = previous
+    point = params['last_value'][:, None] + np.cumsum(diffs, axis=1)
+    # psi weights of the integrated AR(1): psi_j = sum_{i<=j} phi^i
+    powers = phi[:, None] ** np.arange(horizon)
+    psi = np.cumsum(powers, axis=1)
+    return point, np.sqrt(params['sigma2'][:, None] * np.cumsum(psi ** 2, axis=1))
+
+
+def fit_batch(y, horizon):
+    """Fit both model families to a batch of series, keep the lower-AIC model per series"""
+    holt = fit_holt(y)
+    arima = fit_arima_110(y)
+    holt_point, holt_sd = forecast_holt(holt, horizon)
+    arima_point, arima_sd = forecast_arima_110(arima, horizon)
+
+    # Both fits are scored on the residuals of observations 2..n-1, so their AICs are comparable
+    use_arima = (_aic(arima['sse'], arima['n_residuals'], arima['n_params'])
+                 < _aic(holt['sse'], holt['n_residuals'], holt['n_params']))
+    return {
+        'model': np.where(use_arima, 'ARIMA(1,1,0)', 'ETS(A,A,N)'),
+        'point': np.where(use_arima[:, None], arima_point, holt_point),
+        'sd': np.where(use_arima[:, None], arima_sd, holt_sd),
+        'sigma': np.sqrt(np.where(use_arima, arima['sigma2'], holt['sigma2'])),
+        'alpha': np.where(use_arima, np.nan, holt['alpha']),
+        'beta': np.where(use_arima, np.nan, holt['beta']),
+        'phi': np.where(use_arima, arima['phi'], np.nan)
+    }
+
+
+def fit_series(history, horizon, workers=FORECAST_WORKERS):
+    """Fit and forecast every row of a history matrix, spreading batches over a worker pool"""
+    size = max(1, min(MAX_SERIES_PER_TASK, math.ceil(len(history) / max(workers, 1))))
+    batches = [history[i:i + size] for i in range(0, len(history), size)]
+    if workers > 1 and len(batches) > 1:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(fit_batch, batches, [horizon] * len(batches)))
+    else:
+        results = [fit_batch(batch, horizon) for batch in batches]
+    return {name: np.concatenate([result[name] for result in results]) for name in results[0]}
+
+
+def annual_frame(history, point, sd, history_years, future_years, level=0.8):
+    """Fiscal-year totals over rows of quarterly series, actuals then forecasts with intervals
+
+    Quarterly values are annualized run rates, so a fiscal year is the mean of its
+    quarters. Errors are treated as independent across rows and fully correlated
+    across the quarters of one row, which keeps the annual bands conservative.
+    """
+    z = INTERVAL_Z[level]
+    rows = []
+    for year in np.unique(history_years):
+        actual = history[:, history_years == year].sum(axis=0).mean()
+        rows.append({'year': int(year), 'revenue_b': actual, 'lower': actual, 'upper': actual, 'actual': True})
+    for year in np.unique(future_years):
+        in_year = future_years == year
+        revenue = point[:, in_year].sum(axis=0).mean()
+        total_sd = np.sqrt((sd[:, in_year].mean(axis=1) ** 2).sum())
+        rows.append({'year': int(year), 'revenue_b': revenue, 'lower': revenue - z * total_sd,
+                     'upper': revenue + z * total_sd, 'actual': False})
+    return pd.DataFrame(rows)
+
+
+class RevenueForecasts:
+    """Fitted per-series quarterly revenue forecasts with prediction intervals"""
+
+    def __init__(self, revenue_data, by=('segment', 'region'), horizon=None, workers=FORECAST_WORKERS):
+        self.keys, self.history, self.quarters = series_matrix(revenue_data, by)
+        self.by = list(by)
+        last_start = revenue_data['date'].max()
+        self.last_fiscal_year = fiscal_year(last_start)
+        # Forecast through the last quarter of the target fiscal year
+        if horizon is None:
+            horizon = (TARGET_YEAR - self.last_fiscal_year) * QUARTERS_PER_YEAR
+        self.horizon = horizon
+        self.future_starts = fiscal_quarter_starts(last_start, horizon + 1)[1:]
+        self.future_quarters = [quarter_label(start) for start in self.future_starts]
+
+        self.history_years = np.array([parse_quarter_label(q)[0] for q in self.quarters])
+        self.future_years = np.array([fiscal_year(start) for start in self.future_starts])
+
+        fitted = fit_series(self.history, horizon, workers)
+        self.model = fitted['model']
+        self.point = fitted['point']
+        self.sd = fitted['sd']
+        self.params = self.keys.assign(**{name: fitted[name] for name in ('model', 'alpha', 'beta', 'phi', 'sigma')})
+
+    def interval(self, level=0.8):
+        """Lower and upper quarterly prediction bounds per series"""
+        z = INTERVAL_Z[level]
+        return self.point - z * self.sd, self.point + z * self.sd
+
+    def annual_total(self, level=0.8):
+        """Fiscal-year revenue of all series combined, actuals then forecasts with intervals"""
+        return annual_frame(self.history, self.point, self.sd, self.history_years, self.future_years, level)
+
+
+def get_revenue_forecasts(data_generator):
+    """Return fitted revenue forecasts for a data generator, fitted once per data version"""
+    return _forecasts.get_or_compute(
+        data_generator.data_version,
+        ('segment', 'region'),
+        lambda: RevenueForecasts(data_generator.revenue_data)
+    )
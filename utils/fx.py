@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+
+from utils.cache import VersionedCache
+
+BASE_CURRENCY = "USD"
+
+CURRENCY_SYMBOLS = {'USD': '$', 'EUR': '€', 'GBP': '£', 'JPY': '¥'}
+
+# Monetary columns per DataGenerator frame, all stored in USD
+MONETARY_COLUMNS = {
+    'revenue_data': ['revenue_b'],
+    'geographic_data': ['revenue_m'],
+    'opportunity_data': ['potential_revenue_b', 'market_size_b'],
+    'forecast_data': ['revenue_b']
+}
+
+# Local quarterly rate table: units of currency per 1 USD, effective from each date
+RATE_TABLE = pd.DataFrame({
+    'date': pd.to_datetime([
+        '2023-10-01', '2024-01-01', '2024-04-01', '2024-07-01',
+        '2024-10-01', '2025-01-01', '2025-04-01', '2025-07-01'
+    ]),
+    'USD': [1.0] * 8,
+    'EUR': [0.95, 0.92, 0.93, 0.92, 0.90, 0.96, 0.92, 0.86],
+    'GBP': [0.82, 0.79, 0.79, 0.78, 0.75, 0.80, 0.75, 0.73],
+    'JPY': [149.5, 141.0, 151.0, 161.0, 143.0, 157.0, 149.0, 144.0]
+})
+
+
+class FXEngine:
+    """Vectorized currency conversion with per data-version caching"""
+
+    def __init__(self, rate_table=None):
+        table = RATE_TABLE if rate_table is None else rate_table
+        table = table.sort_values('date')
+        self.rate_dates = table['date'].to_numpy(dtype='datetime64[ns]')
+        self.rates = {
+            currency: table[currency].to_numpy(dtype='float64')
+            for currency in table.columns if currency != 'date'
+        }
+        self.cache = VersionedCache("fx_conversion", max_entries=64)
+
+    @property
+    def currencies(self):
+        return list(self.rates)
+
+    def latest_rate(self, currency):
+        """Return the most recent USD -> currency rate"""
+        return float(self.rates[currency][-1])
+
+    def rates_for(self, currency, dates):
+        """Return the rate in effect on each date (as-of lookup)"""
+        if currency not in self.rates:
+            raise ValueError(f"Unsupported currency: {currency}")
+        dates = pd.to_datetime(pd.Series(dates)).to_numpy(dtype='datetime64[ns]')
+        positions = np.searchsorted(self.rate_dates, dates, side='right') - 1
+        return self.rates[currency][np.clip(positions, 0, len(self.rate_dates) - 1)]
+
+    def convert_frame(self, data, currency, columns, date_column='date'):
+        """Convert the monetary columns of a frame from USD in one array operation"""
+        columns = [column for column in columns if column in data.columns]
+        if currency == BASE_CURRENCY or not columns:
+            return data
+
+        if date_column in data.columns:
+            rates = self.rates_for(currency, data[date_column])
+        else:
+            rates = np.full(len(data), self.latest_rate(currency))
+
+        values = data[columns].to_numpy(dtype='float64') * rates[:, None]
+        converted = data.copy()
+        dtype = np.result_type(*data[columns].dtypes)
+        converted[columns] = pd.DataFrame(values.astype(dtype), index=data.index, columns=columns)
+        return converted
+
+    def convert(self, data, currency, data_version, frame_name):
+        """Return a DataGenerator frame in the given currency, cached per data version"""
+        if currency == BASE_CURRENCY:
+            return data
+        return self.cache.get_or_compute(
+            data_version,
+            (frame_name, currency),
+            lambda: self.convert_frame(data, currency, MONETARY_COLUMNS.get(frame_name, []))
+        )
+
+
+fx_engine = FXEngine()
@@ -0,0 +1,70 @@
+import heapq
+from itertools import islice
+
+import pandas as pd
+
+from utils.cache import VersionedCache
+
+COUNTRY_COLUMNS = ['country', 'region', 'revenue_m', 'growth_rate', 'penetration']
+
+_aggregates = VersionedCache("geo_aggregates", max_entries=8)
+
+
+class GeoAggregates:
+    """Per-region and per-country summaries with a growth-rate index, built once per data version (read-only)"""
+
+    def __init__(self, geographic_data):
+        self.countries = {}
+        self.region_totals = {}
+        # Per-region lists of (-growth_rate, country), sorted for top-K lookups
+        self.growth_index = {}
+        records = geographic_data[COUNTRY_COLUMNS].astype({'country': str, 'region': str}).to_dict('records')
+        for record in records:
+            self._add(record)
+        for index in self.growth_index.values():
+            index.sort()
+
+    def region_summary(self, regions=None):
+        """Revenue total and mean growth/penetration per region"""
+        summary = [
+            {
+                'region': region,
+                'revenue_m': totals['revenue_m'],
+                'growth_rate': totals['growth_rate'] / totals['count'],
+                'penetration': totals['penetration'] / totals['count']
+            }
+            for region, totals in ((r, self.region_totals[r]) for r in self._selected_regions(regions))
+        ]
+        return pd.DataFrame(summary, columns=['region', 'revenue_m', 'growth_rate', 'penetration']).set_index('region')
+
+    def top_growth(self, k=10, regions=None):
+        """Countries with the highest growth rate, merging the per-region indexes"""
+        merged = heapq.merge(*(self.growth_index[region] for region in self._selected_regions(regions)))
+        top = [self.countries[country] for _, country in islice(merged, k)]
+        return pd.DataFrame(top, columns=COUNTRY_COLUMNS)
+
+    def _selected_regions(self, regions):
+        if not regions:
+            return sorted(self.region_totals)
+        return [region for region in regions if region in self.region_totals]
+
+    def _add(self, record):
+        region = record['region']
+        self.countries[record['country']] = record
+        totals = self.region_totals.setdefault(
+            region, {'revenue_m': 0.0, 'growth_rate': 0.0, 'penetration': 0.0, 'count': 0}
+        )
+        totals['revenue_m'] += record['revenue_m']
+        totals['growth_rate'] += record['growth_rate']
+        totals['penetration'] += record['penetration']
+        totals['count'] += 1
+        self.growth_index.setdefault(region, []).append((-record['growth_rate'], record['country']))
+
+
+def get_geo_aggregates(data_generator):
+    """Return the geographic aggregates for a data generator, built once per data version"""
+    return _aggregates.get_or_compute(
+        data_generator.data_version,
+        'geographic_data',
+        lambda: GeoAggregates(data_generator.geographic_data)
+    )
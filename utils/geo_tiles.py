@@ -0,0 +1,118 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+from utils.cache import VersionedCache
+
+MAX_ZOOM = 8
+# Auto level of detail aims for roughly this many tiles across the view
+TARGET_TILES_ACROSS = 8
+
+# Named map views as ((lat_min, lat_max), (lon_min, lon_max))
+MAP_VIEWS = {
+    'World': ((-90, 90), (-180, 180)),
+    'Americas': ((-60, 75), (-170, -30)),
+    'Europe & Africa': ((-40, 72), (-25, 60)),
+    'Asia-Pacific': ((-50, 60), (60, 180))
+}
+
+_tile_indexes = VersionedCache("geo_tiles", max_entries=8)
+
+
+def tile_coordinates(lat, lon, zoom):
+    """Map lat/lon arrays to (x, y) cells of an equirectangular 2^zoom grid"""
+    n = 1 << zoom
+    x = np.clip(((np.asarray(lon) + 180.0) / 360.0 * n).astype(np.int64), 0, n - 1)
+    y = np.clip(((90.0 - np.asarray(lat)) / 180.0 * n).astype(np.int64), 0, n - 1)
+    return x, y
+
+
+def quadkey(x, y, zoom):
+    """Return the quadkey string of a tile, one base-4 digit per zoom level"""
+    digits = []
+    for level in range(zoom, 0, -1):
+        mask = 1 << (level - 1)
+        digits.append(str((1 if x & mask else 0) + (2 if y & mask else 0)))
+    return ''.join(digits)
+
+
+def zoom_for_view(lon_range, max_zoom=MAX_ZOOM):
+    """Pick the zoom level whose tiles give about TARGET_TILES_ACROSS across the view"""
+    span = max(lon_range[1] - lon_range[0], 1e-6)
+    return int(np.clip(round(math.log2(360.0 * TARGET_TILES_ACROSS / span)), 0, max_zoom))
+
+
+class GeoTileIndex:
+    """Revenue, growth and penetration pre-aggregated into grid tiles per zoom level"""
+
+    def __init__(self, geographic_data, max_zoom=MAX_ZOOM):
+        self.max_zoom = max_zoom
+        lat = geographic_data['lat'].to_numpy(dtype=np.float64)
+        lon = geographic_data['lon'].to_numpy(dtype=np.float64)
+        revenue = geographic_data['revenue_m'].to_numpy(dtype=np.float64)
+
+        points = pd.DataFrame({
+            'revenue_m': revenue,
+            # Revenue-weighted sums so tile means and centroids follow where revenue is
+            'growth_x_revenue': geographic_data['growth_rate'].to_numpy(dtype=np.float64) * revenue,
+            'penetration_x_revenue': geographic_data['penetration'].to_numpy(dtype=np.float64) * revenue,
+            'lat_x_revenue': lat * revenue,
+            'lon_x_revenue': lon * revenue,
+            'region': geographic_data['region'].astype(str).to_numpy(),
+            'country': geographic_data['country'].astype(str).to_numpy()
+        })
+
+        self.levels = {}
+        for zoom in range(max_zoom + 1):
+            x, y = tile_coordinates(lat, lon, zoom)
+            self.levels[zoom] = self._aggregate(points.assign(x=x, y=y), zoom)
+
+    def _aggregate(self, points, zoom):
+        grouped = points.groupby(['x', 'y'], sort=True)
+        tiles = grouped.agg(
+            revenue_m=('revenue_m', 'sum'),
+            growth_x_revenue=('growth_x_revenue', 'sum'),
+            penetration_x_revenue=('penetration_x_revenue', 'sum'),
+            lat_x_revenue=('lat_x_revenue', 'sum'),
+            lon_x_revenue=('lon_x_revenue', 'sum'),
+            countries=('country', 'size')
+        )
+        weight = tiles['revenue_m'].where(tiles['revenue_m'] != 0, 1.0)
+        tiles['growth_rate'] = tiles.pop('growth_x_revenue') / weight
+        tiles['penetration'] = tiles.pop('penetration_x_revenue') / weight
+        tiles['lat'] = tiles.pop('lat_x_revenue') / weight
+        tiles['lon'] = tiles.pop('lon_x_revenue') / weight
+
+        # Label each tile with its largest-revenue country and region
+        leaders = points.sort_values('revenue_m').drop_duplicates(['x', 'y'], keep='last').set_index(['x', 'y'])
+        tiles['region'] = leaders['region']
+        tiles['top_country'] = leaders['country']
+        tiles = tiles.reset_index()
+        tiles['tile'] = [quadkey(x, y, zoom) for x, y in zip(tiles['x'], tiles['y'])]
+        tiles['label'] = np.where(
+            tiles['countries'] > 1,
+            tiles['top_country'] + ' +' + (tiles['countries'] - 1).astype(str) + ' more',
+            tiles['top_country']
+        )
+        return tiles
+
+    def tiles_for_view(self, lat_range, lon_range, zoom=None):
+        """Return the tiles intersecting a view, at the given or automatic zoom"""
+        zoom = zoom_for_view(lon_range, self.max_zoom) if zoom is None else min(zoom, self.max_zoom)
+        tiles = self.levels[zoom]
+        x_min, y_max = tile_coordinates(lat_range[0], lon_range[0], zoom)
+        x_max, y_min = tile_coordinates(lat_range[1], lon_range[1], zoom)
+        x = tiles['x'].to_numpy()
+        y = tiles['y'].to_numpy()
+        in_view = (x >= x_min) & (x <= x_max) & (y >= y_min) & (y <= y_max)
+        return tiles[in_view].reset_index(drop=True)
+
+
+def get_geo_tiles(data_generator):
+    """Return the tile index for a data generator, built once per data version"""
+    return _tile_indexes.get_or_compute(
+        data_generator.data_version,
+        'geographic_data',
+        lambda: GeoTileIndex(data_generator.geographic_data)
+    )
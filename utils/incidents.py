@@ -0,0 +1,155 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from utils.cache import VersionedCache
+
+INCIDENT_TYPES = ['Fraud Attempt', 'System Outage', 'Data Breach', 'Compliance Violation', 'Operational Error']
+SEVERITIES = ['Critical', 'High', 'Medium', 'Low']
+INCIDENT_REGIONS = ['North America', 'Europe', 'Asia-Pacific', 'Latin America', 'Middle East & Africa']
+
+# Categorical cube dimensions in key order; the day offset is the outermost dimension
+CUBE_DIMENSIONS = {
+    'incident_type': INCIDENT_TYPES,
+    'severity': SEVERITIES,
+    'region': INCIDENT_REGIONS
+}
+
+_cubes = VersionedCache("incident_cubes", max_entries=8)
+
+
+class IncidentCube:
+    """Sparse incident counts over type x severity x region x day, updated on ingest"""
+
+    def __init__(self, origin, dimensions=None):
+        self.origin = np.datetime64(pd.Timestamp(origin).date(), 'D')
+        self.dimensions = dict(CUBE_DIMENSIONS if dimensions is None else dimensions)
+        self.names = list(self.dimensions)
+        self.shape = tuple(len(labels) for labels in self.dimensions.values())
+        self.cells_per_day = int(np.prod(self.shape))
+        self._codes = {
+            name: {label: code for code, label in enumerate(labels)}
+            for name, labels in self.dimensions.items()
+        }
+        self._lock = threading.Lock()
+
+        # Non-zero cells as sorted flat keys with their counts
+        self._keys = np.array([], dtype=np.int64)
+        self._counts = np.array([], dtype=np.int64)
+        self._coordinates = None
+        # Ingested keys not yet merged into the sorted cells
+        self._pending_keys = []
+        self._pending_counts = []
+        self.events_ingested = 0
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def ingest(self, events, count_column=None):
+        """Add a frame of incident events with a date column and one column per dimension"""
+        days = (pd.to_datetime(events['date']).to_numpy(dtype='datetime64[D]') - self.origin).astype(np.int64)
+        if len(days) and days.min() < 0:
+            raise ValueError("Incident dates must not precede the cube origin")
+        keys = days * self.cells_per_day
+        stride = self.cells_per_day
+        for name, size in zip(self.names, self.shape):
+            stride //= size
+            codes = events[name].astype(str).map(self._codes[name])
+            if codes.isna().any():
+                unknown = sorted(set(events[name].astype(str)[codes.isna()]))
+                raise ValueError(f"Unknown {name} values: {unknown}")
+            keys = keys + codes.to_numpy(dtype=np.int64) * stride
+        counts = np.ones(len(keys), dtype=np.int64) if count_column is None else events[count_column].to_numpy(dtype=np.int64)
+
+        # Pre-aggregate the batch so the pending buffer holds one entry per touched cell
+        unique_keys, inverse = np.unique(keys, return_inverse=True)
+        with self._lock:
+            self._pending_keys.append(unique_keys)
+            self._pending_counts.append(np.bincount(inverse, weights=counts).astype(np.int64))
+            self.events_ingested += int(counts.sum())
+
+    def add(self, date, count=1, **labels):
+        """Add a single incident, e.g. add(date, incident_type=..., severity=..., region=...)"""
+        event = pd.DataFrame({'date': [date], 'count': [count], **{name: [labels[name]] for name in self.names}})
+        self.ingest(event, count_column='count')
+
+    @property
+    def nnz(self):
+        """Number of non-zero cells"""
+        return len(self._cells()[0])
+
+    def slice(self, rows, columns, start=None, end=None, **selections):
+        """Counts summed into a rows x columns table, restricted to a date window and dimension values"""
+        counts = self.totals([rows, columns], start, end, **selections)
+        return pd.DataFrame(counts, index=self.dimensions[rows], columns=self.dimensions[columns])
+
+    def totals(self, dimensions, start=None, end=None, **selections):
+        """Dense array of counts over the given dimensions for the matching cells"""
+        keys, counts, coordinates = self._cells()
+        mask = np.ones(len(keys), dtype=bool)
+        if start is not None:
+            mask &= coordinates['day'] >= self._day(start)
+        if end is not None:
+            mask &= coordinates['day'] <= self._day(end)
+        for name, values in selections.items():
+            if values:
+                codes = [self._codes[name][value] for value in values if value in self._codes[name]]
+                mask &= np.isin(coordinates[name], codes)
+
+        shape = tuple(len(self.dimensions[name]) for name in dimensions)
+        result = np.zeros(shape, dtype=np.int64)
+        np.add.at(result, tuple(coordinates[name][mask] for name in dimensions), counts[mask])
+        return result
+
+    def daily(self, start=None, end=None, **selections):
+        """Incident counts per day over a date window"""
+        keys, counts, coordinates = self._cells()
+        mask = np.ones(len(keys), dtype=bool)
+        for name, values in selections.items():
+            if values:
+                mask &= np.isin(coordinates[name], [self._codes[name][v] for v in values if v in self._codes[name]])
+        days = coordinates['day'][mask]
+        first = self._day(start) if start is not None else 0
+        last = self._day(end) if end is not None else (int(days.max()) if len(days) else 0)
+        in_window = (days >= first) & (days <= last)
+        per_day = np.bincount(days[in_window] - first, weights=counts[mask][in_window], minlength=last - first + 1)
+        index = pd.date_range(pd.Timestamp(self.origin + first), periods=len(per_day), freq='D')
+        return pd.Series(per_day.astype(np.int64), index=index, name='incidents')
+
+    def _day(self, date):
+        return int((np.datetime64(pd.Timestamp(date).date(), 'D') - self.origin).astype(np.int64))
+
+    def _cells(self):
+        """Merge pending ingests into the sorted cell arrays and decode coordinates"""
+        with self._lock:
+            if self._pending_keys:
+                keys = np.concatenate([self._keys] + self._pending_keys)
+                counts = np.concatenate([self._counts] + self._pending_counts)
+                self._keys, inverse = np.unique(keys, return_inverse=True)
+                self._counts = np.bincount(inverse, weights=counts).astype(np.int64)
+                self._pending_keys, self._pending_counts = [], []
+                self._coordinates = None
+            if self._coordinates is None:
+                coordinates = {'day': self._keys // self.cells_per_day}
+                within_day = np.unravel_index(self._keys % self.cells_per_day, self.shape)
+                coordinates.update(zip(self.names, within_day))
+                self._coordinates = coordinates
+            return self._keys, self._counts, self._coordinates
+
+
+def get_incident_cube(data_generator):
+    """Return the incident cube for a data generator, built once per data version"""
+    def build():
+        log = data_generator.incident_data
+        cube = IncidentCube(log['date'].min())
+        cube.ingest(log)
+        return cube
+
+    return _cubes.get_or_compute(data_generator.data_version, 'incident_data', build)
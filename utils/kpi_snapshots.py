@@ -0,0 +1,144 @@
+"""Batch KPI snapshots for every region x segment filter combination.
+
+All combinations are evaluated in one grouped pass over revenue_data: the
+data is reduced to a quarter x region x segment cube once, and every
+combination of regions and segments is then a pair of 0/1 indicator
+matrices applied to that cube.
+
+    python -m utils.kpi_snapshots --output kpi_snapshots.csv
+"""
+import argparse
+from itertools import product
+
+import numpy as np
+import pandas as pd
+
+from utils.cache import VersionedCache
+
+REGIONS = ['North America', 'Europe', 'Asia-Pacific', 'Latin America', 'Middle East & Africa']
+SEGMENTS = ['Travel', 'E-commerce', 'B2B', 'Remittances']
+QUARTERS_PER_YEAR = 4
+
+# Additive measures per cube cell; means are kept as sum and count
+CUBE_MEASURES = ['revenue_b', 'transactions_m', 'volume_growth_sum', 'yield_sum', 'rows']
+
+_snapshots = VersionedCache("kpi_snapshot_tables", max_entries=8)
+
+
+def subset_indicators(n):
+    """0/1 matrix with one row per non-empty subset of n members; row i is bitmask i + 1"""
+    masks = np.arange(1, 1 << n)
+    return ((masks[:, None] >> np.arange(n)) & 1).astype(np.float64)
+
+
+def members_mask(selected, members):
+    """Bitmask of the selected members; no selection means all members"""
+    if not selected:
+        return (1 << len(members)) - 1
+    return sum(1 << members.index(value) for value in selected if value in members)
+
+
+def revenue_cube(revenue_data, regions=REGIONS, segments=SEGMENTS):
+    """Quarter x region x segment x measure array from one grouped pass, plus the quarter labels"""
+    grouped = revenue_data.groupby(['quarter', 'region', 'segment'], observed=True).agg(
+        revenue_b=('revenue_b', 'sum'),
+        transactions_m=('transactions_m', 'sum'),
+        volume_growth_sum=('volume_growth_pct', 'sum'),
+        yield_sum=('yield_pct', 'sum'),
+        rows=('revenue_b', 'size')
+    )
+    quarters = sorted(grouped.index.get_level_values('quarter').unique())
+    full_index = pd.MultiIndex.from_tuples(list(product(quarters, regions, segments)),
+                                           names=['quarter', 'region', 'segment'])
+    values = grouped.reindex(full_index, fill_value=0)[CUBE_MEASURES].to_numpy(dtype=np.float64)
+    return values.reshape(len(quarters), len(regions), len(segments), len(CUBE_MEASURES)), [str(q) for q in quarters]
+
+
+def build_kpi_snapshots(revenue_data, regions=REGIONS, segments=SEGMENTS):
+    """Executive KPIs for every non-empty region set x segment set, as one compact table"""
+    cube, quarters = revenue_cube(revenue_data, regions, segments)
+    region_sets = subset_indicators(len(regions))
+    segment_sets = subset_indicators(len(segments))
+
+    # (quarter, region set, segment set, measure) totals in a single contraction
+    totals = np.einsum('ar,qrsm,bs->qabm', region_sets, cube, segment_sets, optimize=True)
+    latest = totals[-1]
+    rows = np.maximum(latest[..., 4], 1)
+
+    revenue = totals[..., 0]
+    if len(quarters) >= 2 * QUARTERS_PER_YEAR:
+        trailing = revenue[-4:].sum(axis=0)
+        previous = revenue[-8:-4].sum(axis=0)
+        growth = np.divide(trailing, previous, out=np.full_like(trailing, np.nan), where=previous > 0) - 1
+    else:
+        growth = np.full(revenue.shape[1:], np.nan)
+
+    region_masks, segment_masks = np.meshgrid(
+        np.arange(1, 1 << len(regions)), np.arange(1, 1 << len(segments)), indexing='ij'
+    )
+    return pd.DataFrame({
+        'region_mask': region_masks.ravel().astype(np.uint8),
+        'segment_mask': segment_masks.ravel().astype(np.uint8),
+        'as_of': quarters[-1],
+        'revenue_b': latest[..., 0].ravel().astype(np.float32),
+        'revenue_growth_pct': (growth * 100).ravel().astype(np.float32),
+        'transactions_m': latest[..., 1].ravel().astype(np.float32),
+        'volume_growth_pct': (latest[..., 2] / rows).ravel().astype(np.float32),
+        'yield_pct': (latest[..., 3] / rows).ravel().astype(np.float32)
+    })
+
+
+class KPISnapshotTable:
+    """Precomputed executive KPIs looked up by the region and segment filters"""
+
+    def __init__(self, table, regions=REGIONS, segments=SEGMENTS):
+        self.regions = list(regions)
+        self.segments = list(segments)
+        self.table = table.set_index(['region_mask', 'segment_mask']).sort_index()
+
+    def lookup(self, filters):
+        """KPI row for the filters' regions and segments, or None if the selection is empty"""
+        key = (members_mask(filters.get('regions'), self.regions), members_mask(filters.get('segments'), self.segments))
+        if 0 in key:
+            return None
+        return self.table.loc[key].to_dict()
+
+    def describe(self, region_mask, segment_mask):
+        """Region and segment names encoded by a pair of masks"""
+        regions = [region for i, region in enumerate(self.regions) if region_mask >> i & 1]
+        segments = [segment for i, segment in enumerate(self.segments) if segment_mask >> i & 1]
+        return regions, segments
+
+    def to_frame(self):
+        """Snapshot table with readable region and segment lists"""
+        table = self.table.reset_index()
+        names = [self.describe(r, s) for r, s in zip(table['region_mask'], table['segment_mask'])]
+        table.insert(2, 'regions', [', '.join(regions) for regions, _ in names])
+        table.insert(3, 'segments', [', '.join(segments) for _, segments in names])
+        return table
+
+
+def get_kpi_snapshots(data_generator):
+    """Return the KPI snapshot table for a data generator, built once per data version"""
+    return _snapshots.get_or_compute(
+        data_generator.data_version,
+        'region_segment',
+        lambda: KPISnapshotTable(build_kpi_snapshots(data_generator.revenue_data))
+    )
+
+
+def main():
+    from data_generator import DataGenerator
+
+    parser = argparse.ArgumentParser(description="Write KPI snapshots for every region x segment combination")
+    parser.add_argument("--output", default="kpi_snapshots.csv", help="CSV file to write")
+    args = parser.parse_args()
+
+    snapshots = get_kpi_snapshots(DataGenerator())
+    frame = snapshots.to_frame()
+    frame.to_csv(args.output, index=False)
+    print(f"Wrote {len(frame)} snapshots as of {frame['as_of'].iloc[0]} to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+import numpy as np
+import pandas as pd
+
+from utils.cache import VersionedCache
+from utils.trajectory import cagr
+
+# Status of a KPI against its target
+STATUS_LABELS = {
+    'above': '✅ Above Target',
+    'near': '⚠️ Below Target',
+    'below': '🚨 Below Target',
+    'info': '📈 Target'
+}
+
+# revenue_data holds annualized run-rate revenue per quarter
+QUARTERS_PER_YEAR = 4
+
+_snapshots = VersionedCache("kpi_snapshots", max_entries=8)
+
+
+class KPI:
+    """Declarative KPI: where its value comes from, its target and how status is judged"""
+
+    def __init__(self, key, label, source, compute, fmt, target=None, direction='higher',
+                 warning_ratio=0.9, change='points', origin='Internal'):
+        self.key = key
+        self.label = label
+        # Name of the aggregate the value is computed from
+        self.source = source
+        self.compute = compute
+        self.fmt = fmt
+        # A number, or a callable of the aggregates for targets that come from planning inputs
+        self.target = target
+        self.direction = direction
+        # Within this fraction of the target counts as 'near' rather than 'below'
+        self.warning_ratio = warning_ratio
+        # YoY change as a point difference ('points') or a relative change ('relative')
+        self.change = change
+        self.origin = origin
+
+    def status(self, value, target):
+        if target is None or value is None or np.isnan(value):
+            return 'info'
+        if self.direction == 'higher':
+            if value >= target:
+                return 'above'
+            return 'near' if value >= target * self.warning_ratio else 'below'
+        if value <= target:
+            return 'above'
+        return 'near' if value <= target / self.warning_ratio else 'below'
+
+    def format_change(self, value, prior):
+        if prior is None or np.isnan(prior) or value is None or np.isnan(value):
+            return '–'
+        if self.change == 'relative':
+            return f"{(value / prior - 1) * 100:+.1f}%" if prior else '–'
+        return f"{value - prior:+.2f} pts" if abs(value - prior) < 0.1 else f"{value - prior:+.1f} pts"
+
+
+def trailing_growth(quarters):
+    """Growth of the last four quarters of revenue over the four before, in percent"""
+    revenue = quarters['revenue_b'].to_numpy(dtype=np.float64)
+    if len(revenue) < 2 * QUARTERS_PER_YEAR:
+        return float('nan')
+    return (revenue[-4:].sum() / revenue[-8:-4].sum() - 1) * 100
+
+
+def annualized_growth(quarters):
+    """Compound annual growth between the first and last four quarters, in percent"""
+    revenue = quarters['revenue_b'].to_numpy(dtype=np.float64)
+    if len(revenue) < 2 * QUARTERS_PER_YEAR:
+        return float('nan')
+    years = (len(revenue) - QUARTERS_PER_YEAR) / QUARTERS_PER_YEAR
+    return float(cagr(revenue[:4].sum(), revenue[-4:].sum(), years))
+
+
+def fiscal_ytd_revenue(quarters):
+    """Revenue booked in the current fiscal year so far, in billions"""
+    fiscal_years = quarters['quarter'].astype(str).str[:6]
+    in_year = fiscal_years == fiscal_years.iloc[-1]
+    return float(quarters.loc[in_year, 'revenue_b'].sum()) / QUARTERS_PER_YEAR
+
+
+def _latest(column, scale=1.0):
+    return lambda quarters: float(quarters[column].iloc[-1]) * scale
+
+
+def _input(name):
+    return lambda inputs: inputs[name]
+
+
+KPI_REGISTRY = [
+    KPI('current_revenue', 'Current Revenue', 'quarters', _latest('revenue_b', 1 / QUARTERS_PER_YEAR),
+        '${:.1f}B', target=4.0, change='relative'),
+    KPI('run_rate_revenue', 'Revenue Run Rate', 'quarters', _latest('revenue_b'), '${:.1f}B', change='relative'),
+    KPI('achieved_cagr', 'Achieved CAGR', 'quarters', annualized_growth, '{:.1f}%',
+        target=lambda aggregates: aggregates['inputs']['target_cagr']),
+    KPI('revenue_growth', 'Revenue Growth Rate', 'quarters', trailing_growth, '{:.1f}%', target=12.0),
+    KPI('volume_growth', 'Volume Growth Rate', 'quarters', _latest('volume_growth_pct'), '{:.1f}%', target=15.0),
+    KPI('revenue_yield', 'Revenue Yield', 'quarters', _latest('yield_pct'), '{:.2f}%', target=0.15),
+    KPI('ytd_revenue', 'YTD Revenue', 'quarters', fiscal_ytd_revenue, '${:.1f}B', change='relative'),
+    KPI('market_share', 'Market Share', 'inputs', _input('market_share'), '{:.1f}%', target=25.0,
+        origin='Industry'),
+    KPI('customer_acquisition', 'Customer Acquisition', 'inputs', _input('customer_acquisition_k'),
+        '{:.1f}K/month', target=10.0, change='relative', origin='CRM'),
+    KPI('transaction_success_rate', 'Transaction Success Rate', 'inputs', _input('transaction_success_rate'),
+        '{:.1f}%', target=99.5, warning_ratio=0.995),
+    KPI('cross_border_penetration', 'Cross-Border Penetration', 'geography',
+        lambda geography: float(np.average(geography['penetration'], weights=geography['revenue_m'])),
+        '{:.0f}%', target=35.0),
+    KPI('avg_transaction_value', 'Average Transaction Value', 'products',
+        lambda products: float(np.average(products['avg_transaction_value'], weights=products['transactions_b'])),
+        '${:.0f}', target=150.0, change='relative'),
+    KPI('target_revenue_2030', 'Target Revenue 2030', 'inputs', _input('target_revenue_2030'), '${:.1f}B'),
+    KPI('base_revenue_2024', 'Base Revenue FY2024', 'inputs', _input('base_revenue_2024'), '${:.1f}B')
+]
+
+# KPIs shown in the Performance Tracking table and the summary export
+KPI_TABLE_KEYS = [
+    'volume_growth', 'revenue_growth', 'market_share', 'revenue_yield', 'customer_acquisition',
+    'transaction_success_rate', 'cross_border_penetration', 'avg_transaction_value'
+]
+SUMMARY_REPORT_KEYS = [
+    'current_revenue', 'achieved_cagr', 'volume_growth', 'market_share', 'revenue_yield',
+    'target_revenue_2030', 'ytd_revenue'
+]
+
+
+def kpi_aggregates(data_generator, prior=False):
+    """Source aggregates for every KPI, from one grouped pass over the revenue data"""
+    quarters = data_generator.get_revenue_rollup({}, ['quarter']).sort_values('quarter').reset_index(drop=True)
+    inputs = data_generator.kpi_inputs
+    if prior:
+        # The same aggregates as of one year earlier, for YoY changes
+        quarters = quarters.iloc[:-QUARTERS_PER_YEAR].reset_index(drop=True)
+        inputs = {**inputs, **inputs.get('prior', {})}
+    return {
+        'quarters': quarters,
+        'inputs': inputs,
+        # Geography and product snapshots have no history, so they have no prior values
+        'geography': None if prior else data_generator.geographic_data,
+        'products': None if prior else data_generator.product_data
+    }
+
+
+class KPISnapshot:
+    """Computed values, targets and statuses of every registered KPI for one data version"""
+
+    def __init__(self, aggregates, prior_aggregates=None, registry=None):
+        self.registry = {kpi.key: kpi for kpi in (KPI_REGISTRY if registry is None else registry)}
+        self.as_of = aggregates['quarters']['quarter'].iloc[-1]
+        rows = []
+        for kpi in self.registry.values():
+            value = self._evaluate(kpi, aggregates)
+            prior = self._evaluate(kpi, prior_aggregates) if prior_aggregates is not None else None
+            target = kpi.target(aggregates) if callable(kpi.target) else kpi.target
+            status = kpi.status(value, target)
+            rows.append({
+                'key': kpi.key,
+                'label': kpi.label,
+                'value': value,
+                'target': target,
+                'prior': prior,
+                'display': kpi.fmt.format(value) if not np.isnan(value) else '–',
+                'target_display': kpi.fmt.format(target) if target is not None else '–',
+                'yoy_change': kpi.format_change(value, prior),
+                'status': status,
+                'status_label': STATUS_LABELS[status],
+                'met': status == 'above',
+                'source': kpi.origin
+            })
+        self.frame = pd.DataFrame(rows).set_index('key')
+
+    def _evaluate(self, kpi, aggregates):
+        source = aggregates[kpi.source]
+        if source is None or (kpi.source == 'quarters' and len(source) == 0):
+            return float('nan')
+        value = kpi.compute(source)
+        return float('nan') if value is None else float(value)
+
+    def value(self, key):
+        return self.frame.at[key, 'value']
+
+    def target(self, key):
+        return self.frame.at[key, 'target']
+
+    def status(self, key):
+        return self.frame.at[key, 'status']
+
+    def prior(self, key):
+        return self.frame.at[key, 'prior']
+
+    def table(self, keys=None):
+        """Display table of KPIs with target, current value, YoY change, status and source"""
+        rows = self.frame.loc[keys if keys is not None else KPI_TABLE_KEYS]
+        return pd.DataFrame({
+            'KPI': rows['label'],
+            'Target': rows['target_display'],
+            'Current': rows['display'],
+            'YoY Change': rows['yoy_change'],
+            'Status': rows['status_label'],
+            'Source': rows['source']
+        }).reset_index(drop=True)
+
+    def share_met(self, keys=None):
+        """Fraction of KPIs with a target that are at or above it"""
+        rows = self.frame.loc[keys if keys is not None else KPI_TABLE_KEYS]
+        rows = rows[rows['status'] != 'info']
+        return float(rows['met'].mean()) if len(rows) else 0.0
+
+
+def get_kpis(data_generator):
+    """Return the KPI snapshot for a data generator, computed once per data version"""
+    return _snapshots.get_or_compute(
+        data_generator.data_version,
+        'kpis',
+        lambda: KPISnapshot(kpi_aggregates(data_generator), kpi_aggregates(data_generator, prior=True))
+    )
@@ -0,0 +1,301 @@
+"""Script-run load tester for the dashboard.
+
+Drives app.py through Streamlit's headless AppTest with many simulated
+sessions. Sessions are spread over worker processes; inside a worker they
+are interleaved step by step so that all of them stay alive at once, which
+is what quarter-end traffic looks like to a single server process.
+
+    python -m utils.load_test --sessions 40 --workers 4 --steps 10
+
+The risk alert engine can be load tested on its own with a synthetic
+stream of metric updates:
+
+    python -m utils.load_test --alert-events 1000000
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from utils.alerts import AlertEngine
+from utils.cache import get_cache_stats, reset_cache_stats
+from utils.memory import memory_accountant
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+PAGES = [
+    "📊 Executive Summary",
+    "📈 Performance Tracking",
+    "🎯 Opportunity Identification",
+    "⚠️ Risk & Compliance",
+    "🔮 Forecasting"
+]
+PERIODS = ["Last 4 Quarters", "YTD", "Last 12 Months"]
+SEGMENTS = ["Travel", "E-commerce", "B2B", "Remittances"]
+REGIONS = ["North America", "Europe", "Asia-Pacific", "Latin America", "Middle East & Africa"]
+CURRENCIES = ["USD", "EUR", "GBP", "JPY"]
+
+
+def build_session_script(rng, n_steps):
+    """Build a navigation and filter-change script for one simulated user"""
+    steps = []
+    for _ in range(n_steps):
+        roll = rng.random()
+        if roll < 0.55:
+            steps.append(("navigate", rng.choice(PAGES)))
+        elif roll < 0.65:
+            steps.append(("select", "Select Period", rng.choice(PERIODS)))
+        elif roll < 0.8:
+            steps.append(("multiselect", "Select Segments", rng.sample(SEGMENTS, rng.randint(1, len(SEGMENTS)))))
+        elif roll < 0.92:
+            steps.append(("multiselect", "Select Regions", rng.sample(REGIONS, rng.randint(1, len(REGIONS)))))
+        else:
+            steps.append(("select", "Display Currency", rng.choice(CURRENCIES)))
+    return steps
+
+
+def _find_widget(widgets, label):
+    for widget in widgets:
+        if widget.label == label:
+            return widget
+    return None
+
+
+class SimulatedSession:
+    """One dashboard user replaying a script against its own AppTest"""
+
+    def __init__(self, script, timeout):
+        from streamlit.testing.v1 import AppTest
+
+        self.app = AppTest.from_file(APP_PATH, default_timeout=timeout)
+        self.script = list(script)
+        self.filters_open = False
+        self.errors = 0
+
+    def start(self):
+        return self._timed_run()
+
+    def has_steps(self):
+        return bool(self.script)
+
+    def step(self):
+        """Apply the next scripted interaction and return its script-run latency"""
+        action = self.script.pop(0)
+
+        if action[0] == "navigate":
+            self.app.radio(key="navigation_radio").set_value(action[1])
+            return self._timed_run()
+
+        # Filter widgets only exist while the filters panel is open
+        if not self.filters_open:
+            self.app.button(key="filters_toggle").click()
+            self._timed_run()
+            self.filters_open = True
+
+        widgets = self.app.selectbox if action[0] == "select" else self.app.multiselect
+        widget = _find_widget(widgets, action[1])
+        if widget is None:
+            self.errors += 1
+            return None
+        widget.set_value(action[2])
+        return self._timed_run()
+
+    def _timed_run(self):
+        start = time.perf_counter()
+        self.app.run()
+        elapsed = time.perf_counter() - start
+        if len(self.app.exception):
+            self.errors += 1
+        return elapsed
+
+
+def run_worker(scripts, timeout):
+    """Run a batch of session scripts interleaved inside one process"""
+    from streamlit import logger as st_logger
+
+    st_logger.set_log_level("error")
+    reset_cache_stats()
+
+    sessions = [SimulatedSession(script, timeout) for script in scripts]
+    latencies = []
+    for session in sessions:
+        latencies.append(session.start())
+
+    active = [s for s in sessions if s.has_steps()]
+    while active:
+        for session in active:
+            latency = session.step()
+            if latency is not None:
+                latencies.append(latency)
+        active = [s for s in active if s.has_steps()]
+
+    return {
+        'pid': os.getpid(),
+        'sessions': len(sessions),
+        'latencies': latencies,
+        'errors': sum(s.errors for s in sessions),
+        # ru_maxrss is reported in kilobytes on Linux
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        'session_state_mb': memory_accountant.get_metrics()['session_state_bytes'] / (1024 * 1024),
+        'cache_stats': get_cache_stats()
+    }
+
+
+def run_load_test(n_sessions=20, n_workers=2, n_steps=8, seed=0, timeout=60):
+    """Run the load test and return an aggregated report"""
+    rng = random.Random(seed)
+    scripts = [build_session_script(rng, n_steps) for _ in range(n_sessions)]
+    batches = [scripts[i::n_workers] for i in range(n_workers)]
+    batches = [batch for batch in batches if batch]
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=len(batches)) as pool:
+        results = list(pool.map(run_worker, batches, [timeout] * len(batches)))
+    wall_time = time.perf_counter() - start
+
+    latencies = np.array([lat for result in results for lat in result['latencies']])
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) if len(latencies) else (0.0, 0.0, 0.0)
+
+    cache_totals = {}
+    for result in results:
+        for name, stats in result['cache_stats'].items():
+            totals = cache_totals.setdefault(name, {'hits': 0, 'misses': 0})
+            totals['hits'] += stats['hits']
+            totals['misses'] += stats['misses']
+    for totals in cache_totals.values():
+        lookups = totals['hits'] + totals['misses']
+        totals['hit_rate'] = totals['hits'] / lookups if lookups else 0.0
+
+    return {
+        'sessions': n_sessions,
+        'workers': len(batches),
+        'script_runs': int(len(latencies)),
+        'errors': sum(result['errors'] for result in results),
+        'wall_time_s': wall_time,
+        'runs_per_s': len(latencies) / wall_time if wall_time else 0.0,
+        'latency_ms': {'p50': p50 * 1000, 'p95': p95 * 1000, 'p99': p99 * 1000},
+        'peak_rss_mb': {str(result['pid']): result['peak_rss_mb'] for result in results},
+        'session_state_mb': {str(result['pid']): result['session_state_mb'] for result in results},
+        'cache_stats': cache_totals
+    }
+
+
+def build_alert_stream(n_events, n_scopes, seed=0):
+    """Build synthetic risk metric updates that drift around their alert thresholds"""
+    rng = np.random.RandomState(seed)
+    scopes = [f"Scope {i}" for i in range(n_scopes)]
+    levels = {
+        'fraud_rate': (0.45, 0.04),
+        'chargeback_ratio': (0.9, 0.08),
+        'compliance_score': (92.0, 1.5),
+        'uptime_pct': (99.95, 0.04)
+    }
+    columns = {
+        name: (mean + spread * rng.standard_normal(n_events)).tolist()
+        for name, (mean, spread) in levels.items()
+    }
+    scope_ids = rng.randint(0, n_scopes, n_events)
+    names = list(columns)
+    return [
+        (i, dict(zip(names, values)), scopes[scope_id])
+        for i, (scope_id, values) in enumerate(zip(scope_ids, zip(*columns.values())))
+    ]
+
+
+def run_alert_load_test(n_events=200000, n_scopes=50, batch_size=1000, seed=0):
+    """Push a synthetic update stream through the alert engine and report throughput"""
+    events = build_alert_stream(n_events, n_scopes, seed)
+    engine = AlertEngine()
+    batch_latencies = []
+    transitions = 0
+
+    start = time.perf_counter()
+    for i in range(0, n_events, batch_size):
+        batch_start = time.perf_counter()
+        transitions += len(engine.process_many(events[i:i + batch_size]))
+        batch_latencies.append(time.perf_counter() - batch_start)
+    wall_time = time.perf_counter() - start
+
+    p50, p99 = np.percentile(batch_latencies, [50, 99]) if batch_latencies else (0.0, 0.0)
+    return {
+        'events': n_events,
+        'scopes': n_scopes,
+        'wall_time_s': wall_time,
+        'events_per_s': n_events / wall_time if wall_time else 0.0,
+        'batch_size': batch_size,
+        'batch_latency_ms': {'p50': p50 * 1000, 'p99': p99 * 1000},
+        'transitions': transitions,
+        'suppressed': engine.suppressed,
+        'active_alerts': len(engine.active),
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    }
+
+
+def format_alert_report(report):
+    """Render an alert engine load test report as plain text"""
+    return "\n".join([
+        f"Alert events: {report['events']} across {report['scopes']} scopes in {report['wall_time_s']:.2f}s "
+        f"({report['events_per_s']:,.0f}/s)",
+        "Batch latency ({batch_size} events): p50 {p50:.2f} ms | p99 {p99:.2f} ms".format(
+            batch_size=report['batch_size'], **report['batch_latency_ms']
+        ),
+        f"Transitions: {report['transitions']}, duplicates suppressed: {report['suppressed']}, "
+        f"still active: {report['active_alerts']}",
+        f"Peak RSS: {report['peak_rss_mb']:.0f} MB"
+    ])
+
+
+def format_report(report):
+    """Render a load test report as plain text"""
+    lines = [
+        f"Sessions: {report['sessions']} across {report['workers']} workers",
+        f"Script runs: {report['script_runs']} in {report['wall_time_s']:.1f}s "
+        f"({report['runs_per_s']:.1f}/s), errors: {report['errors']}",
+        "Script-run latency: p50 {p50:.0f} ms | p95 {p95:.0f} ms | p99 {p99:.0f} ms".format(**report['latency_ms']),
+        "Peak RSS per worker:"
+    ]
+    for pid, rss in report['peak_rss_mb'].items():
+        session_mb = report['session_state_mb'].get(pid, 0.0)
+        lines.append(f"  worker {pid}: {rss:.0f} MB (session state {session_mb:.2f} MB)")
+
+    lines.append("Cache hit rates:")
+    if report['cache_stats']:
+        for name, stats in sorted(report['cache_stats'].items()):
+            lines.append(f"  {name}: {stats['hit_rate']:.1%} ({stats['hits']} hits / {stats['misses']} misses)")
+    else:
+        lines.append("  no caches registered")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the dashboard with simulated sessions")
+    parser.add_argument("--sessions", type=int, default=20, help="Number of simulated sessions")
+    parser.add_argument("--workers", type=int, default=2, help="Number of worker processes")
+    parser.add_argument("--steps", type=int, default=8, help="Interactions per session")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the session scripts")
+    parser.add_argument("--timeout", type=float, default=60, help="Per script-run timeout (s)")
+    parser.add_argument("--json", help="Also write the report to this JSON file")
+    parser.add_argument("--alert-events", type=int, default=0,
+                        help="Load test the risk alert engine with this many updates instead of the app")
+    parser.add_argument("--alert-scopes", type=int, default=50, help="Distinct scopes in the alert stream")
+    args = parser.parse_args()
+
+    if args.alert_events:
+        report = run_alert_load_test(args.alert_events, args.alert_scopes, seed=args.seed)
+        print(format_alert_report(report))
+    else:
+        report = run_load_test(args.sessions, args.workers, args.steps, args.seed, args.timeout)
+        print(format_report(report))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+import logging
+import os
+import pickle
+import resource
+import sys
+import tempfile
+import threading
+import time
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from utils.cache import evict_stale_versions
+from utils.chat import compact_history
+
+logger = logging.getLogger("visa_dashboard.memory")
+
+# Session-state entries written to disk and reloaded on the session's next run,
+# when the session is over budget or idle
+SPILLABLE_KEYS = ['data_generator', 'chat_messages']
+# Session-state entries the app rebuilds when missing, dropped when over budget
+EVICTABLE_KEYS = ['global_filters', 'chat_window']
+# Number of consecutive growing runs before a session is reported as leaking
+LEAK_WINDOW = 8
+
+
+def deep_sizeof(obj, seen=None):
+    """Estimate the memory footprint of an object graph in bytes"""
+    if seen is None:
+        seen = set()
+
+    obj_id = id(obj)
+    if obj_id in seen:
+        return 0
+    seen.add(obj_id)
+
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(deep=True).sum())
+    if isinstance(obj, (pd.Series, pd.Index)):
+        return int(obj.memory_usage(deep=True))
+    if isinstance(obj, np.ndarray):
+        return int(obj.nbytes)
+
+    size = sys.getsizeof(obj, 0)
+    if isinstance(obj, (str, bytes, int, float, bool, type(None))):
+        return size
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset, deque)):
+        size += sum(deep_sizeof(item, seen) for item in obj)
+    if hasattr(obj, '__dict__'):
+        size += deep_sizeof(vars(obj), seen)
+    return size
+
+
+def current_rss_bytes():
+    """Return the resident set size of this process"""
+    try:
+        with open('/proc/self/statm') as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        # ru_maxrss is a peak rather than current value, in kilobytes on Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class MemoryAccountant:
+    """Measure session-state memory and enforce per-session budgets"""
+
+    def __init__(self, session_budget_mb=256, max_chat_messages=50, spill_dir=None, idle_spill_s=600):
+        self.session_budget_bytes = int(session_budget_mb * 1024 * 1024)
+        self.max_chat_messages = max_chat_messages
+        self.idle_spill_s = idle_spill_s
+        self.spill_dir = spill_dir or os.path.join(tempfile.gettempdir(), "visa_dashboard_spill")
+        self._lock = threading.Lock()
+        self._sessions = {}
+        self._counters = {
+            'spills': 0, 'restores': 0, 'evictions': 0, 'summarized_messages': 0, 'leak_warnings': 0,
+            'cache_evictions': 0
+        }
+
+    @classmethod
+    def from_env(cls):
+        """Create an accountant configured from environment variables"""
+        return cls(
+            session_budget_mb=float(os.environ.get("SESSION_MEMORY_BUDGET_MB", 256)),
+            max_chat_messages=int(os.environ.get("CHAT_HISTORY_LIMIT", 50)),
+            spill_dir=os.environ.get("SESSION_SPILL_DIR"),
+            idle_spill_s=float(os.environ.get("SESSION_IDLE_SPILL_S", 600))
+        )
+
+    def measure(self, session_state):
+        """Return the deep size in bytes of every session-state entry"""
+        sizes = {}
+        for key in list(session_state.keys()):
+            try:
+                sizes[key] = deep_sizeof(session_state[key])
+            except Exception:
+                # Widget state can disappear between keys() and lookup
+                continue
+        return sizes
+
+    def restore(self, session_state):
+        """Reload spilled entries so the current script run can use them"""
+        spilled = session_state.get('_spilled_entries', {})
+        for key, path in list(spilled.items()):
+            if key not in session_state:
+                try:
+                    with open(path, 'rb') as f:
+                        session_state[key] = pickle.load(f)
+                    with self._lock:
+                        self._counters['restores'] += 1
+                except (OSError, pickle.UnpicklingError):
+                    logger.warning("Could not restore spilled session entry %s", key)
+            self._remove_spill_file(path)
+            del spilled[key]
+
+    def enforce(self, session_state, session_id="default", state_handle=None, is_session_active=None):
+        """Apply budgets after a script run and record the session's memory metrics
+
+        A session over budget spills or evicts its own largest entries until it
+        fits. Independently, sessions idle for idle_spill_s are spilled to disk
+        and results cached for data versions no session holds are evicted.
+        state_handle is a session-state object that stays valid outside the
+        script run, and is_session_active reports whether a session id is still
+        connected.
+        """
+        self._compact_chat_history(session_state)
+
+        sizes = self.measure(session_state)
+        total = sum(sizes.values())
+        data_version = getattr(session_state.get('data_generator'), 'data_version', None)
+        spill_paths = []
+        if total > self.session_budget_bytes:
+            total = self._shrink_session(session_state, session_id, sizes, total, spill_paths)
+        self._record(session_id, sizes, total, state_handle, data_version, spill_paths)
+
+        if is_session_active is not None:
+            self.prune_sessions(is_session_active)
+        self._evict_stale_caches()
+        self._spill_idle_sessions(session_id)
+        return sizes
+
+    def get_metrics(self):
+        """Return per-session and per-process memory metrics"""
+        with self._lock:
+            sessions = {
+                session_id: {
+                    'total_bytes': info['history'][-1] if info['history'] else 0,
+                    'largest_entry': info['largest_entry'],
+                    'growing_runs': info['growing_runs'],
+                    'spilled': bool(info['spill_paths'])
+                }
+                for session_id, info in self._sessions.items()
+            }
+            counters = dict(self._counters)
+
+        return {
+            'process_rss_bytes': current_rss_bytes(),
+            'session_state_bytes': sum(s['total_bytes'] for s in sessions.values()),
+            'sessions': sessions,
+            **counters
+        }
+
+    def prune_sessions(self, is_session_active):
+        """Forget sessions that are no longer connected, removing any files they spilled"""
+        with self._lock:
+            closed = [session_id for session_id in self._sessions if not is_session_active(session_id)]
+            dropped = [self._sessions.pop(session_id) for session_id in closed]
+        for info in dropped:
+            for path in info['spill_paths']:
+                self._remove_spill_file(path)
+        return len(closed)
+
+    def _shrink_session(self, session_state, session_id, sizes, total, spill_paths):
+        """Spill or evict the session's largest entries until it fits its budget, returning the new total"""
+        candidates = sorted(
+            (key for key in SPILLABLE_KEYS + EVICTABLE_KEYS if key in sizes),
+            key=lambda k: sizes[k],
+            reverse=True
+        )
+        for key in candidates:
+            if total <= self.session_budget_bytes:
+                break
+            if key in SPILLABLE_KEYS:
+                path = self._spill(session_state, key, session_id)
+                if path is None:
+                    continue
+                spill_paths.append(path)
+            else:
+                del session_state[key]
+                with self._lock:
+                    self._counters['evictions'] += 1
+            total -= sizes[key]
+        if total > self.session_budget_bytes:
+            logger.warning("Session %s is still %d bytes over budget after spilling and eviction",
+                           session_id, total - self.session_budget_bytes)
+        return total
+
+    def _evict_stale_caches(self):
+        with self._lock:
+            live_versions = {info['data_version'] for info in self._sessions.values()}
+        evicted = evict_stale_versions(live_versions - {None})
+        if evicted:
+            with self._lock:
+                self._counters['cache_evictions'] += evicted
+            logger.info("Evicted %d cached results for data versions no session holds", evicted)
+
+    def _spill_idle_sessions(self, current_session_id):
+        now = time.monotonic()
+        with self._lock:
+            idle = [
+                (session_id, info) for session_id, info in self._sessions.items()
+                if session_id != current_session_id and info['state_handle'] is not None
+                and now - info['last_seen'] > self.idle_spill_s
+            ]
+        for session_id, info in idle:
+            state = info['state_handle']
+            for key in SPILLABLE_KEYS:
+                if key in state:
+                    path = self._spill(state, key, session_id)
+                    if path is not None:
+                        info['spill_paths'].append(path)
+
+    def _compact_chat_history(self, session_state):
+        # Older messages are folded into the history summary rather than dropped
+        messages = session_state.get('chat_messages')
+        if not messages:
+            return
+        folded = compact_history(messages, limit=self.max_chat_messages)
+        if folded:
+            with self._lock:
+                self._counters['summarized_messages'] += folded
+
+    def _spill(self, session_state, key, session_id):
+        os.makedirs(self.spill_dir, exist_ok=True)
+        path = os.path.join(self.spill_dir, f"{session_id}_{key}.pkl")
+        try:
+            with open(path, 'wb') as f:
+                pickle.dump(session_state[key], f, protocol=pickle.HIGHEST_PROTOCOL)
+        except (OSError, pickle.PicklingError, TypeError):
+            logger.warning("Could not spill session entry %s", key)
+            return None
+
+        # Only item access is used here: idle sessions are reached through their raw session state
+        spilled = dict(session_state['_spilled_entries']) if '_spilled_entries' in session_state else {}
+        spilled[key] = path
+        session_state['_spilled_entries'] = spilled
+        del session_state[key]
+        with self._lock:
+            self._counters['spills'] += 1
+        return path
+
+    def _remove_spill_file(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _record(self, session_id, sizes, total, state_handle=None, data_version=None, spill_paths=None):
+        largest = max(sizes, key=sizes.get) if sizes else None
+        with self._lock:
+            info = self._sessions.setdefault(session_id, {
+                'history': deque(maxlen=LEAK_WINDOW + 1),
+                'largest_entry': None,
+                'growing_runs': 0
+            })
+            info['last_seen'] = time.monotonic()
+            info['state_handle'] = state_handle
+            info['data_version'] = data_version
+            # The run restored anything spilled earlier; only files written by this enforce remain
+            info['spill_paths'] = list(spill_paths or [])
+            previous = info['history'][-1] if info['history'] else None
+            info['history'].append(total)
+            info['largest_entry'] = largest
+            info['growing_runs'] = info['growing_runs'] + 1 if previous is not None and total > previous else 0
+            leaking = info['growing_runs'] == LEAK_WINDOW
+            if leaking:
+                self._counters['leak_warnings'] += 1
+
+        logger.info(
+            "session_memory session=%s total_bytes=%d largest_entry=%s largest_bytes=%d",
+            session_id, total, largest, sizes.get(largest, 0)
+        )
+        if leaking:
+            logger.warning(
+                "Session %s grew for %d consecutive runs (now %d bytes, largest entry %s)",
+                session_id, LEAK_WINDOW, total, largest
+            )
+
+
+memory_accountant = MemoryAccountant.from_env()
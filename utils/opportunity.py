@@ -0,0 +1,100 @@
+import numpy as np
+
+from utils.cache import VersionedCache
+
+# Score components in matrix column order, and their default weights
+SCORE_COMPONENTS = ['potential_revenue_b', 'growth_potential', 'penetration_headroom', 'market_size_b']
+DEFAULT_WEIGHTS = (0.4, 0.3, 0.2, 0.1)
+
+# Untapped corridors: low penetration with meaningful revenue potential
+UNTAPPED_MAX_PENETRATION = 20
+UNTAPPED_MIN_POTENTIAL_B = 3
+
+_rankings = VersionedCache("opportunity_rankings", max_entries=16)
+
+
+def top_k_indices(values, k, mask=None):
+    """Return the row positions of the k largest values, largest first"""
+    candidates = np.flatnonzero(mask) if mask is not None else np.arange(len(values))
+    k = min(k, len(candidates))
+    if k == 0:
+        return np.array([], dtype=np.int64)
+    candidate_values = values[candidates]
+    # argpartition finds the top k in O(n); only those k are fully sorted
+    top = candidates[np.argpartition(-candidate_values, k - 1)[:k]]
+    return top[np.argsort(-values[top], kind='stable')]
+
+
+def normalize_columns(matrix):
+    """Min-max scale each column of a matrix to [0, 1]"""
+    low = matrix.min(axis=0) if len(matrix) else np.zeros(matrix.shape[1])
+    span = (matrix.max(axis=0) - low) if len(matrix) else np.ones(matrix.shape[1])
+    span[span == 0] = 1.0
+    return np.ascontiguousarray((matrix - low) / span)
+
+
+class OpportunityRanking:
+    """Opportunity scores and top-K lists per ranking criterion for one data version"""
+
+    def __init__(self, opportunity_data, weights=DEFAULT_WEIGHTS, k=10):
+        self.data = opportunity_data.reset_index(drop=True)
+        self.k = k
+        self.weights = np.asarray(weights, dtype=np.float64)
+
+        potential = self.data['potential_revenue_b'].to_numpy(dtype=np.float64)
+        growth = self.data['growth_potential'].to_numpy(dtype=np.float64)
+        penetration = self.data['current_penetration'].to_numpy(dtype=np.float64)
+        market_size = self.data['market_size_b'].to_numpy(dtype=np.float64)
+
+        # Components are normalized so the weights express relative importance
+        # regardless of each component's units
+        self.components = normalize_columns(
+            np.column_stack([potential, growth, 100 - penetration, market_size])
+        )
+        self.scores = self.score(self.weights)
+
+        untapped = (penetration < UNTAPPED_MAX_PENETRATION) & (potential > UNTAPPED_MIN_POTENTIAL_B)
+        self.top = {
+            'opportunity_score': top_k_indices(self.scores, k),
+            'potential_revenue_b': top_k_indices(potential, k),
+            'growth_potential': top_k_indices(growth, k),
+            'untapped': top_k_indices(potential, k, mask=untapped)
+        }
+
+    def score(self, weights):
+        """Return 0-100 opportunity scores for a weight vector"""
+        weights = np.asarray(weights, dtype=np.float64)
+        total = weights.sum()
+        if total <= 0:
+            return np.zeros(len(self.components))
+        return self.components @ (weights * (100.0 / total))
+
+    def rerank(self, weights, k=None):
+        """Return the top-k positions and all scores for new weights without recomputing components"""
+        scores = self.score(weights)
+        return top_k_indices(scores, self.k if k is None else k), scores
+
+    def table(self, criterion, n=None, columns=None):
+        """Return the top rows for a criterion as a DataFrame including the score"""
+        return self._rows(self.top[criterion][:n], self.scores, columns)
+
+    def score_table(self, weights, n=None, columns=None):
+        """Return the top rows by opportunity score for custom weights"""
+        positions, scores = self.rerank(weights, n)
+        return self._rows(positions, scores, columns)
+
+    def _rows(self, positions, scores, columns):
+        table = self.data.iloc[positions].copy()
+        table['opportunity_score'] = scores[positions]
+        if columns is not None:
+            table = table[columns]
+        return table.reset_index(drop=True)
+
+
+def get_opportunity_ranking(data_generator, k=10):
+    """Return the opportunity ranking for a data generator, computed once per data version"""
+    return _rankings.get_or_compute(
+        data_generator.data_version,
+        k,
+        lambda: OpportunityRanking(data_generator.opportunity_data, DEFAULT_WEIGHTS, k)
+    )
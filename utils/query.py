@@ -0,0 +1,213 @@
+import re
+
+from utils.fiscal_calendar import NAMED_PERIODS, parse_quarter_label, quarter_end_of, quarter_start
+from utils.fx import BASE_CURRENCY, CURRENCY_SYMBOLS
+
+# Queryable revenue_data measures and the phrases that ask for them; monetary
+# labels take the symbol of the query's currency
+METRICS = {
+    'revenue_b': {'label': 'Revenue run rate ({symbol}B)', 'monetary': True, 'terms': ['revenue', 'sales', 'income']},
+    'transactions_m': {'label': 'Transactions (M)', 'terms': ['transactions', 'transaction count', 'transaction']},
+    'volume_growth_pct': {'label': 'Volume growth (%)', 'terms': ['volume growth', 'volume']},
+    'yield_pct': {'label': 'Yield (%)', 'terms': ['yield']}
+}
+# Dimension values and their spellings; longer phrases are matched first so
+# "B2B Connect" is read as a product before "B2B" is read as a segment
+DIMENSION_TERMS = {
+    'products': {
+        'Visa Direct': ['visa direct'],
+        'B2B Connect': ['b2b connect'],
+        'Traditional Cards': ['traditional cards', 'traditional card', 'cards'],
+        'Other Services': ['other services']
+    },
+    'segments': {
+        'Travel': ['travel'],
+        'E-commerce': ['e-commerce', 'ecommerce', 'e commerce', 'online'],
+        'B2B': ['b2b'],
+        'Remittances': ['remittances', 'remittance']
+    },
+    'regions': {
+        'North America': ['north america', 'usa'],
+        'Europe': ['europe', 'eu'],
+        'Asia-Pacific': ['asia-pacific', 'asia pacific', 'apac'],
+        'Latin America': ['latin america', 'latam'],
+        'Middle East & Africa': ['middle east & africa', 'middle east and africa', 'middle east', 'africa', 'mea']
+    }
+}
+GROUP_BY_TERMS = {
+    'segment': ['segment', 'segments'],
+    'region': ['region', 'regions', 'geography'],
+    'product': ['product', 'products'],
+    'quarter': ['quarter', 'quarters', 'quarterly']
+}
+FORMAT_TERMS = {
+    'csv': ['csv', 'spreadsheet'],
+    'excel': ['excel', 'xlsx', 'xls', 'workbook'],
+    'json': ['json'],
+    'pdf': ['pdf']
+}
+CURRENCY_TERMS = {
+    'USD': ['usd', 'dollars'],
+    'EUR': ['eur', 'euro', 'euros'],
+    'GBP': ['gbp', 'pounds', 'sterling'],
+    'JPY': ['jpy', 'yen']
+}
+EXPORT_TERMS = ['export', 'download', 'extract', 'csv', 'excel', 'xlsx', 'json', 'file']
+
+
+def _normalize(text):
+    return " " + re.sub(r"[^a-z0-9&\-]+", " ", text.lower()) + " "
+
+
+def _has_term(text, term):
+    return f" {term} " in text
+
+
+def _take_terms(text, vocabulary):
+    """Values whose phrases occur in text, and the text with the matched phrases blanked out"""
+    matches = []
+    phrases = sorted(
+        ((phrase, value) for value, terms in vocabulary.items() for phrase in terms),
+        key=lambda item: len(item[0]), reverse=True
+    )
+    for phrase, value in phrases:
+        if _has_term(text, phrase):
+            text = text.replace(f" {phrase} ", " ")
+            if value not in matches:
+                matches.append(value)
+    return matches, text
+
+
+def _parse_period(text, quarters):
+    """(date_range, named period, label) for the first period mentioned, resolved against the data's quarters"""
+    for period in NAMED_PERIODS:
+        if _has_term(text, period.lower()):
+            return None, period, period
+    if _has_term(text, 'ytd') or _has_term(text, 'year to date'):
+        return None, 'YTD', 'YTD'
+
+    text = re.sub(r"[-/]", " ", text)
+    latest_year, latest_quarter = parse_quarter_label(quarters[-1])
+    if re.search(r" (last|latest|most recent|current) quarter ", text):
+        year, quarter = latest_year, latest_quarter
+    else:
+        quarter_match = re.search(r" q([1-4]) ", text)
+        year_match = re.search(r" (?:fy ?|fiscal )?(20\d{2}) ", text)
+        if quarter_match is None and year_match is None:
+            return None, None, None
+        if quarter_match is None:
+            year = int(year_match.group(1))
+            start, end = quarter_start(year, 1), quarter_end_of(quarter_start(year, 4))
+            return (start, end), None, f"FY{year}"
+        quarter = int(quarter_match.group(1))
+        if year_match is not None:
+            year = int(year_match.group(1))
+        else:
+            # A bare quarter means its most recent occurrence in the data
+            year = latest_year if quarter <= latest_quarter else latest_year - 1
+    start = quarter_start(year, quarter)
+    return (start, quarter_end_of(start)), None, f"FY{year}-Q{quarter}"
+
+
+class Query:
+    """Structured query over revenue_data: metrics, grouping, global-filter selections and output format"""
+
+    def __init__(self, metrics, group_by, segments=None, regions=None, products=None, period=None,
+                 date_range=None, period_label=None, currency=BASE_CURRENCY, fmt='csv', constrained=True):
+        self.metrics = list(metrics)
+        self.group_by = list(group_by)
+        self.segments = segments or []
+        self.regions = regions or []
+        self.products = products or []
+        self.period = period
+        self.date_range = date_range
+        self.period_label = period_label
+        self.currency = currency
+        self.fmt = fmt
+        # Whether the request named anything to select on, beyond asking for an export
+        self.constrained = constrained
+
+    def filters(self):
+        """The query's selections as a global filters dict for DataGenerator"""
+        filters = {'currency': self.currency}
+        for key in ('segments', 'regions', 'products'):
+            if getattr(self, key):
+                filters[key] = getattr(self, key)
+        if self.period is not None:
+            filters['period'] = self.period
+        elif self.date_range is not None:
+            filters['date_range'] = self.date_range
+        return filters
+
+    def metric_label(self, metric):
+        return METRICS[metric]['label'].format(symbol=CURRENCY_SYMBOLS[self.currency])
+
+    def column_name(self, metric):
+        """Output column for a metric; monetary columns outside the base currency carry its code"""
+        if not METRICS[metric].get('monetary') or self.currency == BASE_CURRENCY:
+            return metric
+        name, unit = metric.rsplit('_', 1)
+        return f"{name}_{self.currency.lower()}_{unit}"
+
+    def describe(self):
+        parts = [", ".join(self.metric_label(metric) for metric in self.metrics)]
+        parts.append(f"by {', '.join(self.group_by)}")
+        for key in ('segments', 'regions', 'products'):
+            if getattr(self, key):
+                parts.append(f"{key}: {', '.join(getattr(self, key))}")
+        parts.append(f"period: {self.period_label or 'all available quarters'}")
+        if self.currency != BASE_CURRENCY:
+            parts.append(f"in {self.currency} ({CURRENCY_SYMBOLS[self.currency]})")
+        return "; ".join(parts)
+
+    def filename(self):
+        stem = "_".join(
+            ["visa_query", *self.group_by, *(self.period_label or "all").replace("-", "_").split()]
+        ).lower()
+        return re.sub(r"[^a-z0-9_]+", "", stem)
+
+
+def is_export_request(text):
+    """Whether a message asks for data to be exported rather than for an answer"""
+    normalized = _normalize(text)
+    return any(_has_term(normalized, term) for term in EXPORT_TERMS)
+
+
+def parse_query(text, quarters):
+    """Parse a constrained natural-language request into a Query; quarters are the data's quarter labels"""
+    normalized = _normalize(text)
+    selections = {}
+    for key, vocabulary in DIMENSION_TERMS.items():
+        selections[key], normalized = _take_terms(normalized, vocabulary)
+
+    date_range, period, period_label = _parse_period(normalized, quarters)
+    formats, normalized = _take_terms(normalized, FORMAT_TERMS)
+    currencies, normalized = _take_terms(normalized, CURRENCY_TERMS)
+
+    group_by = []
+    for match in re.finditer(r" (?:by|per|for each|across) ([a-z]+)", normalized):
+        for column, terms in GROUP_BY_TERMS.items():
+            if match.group(1) in terms and column not in group_by:
+                group_by.append(column)
+    if 'quarter' not in group_by:
+        group_by.append('quarter')
+
+    # Named measures win; otherwise (including "performance metrics") export every measure
+    named_metrics, _ = _take_terms(normalized, {metric: spec['terms'] for metric, spec in METRICS.items()})
+    metrics = [metric for metric in METRICS if metric in named_metrics] or list(METRICS)
+    constrained = bool(
+        named_metrics or formats or date_range or period or len(group_by) > 1 or any(selections.values())
+    )
+
+    return Query(
+        metrics, group_by, period=period, date_range=date_range, period_label=period_label,
+        currency=currencies[0] if currencies else BASE_CURRENCY, fmt=formats[0] if formats else 'csv',
+        constrained=constrained, **selections
+    )
+
+
+def run_query(data_generator, query):
+    """Execute a query through the cached, index-backed revenue rollup"""
+    rollup = data_generator.get_revenue_rollup(query.filters(), query.group_by)
+    result = rollup[query.group_by + query.metrics].sort_values(query.group_by).reset_index(drop=True)
+    return result.rename(columns={metric: query.column_name(metric) for metric in query.metrics})
@@ -0,0 +1,163 @@
+import numpy as np
+import pandas as pd
+
+from utils.cache import VersionedCache
+from utils.forecasting import FORECAST_WORKERS, annual_frame, fit_series, get_revenue_forecasts
+
+RECONCILIATION_METHODS = {
+    'mint': 'MinT (WLS)',
+    'bottom_up': 'Bottom-up',
+    'top_down': 'Top-down',
+    'base': 'Unreconciled'
+}
+
+# Conjugate gradient stopping rule for the MinT normal equations
+CG_TOLERANCE = 1e-10
+CG_MAX_ITERATIONS = 200
+
+_reconciled = VersionedCache("reconciled_forecasts", max_entries=8)
+
+
+class SummingMatrix:
+    """Sparse 0/1 summing matrix S mapping leaf series to every node of the hierarchy
+
+    Stored as index arrays: each leaf contributes one entry per level, so S has
+    n_leaves * n_levels non-zeros and products with it cost O(nnz) rather than
+    O(n_nodes * n_leaves). Rows are also kept in CSR order so S @ x is a single
+    segmented sum.
+    """
+
+    def __init__(self, leaf_keys, levels):
+        self.n_leaves = len(leaf_keys)
+        node_keys = [{'level': 'Total', 'name': 'Total'}]
+        rows = [np.zeros(self.n_leaves, dtype=np.int64)]
+        for column in levels:
+            codes, names = pd.factorize(leaf_keys[column], sort=True)
+            rows.append(len(node_keys) + codes)
+            node_keys.extend({'level': column, 'name': name} for name in names)
+        leaf_names = leaf_keys[levels].astype(str).agg(' / '.join, axis=1)
+        rows.append(len(node_keys) + np.arange(self.n_leaves))
+        node_keys.extend({'level': 'leaf', 'name': name} for name in leaf_names)
+
+        self.node_keys = pd.DataFrame(node_keys)
+        self.n_nodes = len(node_keys)
+        self.n_levels = len(rows)
+        # rows[l * n_leaves + j] is the node that leaf j rolls into at level l
+        self.rows = np.concatenate(rows)
+        self.cols = np.tile(np.arange(self.n_leaves), self.n_levels)
+        order = np.argsort(self.rows, kind='stable')
+        self.csr_cols = self.cols[order]
+        self.indptr = np.searchsorted(self.rows[order], np.arange(self.n_nodes))
+        self.leaf_nodes = np.arange(self.n_nodes - self.n_leaves, self.n_nodes)
+
+    def dot(self, x):
+        """S @ x for x of shape (n_leaves, ...)"""
+        return np.add.reduceat(x[self.csr_cols], self.indptr, axis=0)
+
+    def tdot(self, y):
+        """S.T @ y for y of shape (n_nodes, ...)"""
+        return y[self.rows].reshape((self.n_levels, self.n_leaves) + y.shape[1:]).sum(axis=0)
+
+    def gram_diagonal(self, weights):
+        """Diagonal of S.T @ diag(weights) @ S, with weights of shape (n_nodes, ...)"""
+        return self.tdot(weights)
+
+
+def solve_gram(summing, weights, rhs):
+    """Solve (S.T W S) x = rhs column by column with Jacobi-preconditioned conjugate gradients
+
+    weights holds the diagonal of W per column, shape (n_nodes, k); every column
+    has its own system and all of them are iterated together.
+    """
+    preconditioner = 1 / summing.gram_diagonal(weights)
+    x = np.zeros_like(rhs)
+    residual = rhs.copy()
+    z = preconditioner * residual
+    direction = z.copy()
+    rz = (residual * z).sum(axis=0)
+    scale = np.sqrt((rhs ** 2).sum(axis=0)) + 1e-300
+    for _ in range(CG_MAX_ITERATIONS):
+        product = summing.tdot(weights * summing.dot(direction))
+        step = rz / np.maximum((direction * product).sum(axis=0), 1e-300)
+        x += step * direction
+        residual -= step * product
+        if (np.sqrt((residual ** 2).sum(axis=0)) / scale).max() < CG_TOLERANCE:
+            break
+        z = preconditioner * residual
+        rz_next = (residual * z).sum(axis=0)
+        direction = z + (rz_next / np.maximum(rz, 1e-300)) * direction
+        rz = rz_next
+    return x
+
+
+class HierarchicalForecasts:
+    """Base forecasts for every node of the total / level / leaf hierarchy, reconciled three ways"""
+
+    def __init__(self, leaf_forecasts, workers=FORECAST_WORKERS):
+        self.leaf_forecasts = leaf_forecasts
+        self.summing = SummingMatrix(leaf_forecasts.keys, leaf_forecasts.by)
+        self.nodes = self.summing.node_keys
+        self.history = self.summing.dot(leaf_forecasts.history)
+
+        # Aggregate nodes get their own models; the leaf fits are reused as they are
+        aggregates = self.history[:self.summing.n_nodes - self.summing.n_leaves]
+        fitted = fit_series(aggregates, leaf_forecasts.horizon, workers)
+        self.base_point = np.vstack([fitted['point'], leaf_forecasts.point])
+        self.base_sd = np.vstack([fitted['sd'], leaf_forecasts.sd])
+        self.model = np.concatenate([fitted['model'], leaf_forecasts.model])
+
+        self.reconciled = {
+            'base': self.base_point,
+            'bottom_up': self.summing.dot(leaf_forecasts.point),
+            'top_down': self.summing.dot(self._top_down_leaves()),
+            'mint': self.summing.dot(self._mint_leaves())
+        }
+        self.coherence_error = {
+            method: float(np.abs(point[0] - point[self.summing.leaf_nodes].sum(axis=0)).max())
+            for method, point in self.reconciled.items()
+        }
+
+    def _top_down_leaves(self):
+        # Gross-Sohl method A: average historical share of the total per leaf
+        leaf_history = self.history[self.summing.leaf_nodes]
+        shares = (leaf_history / self.history[0]).mean(axis=1)
+        return shares[:, None] * self.base_point[0]
+
+    def _mint_leaves(self):
+        # MinT with a diagonal W of base forecast variances per horizon (WLS):
+        # leaves = (S' W^-1 S)^-1 S' W^-1 y_hat
+        precision = 1 / np.maximum(self.base_sd, 1e-12) ** 2
+        rhs = self.summing.tdot(precision * self.base_point)
+        return solve_gram(self.summing, precision, rhs)
+
+    def annual_total(self, method='mint', level=0.8):
+        """Fiscal-year revenue at the top of the hierarchy for one reconciliation method
+
+        Intervals come from the base total model; reconciliation moves the point
+        forecast so it agrees with the levels below.
+        """
+        leaves = self.leaf_forecasts
+        return annual_frame(self.history[:1], self.reconciled[method][:1], self.base_sd[:1],
+                            leaves.history_years, leaves.future_years, level)
+
+    def comparison(self, method='mint', year=None):
+        """Base and reconciled forecasts per aggregate node for one fiscal year"""
+        leaves = self.leaf_forecasts
+        year = int(leaves.future_years.max()) if year is None else year
+        in_year = leaves.future_years == year
+        aggregates = slice(0, self.summing.n_nodes - self.summing.n_leaves)
+        table = self.nodes.iloc[aggregates].copy()
+        table['model'] = self.model[aggregates]
+        table['base_b'] = self.base_point[aggregates][:, in_year].mean(axis=1)
+        table['reconciled_b'] = self.reconciled[method][aggregates][:, in_year].mean(axis=1)
+        table['adjustment_pct'] = (table['reconciled_b'] / table['base_b'] - 1) * 100
+        return table.reset_index(drop=True)
+
+
+def get_reconciled_forecasts(data_generator):
+    """Return the reconciled forecast hierarchy, built on the cached leaf forecasts once per data version"""
+    return _reconciled.get_or_compute(
+        data_generator.data_version,
+        ('segment', 'region'),
+        lambda: HierarchicalForecasts(get_revenue_forecasts(data_generator))
+    )
@@ -0,0 +1,146 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+
+def _sparse_table(values, reducer):
+    """Levels of pairwise reductions so any range max/min is two lookups"""
+    levels = [values]
+    span = 1
+    while 2 * span <= len(values):
+        previous = levels[-1]
+        levels.append(reducer(previous[:-span], previous[span:]))
+        span *= 2
+    return levels
+
+
+class RiskTimeSeries:
+    """Array-backed daily risk KPI store with O(1) windowed aggregates"""
+
+    def __init__(self, dates, metrics, capacity=None):
+        dates = pd.to_datetime(pd.Series(dates)).to_numpy(dtype='datetime64[D]')
+        self.metric_names = list(metrics)
+        self.size = len(dates)
+        capacity = max(capacity or 0, self.size, 16)
+
+        self._lock = threading.Lock()
+        self._dates = np.empty(capacity, dtype='datetime64[D]')
+        self._dates[:self.size] = dates
+        # One column per metric, plus a prefix-sum column with a leading zero
+        self._values = np.empty((capacity, len(self.metric_names)), dtype=np.float64)
+        self._prefix = np.zeros((capacity + 1, len(self.metric_names)), dtype=np.float64)
+        for column, name in enumerate(self.metric_names):
+            self._values[:self.size, column] = np.asarray(metrics[name], dtype=np.float64)
+        np.cumsum(self._values[:self.size], axis=0, out=self._prefix[1:self.size + 1])
+
+        self._threshold_prefix = {}
+        self._sparse = {}
+
+    def __getstate__(self):
+        # Locks cannot be pickled; session spilling pickles the whole data generator
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    @property
+    def dates(self):
+        return self._dates[:self.size]
+
+    def values(self, metric):
+        return self._values[:self.size, self.metric_names.index(metric)]
+
+    def append(self, date, metrics):
+        """Append one day of metric values, extending the prefix sums in O(1)"""
+        with self._lock:
+            if self.size == len(self._dates):
+                self._grow()
+            row = np.array([metrics[name] for name in self.metric_names], dtype=np.float64)
+            self._dates[self.size] = np.datetime64(pd.Timestamp(date).date(), 'D')
+            self._values[self.size] = row
+            self._prefix[self.size + 1] = self._prefix[self.size] + row
+            # Threshold counts and range max/min tables are rebuilt lazily on next query
+            self._threshold_prefix.clear()
+            self._sparse.clear()
+            self.size += 1
+
+    def row_range(self, start, end):
+        """Half-open row range of days with start <= date <= end"""
+        lo = np.searchsorted(self.dates, np.datetime64(pd.Timestamp(start).date(), 'D'), side='left')
+        hi = np.searchsorted(self.dates, np.datetime64(pd.Timestamp(end).date(), 'D'), side='right')
+        return int(lo), int(max(lo, hi))
+
+    def last_days(self, days):
+        """Row range covering the most recent number of days"""
+        return max(self.size - days, 0), self.size
+
+    def window_sum(self, metric, lo, hi):
+        column = self.metric_names.index(metric)
+        return float(self._prefix[hi, column] - self._prefix[lo, column])
+
+    def window_mean(self, metric, lo, hi):
+        return self.window_sum(metric, lo, hi) / (hi - lo) if hi > lo else float('nan')
+
+    def window_max(self, metric, lo, hi):
+        return self._range_reduce(metric, lo, hi, np.maximum)
+
+    def window_min(self, metric, lo, hi):
+        return self._range_reduce(metric, lo, hi, np.minimum)
+
+    def count_over(self, metric, threshold, lo, hi):
+        """Number of days in the window where the metric exceeds a threshold"""
+        prefix = self._threshold_counts(metric, threshold)
+        return int(prefix[hi] - prefix[lo])
+
+    def snapshot(self, days=30):
+        """Mean of every metric over the most recent days"""
+        lo, hi = self.last_days(days)
+        return {name: self.window_mean(name, lo, hi) for name in self.metric_names}
+
+    def monthly(self, metric, months, how='mean'):
+        """Per-month aggregates for the most recent complete and current months"""
+        month_starts = pd.date_range(
+            end=pd.Timestamp(self.dates[-1]).to_period('M').to_timestamp(), periods=months, freq='MS'
+        )
+        boundaries = np.searchsorted(self.dates, month_starts.to_numpy(dtype='datetime64[D]'), side='left')
+        boundaries = np.append(boundaries, self.size)
+        column = self.metric_names.index(metric)
+        sums = np.diff(self._prefix[boundaries, column])
+        if how == 'sum':
+            values = sums
+        else:
+            counts = np.diff(boundaries)
+            values = np.divide(sums, counts, out=np.full(len(sums), np.nan), where=counts > 0)
+        return pd.Series(values, index=month_starts.strftime('%b %Y'), name=metric)
+
+    def _threshold_counts(self, metric, threshold):
+        column = self.metric_names.index(metric)
+        key = (column, threshold)
+        if key not in self._threshold_prefix:
+            exceeded = (self._values[:self.size, column] > threshold).astype(np.int64)
+            self._threshold_prefix[key] = np.concatenate(([0], np.cumsum(exceeded)))
+        return self._threshold_prefix[key]
+
+    def _range_reduce(self, metric, lo, hi, reducer):
+        if hi <= lo:
+            return float('nan')
+        key = (metric, reducer.__name__)
+        if key not in self._sparse:
+            self._sparse[key] = _sparse_table(self.values(metric).copy(), reducer)
+        levels = self._sparse[key]
+        level = (hi - lo).bit_length() - 1
+        return float(reducer(levels[level][lo], levels[level][hi - (1 << level)]))
+
+    def _grow(self):
+        capacity = len(self._dates) * 2
+        dates = np.empty(capacity, dtype='datetime64[D]')
+        dates[:self.size] = self._dates[:self.size]
+        values = np.empty((capacity, len(self.metric_names)), dtype=np.float64)
+        values[:self.size] = self._values[:self.size]
+        prefix = np.zeros((capacity + 1, len(self.metric_names)), dtype=np.float64)
+        prefix[:self.size + 1] = self._prefix[:self.size + 1]
+        self._dates, self._values, self._prefix = dates, values, prefix
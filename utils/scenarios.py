@@ -0,0 +1,134 @@
+import numpy as np
+import pandas as pd
+
+from utils.cache import STATIC_VERSION, VersionedCache
+from utils.trajectory import BASE_REVENUE_B, BASE_YEAR, TARGET_REVENUE_B, TARGET_YEAR, required_cagr
+
+# Custom scenario drivers: slider range and default, the neutral value at which the
+# driver has no effect, and the revenue impact in % per unit away from neutral
+SCENARIO_DRIVERS = {
+    'travel_recovery': {'label': 'Travel Recovery vs 2019 (%)', 'min': 80, 'max': 120, 'default': 100,
+                        'neutral': 100, 'impact': 0.3},
+    'ecommerce_growth': {'label': 'E-commerce Annual Growth (%)', 'min': 5, 'max': 25, 'default': 15,
+                         'neutral': 15, 'impact': 0.2},
+    'b2b_penetration': {'label': 'B2B Digital Penetration (%)', 'min': 20, 'max': 80, 'default': 50,
+                        'neutral': 50, 'impact': 0.15},
+    'new_market_entry': {'label': 'New Market Revenue Contribution (%)', 'min': 0, 'max': 20, 'default': 8,
+                         'neutral': 0, 'impact': 0.1},
+    'competitive_pressure': {'label': 'Competitive Pressure Impact (%)', 'min': -20, 'max': 0, 'default': -8,
+                             'neutral': 0, 'impact': 0.15},
+    'regulatory_support': {'label': 'Regulatory Environment Impact (%)', 'min': -10, 'max': 10, 'default': 2,
+                           'neutral': 0, 'impact': 0.1}
+}
+DRIVER_NAMES = list(SCENARIO_DRIVERS)
+_NEUTRAL = np.array([SCENARIO_DRIVERS[name]['neutral'] for name in DRIVER_NAMES], dtype=np.float64)
+_IMPACT = np.array([SCENARIO_DRIVERS[name]['impact'] for name in DRIVER_NAMES], dtype=np.float64)
+
+# Grid points evaluated per chunk; bounds peak memory regardless of grid size
+DEFAULT_CHUNK_SIZE = 1 << 18
+
+_grids = VersionedCache("scenario_grids", max_entries=16)
+
+
+def scenario_impact(values):
+    """Revenue impact in % for driver values with DRIVER_NAMES as the last axis"""
+    return (np.asarray(values, dtype=np.float64) - _NEUTRAL) @ _IMPACT
+
+
+def evaluate_scenarios(values, base_2030_revenue=TARGET_REVENUE_B):
+    """2030 revenue and the CAGR it requires from the FY2024 base, for rows of driver values"""
+    revenue = base_2030_revenue * (1 + scenario_impact(values) / 100)
+    return revenue, required_cagr(BASE_REVENUE_B, revenue, TARGET_YEAR - BASE_YEAR)
+
+
+def driver_axes(points):
+    """Evenly spaced values across every driver's slider range"""
+    return {
+        name: np.linspace(driver['min'], driver['max'], points)
+        for name, driver in SCENARIO_DRIVERS.items()
+    }
+
+
+class ScenarioGrid:
+    """Full-factorial sweep of the scenario drivers, evaluated in fixed-size chunks"""
+
+    def __init__(self, axes, surface_drivers=('travel_recovery', 'ecommerce_growth'),
+                 chunk_size=DEFAULT_CHUNK_SIZE, target=TARGET_REVENUE_B):
+        self.axes = {name: np.asarray(axes[name], dtype=np.float64) for name in DRIVER_NAMES}
+        self.shape = tuple(len(values) for values in self.axes.values())
+        self.size = int(np.prod(self.shape))
+        self.surface_drivers = tuple(surface_drivers)
+        self.chunk_size = chunk_size
+        self.target = target
+        self._evaluate()
+
+    def _evaluate(self):
+        x_axis, y_axis = (DRIVER_NAMES.index(name) for name in self.surface_drivers)
+        nx, ny = self.shape[x_axis], self.shape[y_axis]
+        revenue_sum = np.zeros(nx * ny)
+        hits = np.zeros(nx * ny)
+        cells = np.zeros(nx * ny)
+        self.revenue_min, self.revenue_max = np.inf, -np.inf
+        revenue_total, hits_total = 0.0, 0
+        columns = list(self.axes.values())
+
+        for start in range(0, self.size, self.chunk_size):
+            flat = np.arange(start, min(start + self.chunk_size, self.size))
+            coordinates = np.unravel_index(flat, self.shape)
+            values = np.column_stack([axis[index] for axis, index in zip(columns, coordinates)])
+            revenue, _ = evaluate_scenarios(values)
+
+            # Surface cells average over every combination of the other drivers
+            cell = coordinates[x_axis] * ny + coordinates[y_axis]
+            revenue_sum += np.bincount(cell, weights=revenue, minlength=nx * ny)
+            hits += np.bincount(cell, weights=revenue >= self.target, minlength=nx * ny)
+            cells += np.bincount(cell, minlength=nx * ny)
+            self.revenue_min = min(self.revenue_min, float(revenue.min()))
+            self.revenue_max = max(self.revenue_max, float(revenue.max()))
+            revenue_total += float(revenue.sum())
+            hits_total += int((revenue >= self.target).sum())
+
+        self.mean_revenue = revenue_total / self.size
+        self.target_share = hits_total / self.size
+        self.surface_revenue = (revenue_sum / cells).reshape(nx, ny)
+        self.surface_target_share = (hits / cells).reshape(nx, ny)
+
+    def surface(self, metric='revenue'):
+        """Response surface over the two surface drivers as a DataFrame (rows x, columns y)"""
+        x_name, y_name = self.surface_drivers
+        if metric == 'revenue':
+            values = self.surface_revenue
+        elif metric == 'required_cagr':
+            values = required_cagr(BASE_REVENUE_B, self.surface_revenue, TARGET_YEAR - BASE_YEAR)
+        else:
+            values = self.surface_target_share * 100
+        return pd.DataFrame(values, index=self.axes[x_name], columns=self.axes[y_name])
+
+
+def tornado(defaults=None):
+    """2030 revenue with each driver at its slider minimum and maximum, others held at defaults"""
+    defaults = {name: SCENARIO_DRIVERS[name]['default'] for name in DRIVER_NAMES} if defaults is None else defaults
+    base = np.array([defaults[name] for name in DRIVER_NAMES], dtype=np.float64)
+    # Rows: all drivers at default, then each driver at min, then each at max
+    rows = np.tile(base, (1 + 2 * len(DRIVER_NAMES), 1))
+    for i, name in enumerate(DRIVER_NAMES):
+        rows[1 + i, i] = SCENARIO_DRIVERS[name]['min']
+        rows[1 + len(DRIVER_NAMES) + i, i] = SCENARIO_DRIVERS[name]['max']
+    revenue, _ = evaluate_scenarios(rows)
+    table = pd.DataFrame({
+        'driver': [SCENARIO_DRIVERS[name]['label'] for name in DRIVER_NAMES],
+        'low': revenue[1:1 + len(DRIVER_NAMES)],
+        'high': revenue[1 + len(DRIVER_NAMES):],
+    })
+    table['base'] = revenue[0]
+    table['swing'] = (table['high'] - table['low']).abs()
+    return table.sort_values('swing').reset_index(drop=True)
+
+
+def get_scenario_grid(points, surface_drivers):
+    """Return the evaluated scenario grid for a resolution and surface; it depends only on the drivers"""
+    return _grids.get_or_compute(
+        STATIC_VERSION,
+        (points, tuple(surface_drivers)),
+        lambda: ScenarioGrid(driver_axes(points), surface_drivers)
+    )
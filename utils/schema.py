@@ -0,0 +1,99 @@
+import logging
+
+import pandas as pd
+
+logger = logging.getLogger("visa_dashboard.schema")
+
+# Marker for categoricals whose categories sort in a meaningful order (e.g. FY2024-Q1 < FY2024-Q2)
+ORDERED_CATEGORY = 'ordered_category'
+
+# Compact dtypes for every DataGenerator frame. Monetary and percentage values
+# are shown to at most two decimals, well within float32's ~7 significant digits.
+FRAME_SCHEMAS = {
+    'revenue_data': {
+        'quarter': ORDERED_CATEGORY,
+        'segment': 'category',
+        'region': 'category',
+        'product': 'category',
+        'revenue_b': 'float32',
+        'volume_growth_pct': 'float32',
+        'transactions_m': 'float32',
+        'yield_pct': 'float32'
+    },
+    'geographic_data': {
+        'country': 'category',
+        'region': 'category',
+        'revenue_m': 'float32',
+        'growth_rate': 'float32',
+        'penetration': 'float32',
+        'lat': 'float32',
+        'lon': 'float32'
+    },
+    'product_data': {
+        'product': 'category',
+        'transactions_b': 'float32',
+        'growth_rate': 'int16',
+        'revenue_share': 'int16',
+        'avg_transaction_value': 'int32'
+    },
+    'opportunity_data': {
+        'corridor': 'category',
+        'potential_revenue_b': 'float32',
+        'current_penetration': 'float32',
+        'market_size_b': 'float32',
+        'visa_share': 'float32',
+        'growth_potential': 'float32'
+    },
+    'forecast_data': {
+        'year': 'int16',
+        'scenario': 'category',
+        'revenue_b': 'float32'
+    },
+    'incident_data': {
+        'incident_type': 'category',
+        'severity': 'category',
+        'region': 'category'
+    }
+}
+
+
+def frame_nbytes(df):
+    """Return the deep memory usage of a DataFrame in bytes"""
+    return int(df.memory_usage(deep=True).sum())
+
+
+def apply_schema(df, schema):
+    """Cast the columns of a DataFrame to the dtypes declared in a schema"""
+    casts = {}
+    for column, dtype in schema.items():
+        if column not in df.columns:
+            continue
+        if dtype == ORDERED_CATEGORY:
+            categories = sorted(df[column].dropna().unique())
+            casts[column] = pd.CategoricalDtype(categories, ordered=True)
+        else:
+            casts[column] = dtype
+    return df.astype(casts)
+
+
+def optimize_frames(frames, schemas=None):
+    """Apply the frame schemas and return the frames with a bytes-saved report"""
+    schemas = FRAME_SCHEMAS if schemas is None else schemas
+    optimized = {}
+    report = []
+
+    for name, df in frames.items():
+        bytes_before = frame_nbytes(df)
+        optimized[name] = apply_schema(df, schemas[name]) if name in schemas else df
+        bytes_after = frame_nbytes(optimized[name])
+        report.append({
+            'frame': name,
+            'rows': len(df),
+            'bytes_before': bytes_before,
+            'bytes_after': bytes_after,
+            'bytes_saved': bytes_before - bytes_after,
+            'pct_saved': (bytes_before - bytes_after) / bytes_before * 100 if bytes_before else 0.0
+        })
+        logger.info("%s: %d -> %d bytes", name, bytes_before, bytes_after)
+
+    return optimized, pd.DataFrame(report)
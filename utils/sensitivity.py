@@ -0,0 +1,128 @@
+import numpy as np
+import pandas as pd
+
+from utils.cache import STATIC_VERSION, VersionedCache
+from utils.scenarios import DRIVER_NAMES, SCENARIO_DRIVERS, scenario_impact
+from utils.trajectory import BASE_REVENUE_B, BASE_YEAR, TARGET_CAGR_PCT, TARGET_YEAR, project
+
+# Monte Carlo growth factors: multiplicative shocks to the plan CAGR
+MONTE_CARLO_DRIVERS = {
+    'economic_factor': {'label': 'Economic Conditions', 'mean': 1.0, 'sd': 0.15},
+    'market_factor': {'label': 'Market Dynamics', 'mean': 1.0, 'sd': 0.12},
+    'execution_factor': {'label': 'Execution', 'mean': 1.0, 'sd': 0.10}
+}
+SCENARIO_LABELS = {
+    'travel_recovery': 'Travel Recovery',
+    'ecommerce_growth': 'E-commerce Growth',
+    'b2b_penetration': 'B2B Adoption',
+    'new_market_entry': 'New Markets',
+    'competitive_pressure': 'Competition',
+    'regulatory_support': 'Regulations'
+}
+INPUT_NAMES = list(MONTE_CARLO_DRIVERS) + DRIVER_NAMES
+
+# One-at-a-time analysis moves each input to these quantiles of its distribution
+OAT_QUANTILES = (0.1, 0.9)
+_NORMAL_Z90 = 1.2815515655446004
+
+_analyses = VersionedCache("sensitivity_analyses", max_entries=16)
+
+
+def input_label(name):
+    if name in MONTE_CARLO_DRIVERS:
+        return MONTE_CARLO_DRIVERS[name]['label']
+    return SCENARIO_LABELS[name]
+
+
+def sample_inputs(rng, n):
+    """n draws of every input: normal growth shocks, scenario drivers uniform over their slider ranges"""
+    shocks = [
+        driver['mean'] + driver['sd'] * rng.standard_normal(n)
+        for driver in MONTE_CARLO_DRIVERS.values()
+    ]
+    scenario = [
+        rng.uniform(SCENARIO_DRIVERS[name]['min'], SCENARIO_DRIVERS[name]['max'], n)
+        for name in DRIVER_NAMES
+    ]
+    return np.column_stack(shocks + scenario)
+
+
+def input_quantiles(name):
+    """Values of an input at the one-at-a-time low and high quantiles"""
+    if name in MONTE_CARLO_DRIVERS:
+        driver = MONTE_CARLO_DRIVERS[name]
+        return driver['mean'] - _NORMAL_Z90 * driver['sd'], driver['mean'] + _NORMAL_Z90 * driver['sd']
+    driver = SCENARIO_DRIVERS[name]
+    span = driver['max'] - driver['min']
+    return driver['min'] + OAT_QUANTILES[0] * span, driver['min'] + OAT_QUANTILES[1] * span
+
+
+def forecast_model(inputs):
+    """2030 revenue for rows of inputs in INPUT_NAMES order"""
+    n_shocks = len(MONTE_CARLO_DRIVERS)
+    adjusted_cagr = TARGET_CAGR_PCT * inputs[:, :n_shocks].prod(axis=1)
+    revenue = project(BASE_REVENUE_B, adjusted_cagr, TARGET_YEAR - BASE_YEAR)
+    return revenue * (1 + scenario_impact(inputs[:, n_shocks:]) / 100)
+
+
+class SensitivityAnalysis:
+    """One-at-a-time and Sobol sensitivity of 2030 revenue to the forecast inputs"""
+
+    def __init__(self, n_samples=4096, seed=42):
+        self.n_samples = n_samples
+        self.seed = seed
+        # Common random numbers: every estimate below reuses the same two base samples
+        rng = np.random.RandomState(seed)
+        self.sample_a = sample_inputs(rng, n_samples)
+        self.sample_b = sample_inputs(rng, n_samples)
+        self.one_at_a_time = self._one_at_a_time()
+        self.sobol = self._sobol()
+
+    def _one_at_a_time(self):
+        k = len(INPUT_NAMES)
+        baseline = forecast_model(self.sample_a).mean()
+        # (2k, n, k) batch: each input pinned to its low then its high quantile
+        batch = np.broadcast_to(self.sample_a, (2 * k, self.n_samples, k)).copy()
+        for i, name in enumerate(INPUT_NAMES):
+            low, high = input_quantiles(name)
+            batch[i, :, i] = low
+            batch[k + i, :, i] = high
+        means = forecast_model(batch.reshape(-1, k)).reshape(2 * k, self.n_samples).mean(axis=1)
+        impact = (means / baseline - 1) * 100
+        low_impact, high_impact = impact[:k], impact[k:]
+        return pd.DataFrame({
+            'input': INPUT_NAMES,
+            'label': [input_label(name) for name in INPUT_NAMES],
+            'pessimistic_pct': np.minimum(low_impact, high_impact),
+            'optimistic_pct': np.maximum(low_impact, high_impact)
+        })
+
+    def _sobol(self):
+        k = len(INPUT_NAMES)
+        f_a = forecast_model(self.sample_a)
+        f_b = forecast_model(self.sample_b)
+        # A with column i taken from B, for every i, evaluated as one batch
+        mixed = np.broadcast_to(self.sample_a, (k, self.n_samples, k)).copy()
+        for i in range(k):
+            mixed[i, :, i] = self.sample_b[:, i]
+        f_mixed = forecast_model(mixed.reshape(-1, k)).reshape(k, self.n_samples)
+
+        variance = np.var(np.concatenate([f_a, f_b]))
+        # Saltelli (2010) first-order and Jansen total-effect estimators
+        first_order = (f_b * (f_mixed - f_a)).mean(axis=1) / variance
+        total = 0.5 * ((f_a - f_mixed) ** 2).mean(axis=1) / variance
+        return pd.DataFrame({
+            'input': INPUT_NAMES,
+            'label': [input_label(name) for name in INPUT_NAMES],
+            'first_order': np.clip(first_order, 0, None),
+            'total': np.clip(total, 0, None)
+        }).sort_values('total', ascending=False).reset_index(drop=True)
+
+
+def get_sensitivity(n_samples=4096, seed=42):
+    """Return the sensitivity analysis for a sample size and seed; it depends only on the plan inputs"""
+    return _analyses.get_or_compute(
+        STATIC_VERSION,
+        (n_samples, seed),
+        lambda: SensitivityAnalysis(n_samples, seed)
+    )
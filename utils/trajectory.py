@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+
+# Long-range plan: FY2024 base revenue and the 2030 target it grows into
+BASE_YEAR = 2024
+TARGET_YEAR = 2030
+BASE_REVENUE_B = 12.7
+TARGET_REVENUE_B = 22.5
+TARGET_CAGR_PCT = 10.0
+
+
+# Every function below broadcasts over NumPy arrays, so one call evaluates any
+# number of bases, targets, rates and horizons at once; scalars work too
+
+
+def periodic_rate(cagr_pct, periods_per_year=4):
+    """Per-period growth rate equivalent to an annual CAGR in percent"""
+    return (1 + np.asarray(cagr_pct, dtype=np.float64) / 100) ** (1 / periods_per_year) - 1
+
+
+def project(base, cagr_pct, years):
+    """Value after compounding base at cagr_pct for the given years"""
+    return np.asarray(base, dtype=np.float64) * (1 + np.asarray(cagr_pct, dtype=np.float64) / 100) ** np.asarray(years, dtype=np.float64)
+
+
+def target_path(base, cagr_pct, n_periods, periods_per_year=1):
+    """Trajectory of n_periods values from base; the last axis is the period"""
+    periods = np.arange(n_periods) / periods_per_year
+    return project(np.asarray(base)[..., None], np.asarray(cagr_pct)[..., None], periods)
+
+
+def cagr(start, end, years):
+    """Compound annual growth rate in percent between start and end over the given years"""
+    start = np.asarray(start, dtype=np.float64)
+    end = np.asarray(end, dtype=np.float64)
+    years = np.asarray(years, dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rate = ((end / start) ** (1 / years) - 1) * 100
+    return np.where((start > 0) & (years > 0), rate, np.nan)[()]
+
+
+def required_cagr(current, target=TARGET_REVENUE_B, years=TARGET_YEAR - BASE_YEAR):
+    """CAGR in percent needed to grow current into target within the given years"""
+    return cagr(current, target, years)
+
+
+def progress(current, base=BASE_REVENUE_B, target=TARGET_REVENUE_B):
+    """Share of the way from base to target, in percent"""
+    current = np.asarray(current, dtype=np.float64)
+    span = np.asarray(target, dtype=np.float64) - np.asarray(base, dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(span != 0, (current - base) / span * 100, np.nan)[()]
+
+
+def evaluate_plans(current, target, years_remaining, base=BASE_REVENUE_B, plan_cagr_pct=TARGET_CAGR_PCT):
+    """Required CAGR, progress and projected outcome for arrays of planning scenarios"""
+    current, target, years_remaining, base, plan_cagr_pct = np.broadcast_arrays(
+        *(np.asarray(x, dtype=np.float64) for x in (current, target, years_remaining, base, plan_cagr_pct))
+    )
+    projected = project(current, plan_cagr_pct, years_remaining)
+    return pd.DataFrame({
+        'current': current.ravel(),
+        'target': target.ravel(),
+        'years_remaining': years_remaining.ravel(),
+        'required_cagr_pct': required_cagr(current, target, years_remaining).ravel(),
+        'progress_pct': progress(current, base, target).ravel(),
+        'projected': projected.ravel(),
+        'gap': (target - projected).ravel(),
+        'on_track': (projected >= target).ravel()
+    })